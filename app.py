@@ -1,918 +1,175 @@
 import streamlit as st
-import json
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import os
 import time
 import smtplib
-import io
+import threading
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
-from groq import Groq
-from reportlab.pdfgen import canvas
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import Paragraph, Table, TableStyle
-from reportlab.lib.styles import ParagraphStyle
-from reportlab.lib.enums import TA_LEFT
-from PIL import Image
-from pypdf import PdfReader, PdfWriter
-from docx import Document
-from docx.shared import Pt, RGBColor, Inches, Cm
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.enum.table import WD_TABLE_ALIGNMENT, WD_ALIGN_VERTICAL
-from docx.oxml.ns import qn
-from docx.oxml import OxmlElement
-import requests
-from lxml import etree
+from artifact_index import artifact_key, get_artifact_index
+from llm_scheduler import get_scheduler
+from output_store import OUTPUT_CONFIG, get_output_sink
+from prescription_ai import (
+    get_ai_prescription_text, get_cache, get_store, get_inflight_stats, get_routing_stats, get_repair_stats,
+    get_usage_summary,
+    GROQ_MODEL, GROQ_TEMPERATURE, PROMPT_VERSION,
+)
+from prescription_doc import build_prescription
+from prescription_render import TEMPLATE_CONFIG, get_table_data_with_rowspan, template_version
+from render_pool import get_render_pool
 
 # ==========================================
-# API KEY & MAIL CONFIG
+# MAIL CONFIG
 # ==========================================
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GMAIL_USER = os.getenv("GMAIL_USER", "")
 GMAIL_PASSWORD = os.getenv("GMAIL_PASSWORD", "")
 
-# ==========================================
-# SPACING & MARGINS
-# ==========================================
-SPACING = {
-    'section_gap': 18,
-    'heading_gap': 10,
-    'bullet_gap': 5,
-    'paragraph_gap': 12,
-    'table_row_gap': 4,
-}
-
-MARGINS = {
-    'left': 50,
-    'right': 50,
-    'top': 15,
-    'bottom': 50,
-    'page_border': 10,
-}
-
-# ==========================================
-# CAREER TABLE DATA
-# ==========================================
-CAREER_TEMPLATES = {
-    "Finance": [
-        ["Finance Analytics", "Financial Data Analyst",
-         "Improve profitability, forecasting accuracy, and cost control using financial data",
-         "SQL, Excel, Python, Statistics, ML, GenAI, Financial Modeling",
-         "JP Morgan, HDFC Bank, American Express, Barclays"],
-        ["Finance Analytics", "Risk & Financial Planning Analyst",
-         "Predict financial risks, detect anomalies, and strengthen budgeting & planning",
-         "SQL, Python, Forecasting, Statistics, ML, GenAI",
-         "KPMG, EY, Deloitte, PwC"]
-    ],
-    "Healthcare": [
-        ["Healthcare Analytics", "Healthcare Data Analyst",
-         "Analyze patient and hospital data to improve outcomes, efficiency, and care quality",
-         "SQL, Python, Statistics, ML, GenAI, Healthcare Data",
-         "Apollo Hospitals, Fortis, Practo, Narayana Health"],
-        ["Healthcare Analytics", "Clinical Risk & Outcomes Analyst",
-         "Predict patient risks, track treatment effectiveness, and optimize resource utilization",
-         "SQL, Python, Statistics, ML, GenAI",
-         "GE Healthcare, Philips, Medtronic"]
-    ],
-    "E-Commerce": [
-        ["E-Commerce Analytics", "E-Commerce Data Analyst",
-         "Optimize sales, pricing, and conversion using customer and product data",
-         "SQL, Python, Statistics, ML, GenAI",
-         "Amazon, Flipkart, Meesho, Nykaa"],
-        ["E-Commerce Analytics", "Customer & Growth Analyst",
-         "Analyze customer behavior, churn, and campaign performance to drive growth",
-         "SQL, Python, Statistics, ML, GenAI",
-         "Myntra, Swiggy, Zomato"]
-    ],
-    "Supply Chain": [
-        ["Supply Chain Analytics", "Supply Chain Data Analyst",
-         "Forecast demand and optimize inventory, logistics, and procurement efficiency",
-         "SQL, Python, Statistics, ML, GenAI",
-         "Amazon, DHL, Flipkart, Delhivery"]
-    ],
-    "Automobile": [
-        ["Automobile Analytics", "Automotive Data Analyst",
-         "Analyze vehicle, sensor, and production data to improve quality and efficiency",
-         "SQL, Python, Statistics, ML, GenAI, IoT / Telematics Data",
-         "Tata Motors, Mahindra, Hyundai, Maruti Suzuki"],
-        ["Automobile Analytics", "Manufacturing Operations Analyst",
-         "Reduce defects, downtime, and production bottlenecks using analytics",
-         "SQL, Python, Time Series, ML, GenAI",
-         "Bosch, Continental, TVS Motor, Ashok Leyland"]
-    ],
-    "Manufacturing": [
-        ["Manufacturing Analytics", "Manufacturing Data Analyst",
-         "Optimize production output, quality, and operational costs",
-         "SQL, Python, Statistics, ML, GenAI, Process Data",
-         "Siemens, ABB, GE, Schneider Electric"]
-    ],
-    "Retail": [
-        ["Retail Analytics", "Retail Data Analyst",
-         "Optimize inventory, sales forecasting, and customer insights",
-         "SQL, Python, Statistics, ML, GenAI",
-         "Reliance Retail, DMart, Big Bazaar, Spencer's"]
-    ],
-    "HR Analytics": [
-        ["HR Analytics", "HR Data Analyst",
-         "Analyze workforce trends, attrition patterns, and recruitment effectiveness",
-         "SQL, Python, Statistics, ML, GenAI",
-         "Deloitte, Accenture, IBM, Wipro"]
-    ],
-    "Cyber Security": [
-        ["Cyber Security Analytics", "Security Data Analyst",
-         "Detect threats, analyze patterns, and strengthen security posture",
-         "SQL, Python, ML, GenAI, SIEM Tools",
-         "Cisco, Palo Alto, CrowdStrike, Fortinet"]
-    ]
-}
-
-# ==========================================
-# AI PRESCRIPTION GENERATOR
-# ==========================================
-def get_ai_prescription_text(selected_domains):
-    domain_str = " & ".join(selected_domains)
-    if not GROQ_API_KEY or GROQ_API_KEY == "your_groq_api_key_here":
-        return {"error": "API Key not configured"}
-
-    PROMPT = f"""You are a Senior Data Scientist at Analytics Avenue.
-Generate a JSON prescription for: {domain_str}
-CRITICAL RULES:
-1. Use <b>text</b> for bold formatting on domain names, technologies
-2. Return ONLY these keys:
-   - "intro_line": Introduction with <b> tags
-   - "domain_bullets": List of domain descriptions with <b> tags (one bullet per domain)
-   - "projects_bullet": Projects description with <b> tags
-   - "final_sentence": Closing with <b> tags
-
-For "Finance & Supply Chain":
-{{
-  "intro_line": "Given your background, we will support your transition into <b>Finance & Supply Chain Analytics</b> roles, enabling you to solve real business and operational problems using <b>Machine Learning and GenAI</b>.",
-  "domain_bullets": [
-    "In <b>Finance Analytics</b>, you will work on financial performance analysis, budgeting and forecasting, risk assessment, fraud pattern identification, and profitability optimization.",
-    "In <b>Supply Chain Analytics</b>, you will focus on demand forecasting, inventory optimization, logistics performance, supplier analysis, and end-to-end cost efficiency."
-  ],
-  "projects_bullet": "Hands-on projects include financial variance and profitability analysis, risk and anomaly detection, demand forecasting, inventory health analysis, logistics optimization, and supplier performance tracking. You will also leverage <b>GenAI</b> for automated insights, root-cause analysis, and conversational analytics (projects revealed during placement training).",
-  "final_sentence": "You will apply <b>SQL, Statistics, Machine Learning, and GenAI</b> to <b>finance and supply chain</b> datasets, preparing you for high-impact analytics roles across these domains."
-}}
-NOW GENERATE for: {domain_str}
-Match the style above with proper <b> tags. Return ONLY valid JSON."""
-
-    try:
-        client = Groq(api_key=GROQ_API_KEY)
-        completion = client.chat.completions.create(
-            messages=[{"role": "user", "content": PROMPT}],
-            model="llama-3.3-70b-versatile",
-            temperature=0.3,
-            response_format={"type": "json_object"}
-        )
-        data = json.loads(completion.choices[0].message.content)
-        data["domains_title"] = domain_str
-        return data
-    except Exception as e:
-        return {"error": str(e)}
-
+# Stream AI output and show each prescription section as soon as it arrives
+AI_STREAMING = os.getenv("AI_STREAMING", "1") != "0"
 
-def get_table_data_with_rowspan(selected_domains):
-    table_rows = []
-    domain_rowspan_map = {}
-    for domain in selected_domains:
-        if domain in CAREER_TEMPLATES:
-            domain_rows = CAREER_TEMPLATES[domain]
-            domain_rowspan_map[domain] = len(domain_rows)
-            table_rows.extend(domain_rows)
-    return table_rows, domain_rowspan_map
+# Default for the "Compact PDF" option: downsampled images and deduplicated
+# objects for smaller email attachments (see pdf_import.COMPACT_CONFIG)
+PDF_COMPACT = os.getenv("PDF_COMPACT", "0") == "1"
 
+# Start the Word document in the background as soon as the PDF is ready;
+# with 0 it is only rendered when the user asks for it
+DOCX_PREFETCH = os.getenv("DOCX_PREFETCH", "1") != "0"
 
-# ==========================================
-# PDF HELPER FUNCTIONS
-# ==========================================
-def draw_header_no_line(c, page_width, page_height):
-    header_path = "assets/header.png"
-    if not os.path.exists(header_path):
-        c.setFillColor(colors.red)
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(50, page_height - 50, "ERROR: header.png not found!")
-        return 100
-    try:
-        img = Image.open(header_path)
-        img_width, img_height = img.size
-        aspect_ratio = img_width / img_height
-
-        # Use full content width for maximum sharpness — no small scaling
-        L = MARGINS['left']
-        R = MARGINS['right']
-        header_width  = page_width - L - R
-        header_height = header_width / aspect_ratio
-
-        x_pos = L
-        y_pos = page_height - header_height - 10
-
-        c.drawImage(
-            header_path, x_pos, y_pos,
-            width=header_width, height=header_height,
-            preserveAspectRatio=True, mask='auto'
-        )
-
-        # Horizontal line below header — same as page 3
-        line_y = y_pos - 6
-        c.setStrokeColor(colors.black)
-        c.setLineWidth(1)
-        c.line(L, line_y, page_width - R, line_y)
-
-        return header_height + 30
-
-    except Exception as e:
-        return 100
-
+STATUS_OPTIONS = ["Working Professional", "Student", "Job Seeker"]
+DOMAIN_OPTIONS = ["Finance", "Supply Chain", "Healthcare", "HR Analytics", "E-Commerce",
+                  "Automobile", "Manufacturing", "Retail", "Cyber Security"]
 
 # ==========================================
-# PAGE 1 — PDF
+# OUTPUT REPORT
 # ==========================================
-def create_page1(c, name, status, ai_content):
-    page_width, page_height = A4
-    L = MARGINS['left']
-    R = page_width - MARGINS['right']
-    W = R - L
-
-    # Thin outer border — matches page 3
-    c.setStrokeColor(colors.black)
-    c.setLineWidth(0.8)
-    c.rect(8, 8, page_width - 16, page_height - 16, stroke=1, fill=0)
-
-    header_space = draw_header_no_line(c, page_width, page_height)
-    y = page_height - header_space - 15
-
-    style_normal = ParagraphStyle('Normal', fontName='Times-Roman', fontSize=11, leading=13, alignment=TA_LEFT)
-    style_bullet = ParagraphStyle('Bullet', parent=style_normal, leftIndent=7, firstLineIndent=-7, leading=13)
-
-    c.setFillColor(colors.black)
-    c.setFont('Times-Bold', 11)
-    c.drawString(L, y, f"Hi {name},")
-    y -= 14
-
-    intro_text = (
-        "Our Senior Data Scientist <b>Mr. Subramani</b>, has shared with you the "
-        "prescription based on your recent consultation to join our "
-        "<b>Nationwide Data Analytics Training and Placement Program 2025</b>."
+class OutputStats:
+    """Running size and render time of the generated files, per output and PDF mode."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = {}     # (output, mode) -> [files, bytes, min bytes, max bytes, seconds]
+
+    def record(self, output, mode, size_bytes, render_s):
+        with self._lock:
+            row = self._rows.setdefault((output, mode), [0, 0, size_bytes, size_bytes, 0.0])
+            row[0] += 1
+            row[1] += size_bytes
+            row[2] = min(row[2], size_bytes)
+            row[3] = max(row[3], size_bytes)
+            row[4] += render_s
+
+    def stats(self):
+        with self._lock:
+            return [
+                {
+                    "output":    output,
+                    "mode":      mode,
+                    "files":     files,
+                    "avg_kb":    round(total / files / 1024),
+                    "min_kb":    round(smallest / 1024),
+                    "max_kb":    round(largest / 1024),
+                    "avg_ms":    round(seconds / files * 1000),
+                }
+                for (output, mode), (files, total, smallest, largest, seconds) in sorted(self._rows.items())
+            ]
+
+
+@st.cache_resource(show_spinner=False)
+def get_output_stats():
+    return OutputStats()
+
+
+def report_output(output, mode, data, render_s):
+    """Record one generated file in the process-wide OutputStats and return its report row."""
+    size_bytes = len(data)
+    get_output_stats().record(output, mode, size_bytes, render_s)
+    return {"output": output, "mode": mode, "size_kb": size_bytes / 1024, "render_ms": render_s * 1000}
+
+
+def resolve_docx(wait):
+    """
+    Memoize the session's Word document once its background render is done.
+
+    With `wait`, start the render if it was never queued and block for it;
+    otherwise only pick up a job that has already finished.
+    """
+    job = st.session_state["docx_job"]
+    if job is None:
+        if not wait:
+            return
+        job = get_render_pool().submit_docx(st.session_state["prescription"])
+    result = get_render_pool().collect(job, wait=wait)
+    if result is None:
+        st.session_state["docx_job"] = job
+        return
+
+    docx_bytes, docx_err, render_s = result
+    st.session_state["docx_job"]   = None
+    st.session_state["docx_bytes"] = docx_bytes
+    st.session_state["docx_ok"]    = bool(docx_bytes)
+    st.session_state["docx_err"]   = docx_err or ""
+    if docx_bytes:
+        get_output_sink().save(f"{st.session_state['base_name']}.docx", docx_bytes)
+        st.session_state["output_report"].append(report_output("Word", "standard", docx_bytes, render_s))
+    if st.session_state["artifact_key"]:
+        # A repeated request reuses this document (or renders it again after an error)
+        get_artifact_index().update(st.session_state["artifact_key"], docx_job=None, docx_bytes=docx_bytes or b"")
+
+
+def make_base_name(name):
+    # output_store.GENERATED_FILE matches these names: only they are subject to retention
+    safe_name = "".join([c for c in name if c.isalnum() or c in (' ', '_')]).rstrip()
+    return f"Prescription_{safe_name.replace(' ', '_')}_{int(time.time())}"
+
+
+def render_outputs(prescription, compact, base_name):
+    """
+    Render the PDF of `prescription` and queue its Word document.
+
+    Returns:
+        (pdf bytes or None, PDF error or None, Word job for resolve_docx or None, report rows)
+    """
+    pdf_bytes, pdf_err, pdf_s = get_render_pool().render_pdf(prescription, compact=compact)
+    # The Word document is memoized by resolve_docx when it is first needed
+    docx_job = get_render_pool().submit_docx(prescription) if DOCX_PREFETCH else None
+
+    # Downloads and mail use the bytes; the disk copy is written in the background
+    output_report = []
+    if pdf_bytes:
+        get_output_sink().save(f"{base_name}.pdf", pdf_bytes)
+        output_report.append(report_output("PDF", "compact" if compact else "standard", pdf_bytes, pdf_s))
+    return pdf_bytes, pdf_err, docx_job, output_report
+
+
+def default_mail_body(name, domains_title):
+    return (
+        f"Dear {name},\n\n"
+        f"Thank you for your recent consultation with Analytics Avenue & Advanced Analytics.\n\n"
+        f"As discussed, please find attached your personalised Career Prescription prepared by "
+        f"our Senior Data Scientist Mr. Subramani. This document outlines your tailored roadmap, "
+        f"key outcomes, and domain-specific career opportunities in "
+        f"{domains_title or 'Data Analytics'}.\n\n"
+        f"Your prescription covers:\n"
+        f"  \u2022 Customised career roadmap across {domains_title}\n"
+        f"  \u2022 Key technical skills: SQL, Python, Statistics, Power BI, Machine Learning, Gen AI\n"
+        f"  \u2022 Industry-relevant projects and placement support\n\n"
+        f"To take the next step, please register and pay the initial \u20b95,000 to block your seat:\n"
+        f"Payment Link: https://pages.razorpay.com/OpenAnalyticsAvenue\n"
+        f"UPI: aard@uco\n\n"
+        f"Feel free to reach out for any queries.\n\n"
+        f"Warm regards,\n"
+        f"Data Consultant\n"
+        f"Analytics Avenue & Advanced Analytics\n"
+        f"Ph / WhatsApp: 9677298268\n"
+        f"Email: supportteam@analyticsavenue.in"
     )
-    p = Paragraph(intro_text, style_normal)
-    _, h = p.wrap(W, 120)
-    p.drawOn(c, L, y - h)
-    y -= h
-
-    y -= 12
-    c.setFont('Times-Bold', 11)
-    c.drawString(L, y, "About Us")
-    y -= 14
-
-    about_text = (
-        "At <b>Analytics Avenue and Advanced Analytics</b>, we are a team of "
-        "<b>Data Scientists, Data Engineers, and BI Developers</b> throughout India "
-        "across various MNCs joined together to keep a pause for unemployment and "
-        "empowered <b>500+ professionals</b> in the past year, enabling them to "
-        "transition into various <b>Data Analytics roles</b>."
-    )
-    p = Paragraph(about_text, style_normal)
-    _, h = p.wrap(W, 160)
-    p.drawOn(c, L, y - h)
-    y -= h
-
-    y -= 12
-    instr_text = "Below you can find the career road map, Key outcomes & suggestions given by our Data Scientist"
-    p_instr = Paragraph(f"<b>{instr_text}</b>", style_normal)
-    _, h = p_instr.wrap(W, 100)
-    p_instr.drawOn(c, L, y - h)
-    y -= (h + 10)
-
-    details = [
-        ("Name", name),
-        ("Status", status),
-        ("Technologies Needed", "SQL, Python, Statistics, Power BI, Machine Learning, Gen AI"),
-        ("Sectors Covered", ai_content.get('domains_title', 'Finance & Supply Chain'))
-    ]
-    COLON_X = L + 140
-    VALUE_X = COLON_X + 15
-    for label, value in details:
-        c.setFont('Times-Bold', 11)
-        c.drawString(L, y - 10, label)
-        c.drawString(COLON_X, y - 10, ":")
-        p_val = Paragraph(value, style_normal)
-        _, vh = p_val.wrap(R - VALUE_X, 120)
-        p_val.drawOn(c, VALUE_X, y - vh)
-        y -= (vh + 4)
-
-    y -= 12
-    c.setFont('Times-Bold', 11)
-    c.drawString(L, y, "Career Roadmap")
-    y -= 14
-
-    roadmap = [
-        "Step 1 \u2192 Learn Tools (SQL, Python, Statistics, Power BI, Machine Learning, Gen AI)",
-        "Step 2 \u2192 Domain-Specific Projects",
-        "Step 3 \u2192 Role Readiness (interviews, placement support)"
-    ]
-    for step in roadmap:
-        p_step = Paragraph(step, style_normal)
-        _, h = p_step.wrap(W, 100)
-        p_step.drawOn(c, L, y - h)
-        y -= (h + 3)
-
-    y -= 12
-    c.setFont('Times-Bold', 11)
-    c.drawString(L, y, "Key Outcomes")
-    y -= 14
-
-    outcomes = [
-        "Data Analysis Skills (SQL, Python, Visualization, Statistics)",
-        "Data Engineer Skills (Cloud, SQL, Python, Data Warehousing, ETL orchestration)",
-        "Machine Learning & Gen AI (LLMs, Prompt Engineering, RAG Pipelines, Embeddings, Vector Databases, Fine-Tuning & Deployment)",
-        f"Domain Knowledge ({ai_content.get('domains_title', 'Finance & Supply Chain')} etc.)",
-        "Recreate Industrial Standard projects worked by our Data Scientists",
-        "Placement opportunities, Organic job calls and referral drives"
-    ]
-    for item in outcomes:
-        p = Paragraph(f"• {item}", style_bullet)
-        _, h = p.wrap(W, 300)
-        p.drawOn(c, L, y - h)
-        y -= (h + 3)
-
-    y -= 12
-    c.setFont('Times-Bold', 11)
-    c.drawString(L, y, "Prescription:")
-    y -= 14
-
-    intro_line = ai_content.get('intro_line', "Given your background...")
-    p = Paragraph(intro_line, style_normal)
-    _, h = p.wrap(W, 140)
-    p.drawOn(c, L, y - h)
-    y -= (h + 8)
-
-    for b_text in ai_content.get('domain_bullets', []):
-        if b_text.strip():
-            p = Paragraph(f"• {b_text}", style_bullet)
-            _, h = p.wrap(W, 360)
-            p.drawOn(c, L, y - h)
-            y -= (h + 3)
-
-    projects_bullet = ai_content.get('projects_bullet')
-    if projects_bullet:
-        p = Paragraph(f"• {projects_bullet}", style_bullet)
-        _, h = p.wrap(W, 360)
-        p.drawOn(c, L, y - h)
-        y -= (h + 8)
-
-    final_sentence = ai_content.get('final_sentence', "")
-    if final_sentence:
-        p_final = Paragraph(final_sentence, style_normal)
-        _, fh = p_final.wrap(W, 140)
-        p_final.drawOn(c, L, y - fh)
-        y -= fh
-
-
-# ==========================================
-# PAGE 2 — PDF
-# ==========================================
-def create_page2(c, ai_content, table_rows, domain_rowspan_map):
-    page_width, page_height = A4
-
-    # Thin outer border — matches page 3
-    c.setStrokeColor(colors.black)
-    c.setLineWidth(0.8)
-    c.rect(8, 8, page_width - 16, page_height - 16, stroke=1, fill=0)
-
-    header_space = draw_header_no_line(c, page_width, page_height)
-    L = MARGINS['left']
-    R = page_width - MARGINS['right']
-    W = R - L
-    y = page_height - header_space - 15
-
-    style_small = ParagraphStyle('Small', fontName='Times-Roman', fontSize=11, leading=13, alignment=TA_LEFT)
-    style_heading = ParagraphStyle('Heading', fontName='Times-Bold', fontSize=11, leading=13, alignment=TA_LEFT)
-
-    c.setFillColor(colors.black)
-    c.setFont('Times-Bold', 11)
-    c.drawString(L, y, "Our Customized Services for you:")
-    y -= 14
-
-    services_data = [
-        [Paragraph("<b>Service</b>", style_heading), Paragraph("<b>Details</b>", style_heading)],
-        [Paragraph("<b>1. Industry-Relevant Projects</b>", style_heading),
-         Paragraph(f"Work on 3 projects across {ai_content['domains_title']}, focusing on data modeling, EDA, Machine Learning, and GenAI for forecasting, cost optimization, anomaly detection, and decision support.", style_small)],
-        [Paragraph("<b>2. Secret Job Portals Access</b>", style_heading),
-         Paragraph("Setup and optimize your profile on 9 exclusive job portals to help you receive organic job calls", style_small)],
-        [Paragraph("<b>3. Interview Preparation Materials</b>", style_heading),
-         Paragraph("Lifetime access to interview notes, preparation guides, and materials prepared by top Data Scientists in real interview scenarios", style_small)],
-        [Paragraph("<b>4. Monthly In-Person Training</b>", style_heading),
-         Paragraph("Attend monthly in-house classroom sessions (1 weekend per month) for revision, rapid preparation, and mentorship from experienced professionals", style_small)]
-    ]
-
-    services_table = Table(services_data, colWidths=[W * 0.32, W * 0.68])
-    services_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.white),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 8),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 5),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-    ]))
-    services_table.wrapOn(c, W, page_height)
-    services_h = services_table._height
-    services_table.drawOn(c, L, y - services_h)
-    y -= (services_h + 12)
-
-    c.setFont("Times-Bold", 11)
-    c.drawString(L, y, f"{ai_content['domains_title']} \u2013 Career Prescription Table")
-    y -= 14
-    c.setFont("Times-Italic", 11)
-    c.drawString(L, y, "(Actual projects will be revealed during placement training)")
-    y -= 14
-
-    headers = ["Domain", "Role", "Exciting Challenge", "Key Technical Skills", "Targeted Companies"]
-    career_data = [[Paragraph(f"<b>{h}</b>", style_heading) for h in headers]]
-
-    current_row = 1
-    processed_domains = {}
-    full_domain_rowspan = {}
-
-    for row in table_rows:
-        full_domain = row[0]
-        if full_domain not in processed_domains:
-            processed_domains[full_domain] = current_row
-            full_domain_rowspan[full_domain] = 1
-            career_data.append([
-                Paragraph(f"<b>{full_domain}</b>", style_small),
-                Paragraph(str(row[1]), style_small),
-                Paragraph(str(row[2]), style_small),
-                Paragraph(str(row[3]), style_small),
-                Paragraph(str(row[4]), style_small)
-            ])
-        else:
-            full_domain_rowspan[full_domain] += 1
-            career_data.append([
-                "",
-                Paragraph(str(row[1]), style_small),
-                Paragraph(str(row[2]), style_small),
-                Paragraph(str(row[3]), style_small),
-                Paragraph(str(row[4]), style_small)
-            ])
-        current_row += 1
-
-    col_widths = [W * 0.18, W * 0.15, W * 0.25, W * 0.20, W * 0.22]
-    career_table = Table(career_data, colWidths=col_widths, repeatRows=1)
-
-    table_style = [
-        ('BACKGROUND', (0, 0), (-1, 0), colors.white),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('BOX', (0, 0), (-1, -1), 1, colors.black),
-        ('LINEBELOW', (0, 0), (-1, 0), 1, colors.black),
-        ('INNERGRID', (1, 0), (-1, -1), 0.5, colors.black),
-        ('LINEAFTER', (0, 0), (0, -1), 1, colors.black),
-        ('LEFTPADDING', (0, 0), (-1, -1), 5),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-    ]
-
-    for full_domain, start_row in processed_domains.items():
-        rowspan = full_domain_rowspan[full_domain]
-        if rowspan > 1:
-            table_style.append(('SPAN', (0, start_row), (0, start_row + rowspan - 1)))
-            table_style.append(('VALIGN', (0, start_row), (0, start_row + rowspan - 1), 'MIDDLE'))
-            for sub_row in range(start_row, start_row + rowspan - 1):
-                table_style.append(('LINEBELOW', (1, sub_row), (-1, sub_row), 0.3, colors.lightgrey))
-        table_style.append(('LINEBELOW', (0, start_row + rowspan - 1), (-1, start_row + rowspan - 1), 1.5, colors.black))
-
-    career_table.setStyle(TableStyle(table_style))
-    career_table.wrapOn(c, W, page_height)
-    career_h = career_table._height
-    career_table.drawOn(c, L, y - career_h)
-
-
-# ==========================================
-# PDF GENERATION
-# ==========================================
-def create_final_pdf(name, status, ai_content, table_rows, domain_rowspan_map, output_path):
-    buffer1 = io.BytesIO()
-    c1 = canvas.Canvas(buffer1, pagesize=A4)
-    create_page1(c1, name, status, ai_content)
-    c1.save()
-    buffer1.seek(0)
-
-    buffer2 = io.BytesIO()
-    c2 = canvas.Canvas(buffer2, pagesize=A4)
-    create_page2(c2, ai_content, table_rows, domain_rowspan_map)
-    c2.save()
-    buffer2.seek(0)
-
-    writer = PdfWriter()
-    reader1 = PdfReader(buffer1)
-    writer.add_page(reader1.pages[0])
-    reader2 = PdfReader(buffer2)
-    writer.add_page(reader2.pages[0])
-
-    template_path = "assets/template.pdf"
-    if os.path.exists(template_path):
-        template_reader = PdfReader(template_path)
-        if len(template_reader.pages) >= 3:
-            page3_template = template_reader.pages[2]
-            if page3_template.mediabox.width != A4[0] or page3_template.mediabox.height != A4[1]:
-                page3_template.scale_to(A4[0], A4[1])
-            writer.add_page(page3_template)
-
-    with open(output_path, 'wb') as f:
-        writer.write(f)
-
-    return True, None
-
-
-# ==========================================
-# DOCX HELPER — set cell border
-# ==========================================
-def set_cell_border(cell, top=None, bottom=None, left=None, right=None):
-    tc = cell._tc
-    tcPr = tc.get_or_add_tcPr()
-    tcBorders = OxmlElement('w:tcBorders')
-    for side, val in [('top', top), ('bottom', bottom), ('left', left), ('right', right)]:
-        if val:
-            el = OxmlElement(f'w:{side}')
-            el.set(qn('w:val'), val.get('val', 'single'))
-            el.set(qn('w:sz'), str(val.get('sz', 4)))
-            el.set(qn('w:color'), val.get('color', '000000'))
-            tcBorders.append(el)
-    tcPr.append(tcBorders)
-
-
-def set_cell_bg(cell, hex_color):
-    tc = cell._tc
-    tcPr = tc.get_or_add_tcPr()
-    shd = OxmlElement('w:shd')
-    shd.set(qn('w:val'), 'clear')
-    shd.set(qn('w:color'), 'auto')
-    shd.set(qn('w:fill'), hex_color)
-    tcPr.append(shd)
-
-
-def add_bold_run(para, text, size_pt=11, color_hex=None):
-    run = para.add_run(text)
-    run.bold = True
-    run.font.size = Pt(size_pt)
-    if color_hex:
-        run.font.color.rgb = RGBColor.from_string(color_hex)
-    return run
-
-
-def add_run(para, text, bold=False, size_pt=11, italic=False):
-    run = para.add_run(text)
-    run.bold = bold
-    run.italic = italic
-    run.font.size = Pt(size_pt)
-    return run
-
-
-def parse_bold_text(para, html_text, size_pt=11):
-    """Parse <b>...</b> tags and add runs with correct bold formatting."""
-    import re
-    parts = re.split(r'(<b>.*?</b>)', html_text)
-    for part in parts:
-        if part.startswith('<b>') and part.endswith('</b>'):
-            inner = part[3:-4]
-            r = para.add_run(inner)
-            r.bold = True
-            r.font.size = Pt(size_pt)
-        else:
-            clean = part.replace('</b>', '').replace('<b>', '')
-            if clean:
-                r = para.add_run(clean)
-                r.bold = False
-                r.font.size = Pt(size_pt)
-
-
-# ==========================================
-# WORD DOCUMENT GENERATION
-# ==========================================
-def create_word_doc(name, status, ai_content, table_rows, domain_rowspan_map, output_path):
-    doc = Document()
-
-    # ── Page setup: A4, margins matching PDF ──
-    section = doc.sections[0]
-    section.page_width  = Cm(21)
-    section.page_height = Cm(29.7)
-    section.left_margin   = Cm(1.8)
-    section.right_margin  = Cm(1.8)
-    section.top_margin    = Cm(1.2)
-    section.bottom_margin = Cm(1.8)
-
-    # ── Default style ──
-    style = doc.styles['Normal']
-    style.font.name = 'Times New Roman'
-    style.font.size = Pt(11)
-
-    # ── HEADER IMAGE ──
-    header_path = "assets/header.png"
-    if os.path.exists(header_path):
-        header_para = doc.add_paragraph()
-        header_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        run = header_para.add_run()
-        run.add_picture(header_path, width=Inches(6.5))
-        header_para.paragraph_format.space_after = Pt(6)
-
-    # ── Divider line ──
-    div_para = doc.add_paragraph()
-    div_para.paragraph_format.space_before = Pt(0)
-    div_para.paragraph_format.space_after = Pt(8)
-    pPr = div_para._p.get_or_add_pPr()
-    pBdr = OxmlElement('w:pBdr')
-    bottom_bdr = OxmlElement('w:bottom')
-    bottom_bdr.set(qn('w:val'), 'single')
-    bottom_bdr.set(qn('w:sz'), '6')
-    bottom_bdr.set(qn('w:color'), '000000')
-    pBdr.append(bottom_bdr)
-    pPr.append(pBdr)
-
-    # ── Hi name ──
-    p = doc.add_paragraph()
-    p.paragraph_format.space_after = Pt(6)
-    add_bold_run(p, f"Hi {name},")
-
-    # ── Intro paragraph ──
-    p = doc.add_paragraph()
-    p.paragraph_format.space_after = Pt(8)
-    parse_bold_text(p,
-        "Our Senior Data Scientist <b>Mr. Subramani</b>, has shared with you the prescription "
-        "based on your recent consultation to join our "
-        "<b>Nationwide Data Analytics Training and Placement Program 2025</b>."
-    )
-
-    # ── About Us ──
-    p = doc.add_paragraph()
-    p.paragraph_format.space_after = Pt(4)
-    add_bold_run(p, "About Us")
-
-    p = doc.add_paragraph()
-    p.paragraph_format.space_after = Pt(8)
-    parse_bold_text(p,
-        "At <b>Analytics Avenue and Advanced Analytics</b>, we are a team of "
-        "<b>Data Scientists, Data Engineers, and BI Developers</b> throughout India "
-        "across various MNCs joined together to keep a pause for unemployment and "
-        "empowered <b>500+ professionals</b> in the past year, enabling them to "
-        "transition into various <b>Data Analytics roles</b>."
-    )
-
-    # ── Instruction line ──
-    p = doc.add_paragraph()
-    p.paragraph_format.space_after = Pt(8)
-    add_bold_run(p, "Below you can find the career road map, Key outcomes & suggestions given by our Data Scientist")
-
-    # ── Details table ──
-    details = [
-        ("Name", name),
-        ("Status", status),
-        ("Technologies Needed", "SQL, Python, Statistics, Power BI, Machine Learning, Gen AI"),
-        ("Sectors Covered", ai_content.get('domains_title', 'Finance & Supply Chain'))
-    ]
-    det_table = doc.add_table(rows=len(details), cols=3)
-    det_table.style = 'Table Grid'
-    det_table.alignment = WD_TABLE_ALIGNMENT.LEFT
-    col_w = [Cm(4.5), Cm(0.5), Cm(11)]
-    for i, (label, value) in enumerate(details):
-        row = det_table.rows[i]
-        row.cells[0].width = Cm(4.5)
-        row.cells[1].width = Cm(0.5)
-        row.cells[2].width = Cm(11)
-        p0 = row.cells[0].paragraphs[0]
-        add_bold_run(p0, label)
-        p1 = row.cells[1].paragraphs[0]
-        add_bold_run(p1, ":")
-        p2 = row.cells[2].paragraphs[0]
-        add_run(p2, value)
-        for cell in row.cells:
-            cell.paragraphs[0].paragraph_format.space_before = Pt(2)
-            cell.paragraphs[0].paragraph_format.space_after = Pt(2)
-            # remove borders for clean look matching PDF
-            set_cell_border(cell,
-                top={'val': 'none'}, bottom={'val': 'none'},
-                left={'val': 'none'}, right={'val': 'none'}
-            )
-    doc.add_paragraph().paragraph_format.space_after = Pt(4)
-
-    # ── Career Roadmap ──
-    p = doc.add_paragraph()
-    p.paragraph_format.space_after = Pt(4)
-    add_bold_run(p, "Career Roadmap")
-
-    roadmap = [
-        "Step 1 → Learn Tools (SQL, Python, Statistics, Power BI, Machine Learning, Gen AI)",
-        "Step 2 → Domain-Specific Projects",
-        "Step 3 → Role Readiness (interviews, placement support)"
-    ]
-    for step in roadmap:
-        p = doc.add_paragraph()
-        p.paragraph_format.space_after = Pt(2)
-        add_run(p, step)
-
-    sp = doc.add_paragraph()
-    sp.paragraph_format.space_after = Pt(4)
-
-    # ── Key Outcomes ──
-    p = doc.add_paragraph()
-    p.paragraph_format.space_after = Pt(4)
-    add_bold_run(p, "Key Outcomes")
-
-    outcomes = [
-        "Data Analysis Skills (SQL, Python, Visualization, Statistics)",
-        "Data Engineer Skills (Cloud, SQL, Python, Data Warehousing, ETL orchestration)",
-        "Machine Learning & Gen AI (LLMs, Prompt Engineering, RAG Pipelines, Embeddings, Vector Databases, Fine-Tuning & Deployment)",
-        f"Domain Knowledge ({ai_content.get('domains_title', 'Finance & Supply Chain')} etc.)",
-        "Recreate Industrial Standard projects worked by our Data Scientists",
-        "Placement opportunities, Organic job calls and referral drives"
-    ]
-    for item in outcomes:
-        p = doc.add_paragraph(style='List Bullet')
-        p.paragraph_format.space_after = Pt(2)
-        add_run(p, item)
-
-    sp = doc.add_paragraph()
-    sp.paragraph_format.space_after = Pt(4)
-
-    # ── Prescription ──
-    p = doc.add_paragraph()
-    p.paragraph_format.space_after = Pt(6)
-    add_bold_run(p, "Prescription:")
-
-    p = doc.add_paragraph()
-    p.paragraph_format.space_after = Pt(6)
-    parse_bold_text(p, ai_content.get('intro_line', ''))
-
-    for b_text in ai_content.get('domain_bullets', []):
-        if b_text.strip():
-            p = doc.add_paragraph(style='List Bullet')
-            p.paragraph_format.space_after = Pt(3)
-            parse_bold_text(p, b_text)
-
-    projects = ai_content.get('projects_bullet', '')
-    if projects:
-        p = doc.add_paragraph(style='List Bullet')
-        p.paragraph_format.space_after = Pt(3)
-        parse_bold_text(p, projects)
-
-    final = ai_content.get('final_sentence', '')
-    if final:
-        p = doc.add_paragraph()
-        p.paragraph_format.space_after = Pt(10)
-        parse_bold_text(p, final)
-
-    # ── PAGE BREAK ──
-    doc.add_page_break()
-
-    # ── Header image page 2 ──
-    if os.path.exists(header_path):
-        header_para = doc.add_paragraph()
-        header_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        run = header_para.add_run()
-        run.add_picture(header_path, width=Inches(6.5))
-        header_para.paragraph_format.space_after = Pt(6)
-
-    div_para2 = doc.add_paragraph()
-    div_para2.paragraph_format.space_before = Pt(0)
-    div_para2.paragraph_format.space_after = Pt(8)
-    pPr2 = div_para2._p.get_or_add_pPr()
-    pBdr2 = OxmlElement('w:pBdr')
-    b2 = OxmlElement('w:bottom')
-    b2.set(qn('w:val'), 'single')
-    b2.set(qn('w:sz'), '6')
-    b2.set(qn('w:color'), '000000')
-    pBdr2.append(b2)
-    pPr2.append(pBdr2)
-
-    # ── Customized Services ──
-    p = doc.add_paragraph()
-    p.paragraph_format.space_after = Pt(6)
-    add_bold_run(p, "Our Customized Services for you:")
-
-    svc_headers = ["Service", "Details"]
-    svc_rows = [
-        ("1. Industry-Relevant Projects",
-         f"Work on 3 projects across {ai_content['domains_title']}, focusing on data modeling, EDA, Machine Learning, and GenAI for forecasting, cost optimization, anomaly detection, and decision support."),
-        ("2. Secret Job Portals Access",
-         "Setup and optimize your profile on 9 exclusive job portals to help you receive organic job calls"),
-        ("3. Interview Preparation Materials",
-         "Lifetime access to interview notes, preparation guides, and materials prepared by top Data Scientists in real interview scenarios"),
-        ("4. Monthly In-Person Training",
-         "Attend monthly in-house classroom sessions (1 weekend per month) for revision, rapid preparation, and mentorship from experienced professionals"),
-    ]
-
-    svc_table = doc.add_table(rows=1 + len(svc_rows), cols=2)
-    svc_table.style = 'Table Grid'
-    svc_table.alignment = WD_TABLE_ALIGNMENT.LEFT
-
-    # Header row
-    hrow = svc_table.rows[0]
-    hrow.cells[0].width = Cm(5)
-    hrow.cells[1].width = Cm(11)
-    h0 = hrow.cells[0].paragraphs[0]
-    add_bold_run(h0, "Service")
-    h1 = hrow.cells[1].paragraphs[0]
-    add_bold_run(h1, "Details")
-
-    for i, (svc, detail) in enumerate(svc_rows):
-        row = svc_table.rows[i + 1]
-        row.cells[0].width = Cm(5)
-        row.cells[1].width = Cm(11)
-        p0 = row.cells[0].paragraphs[0]
-        add_bold_run(p0, svc)
-        p1 = row.cells[1].paragraphs[0]
-        add_run(p1, detail)
-        for cell in row.cells:
-            cell.paragraphs[0].paragraph_format.space_before = Pt(4)
-            cell.paragraphs[0].paragraph_format.space_after = Pt(4)
-
-    sp = doc.add_paragraph()
-    sp.paragraph_format.space_after = Pt(8)
-
-    # ── Career Prescription Table title ──
-    p = doc.add_paragraph()
-    p.paragraph_format.space_after = Pt(2)
-    add_bold_run(p, f"{ai_content['domains_title']} – Career Prescription Table")
-
-    p = doc.add_paragraph()
-    p.paragraph_format.space_after = Pt(6)
-    r = p.add_run("(Actual projects will be revealed during placement training)")
-    r.italic = True
-    r.font.size = Pt(10)
-
-    # ── Career Table ──
-    career_headers = ["Domain", "Role", "Exciting Challenge", "Key Technical Skills", "Targeted Companies"]
-    total_rows = 1 + len(table_rows)
-    ct = doc.add_table(rows=total_rows, cols=5)
-    ct.style = 'Table Grid'
-    ct.alignment = WD_TABLE_ALIGNMENT.LEFT
-
-    col_widths_cm = [3.0, 2.5, 4.2, 3.4, 3.6]
-
-    # Header
-    hr = ct.rows[0]
-    for j, hdr in enumerate(career_headers):
-        cell = hr.cells[j]
-        cell.width = Cm(col_widths_cm[j])
-        ph = cell.paragraphs[0]
-        add_bold_run(ph, hdr, size_pt=10)
-        cell.paragraphs[0].paragraph_format.space_before = Pt(3)
-        cell.paragraphs[0].paragraph_format.space_after = Pt(3)
-
-    # Data rows
-    processed_domains_docx = {}
-    full_domain_rowspan_docx = {}
-    for row_data in table_rows:
-        fd = row_data[0]
-        if fd not in full_domain_rowspan_docx:
-            full_domain_rowspan_docx[fd] = 1
-        else:
-            full_domain_rowspan_docx[fd] += 1
-
-    current_row_idx = 1
-    domain_start_idx = {}
-    for row_data in table_rows:
-        fd = row_data[0]
-        row = ct.rows[current_row_idx]
-        for j in range(5):
-            row.cells[j].width = Cm(col_widths_cm[j])
-
-        # Domain cell
-        if fd not in domain_start_idx:
-            domain_start_idx[fd] = current_row_idx
-            pd = row.cells[0].paragraphs[0]
-            add_bold_run(pd, fd, size_pt=10)
-
-        for j, val in enumerate(row_data[1:], start=1):
-            pc = row.cells[j].paragraphs[0]
-            add_run(pc, str(val), size_pt=10)
-
-        for j in range(5):
-            row.cells[j].paragraphs[0].paragraph_format.space_before = Pt(3)
-            row.cells[j].paragraphs[0].paragraph_format.space_after = Pt(3)
-
-        current_row_idx += 1
-
-    # Merge domain cells vertically
-    for fd, start_idx in domain_start_idx.items():
-        span = full_domain_rowspan_docx[fd]
-        if span > 1:
-            end_idx = start_idx + span - 1
-            ct.cell(start_idx, 0).merge(ct.cell(end_idx, 0))
-            merged_cell = ct.cell(start_idx, 0)
-            merged_cell.vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-
-    doc.save(output_path)
-    return True, None
 
 
 # ==========================================
 # SEND MAIL FUNCTION
 # ==========================================
-def send_mail_with_pdf(to_email, cc_emails, subject, body, pdf_path, candidate_name):
+def send_mail_with_pdf(to_email, cc_emails, subject, body, pdf_bytes, pdf_filename, candidate_name):
     if not GMAIL_USER or not GMAIL_PASSWORD:
         return False, "Gmail credentials not configured in Streamlit secrets (GMAIL_USER, GMAIL_PASSWORD)"
 
@@ -926,13 +183,9 @@ def send_mail_with_pdf(to_email, cc_emails, subject, body, pdf_path, candidate_n
 
         msg.attach(MIMEText(body, 'plain'))
 
-        with open(pdf_path, 'rb') as f:
-            pdf_attachment = MIMEApplication(f.read(), _subtype='pdf')
-            pdf_attachment.add_header(
-                'Content-Disposition', 'attachment',
-                filename=os.path.basename(pdf_path)
-            )
-            msg.attach(pdf_attachment)
+        pdf_attachment = MIMEApplication(pdf_bytes, _subtype='pdf')
+        pdf_attachment.add_header('Content-Disposition', 'attachment', filename=pdf_filename)
+        msg.attach(pdf_attachment)
 
         all_recipients = [to_email] + (cc_emails if cc_emails else [])
 
@@ -945,11 +198,37 @@ def send_mail_with_pdf(to_email, cc_emails, subject, body, pdf_path, candidate_n
         return False, str(e)
 
 
+# ==========================================
+# LIVE AI PREVIEW
+# ==========================================
+SECTION_LABELS = {
+    "intro_line":      "Introduction",
+    "domain_bullets":  "Domain Focus",
+    "projects_bullet": "Projects",
+    "final_sentence":  "Closing",
+}
+
+
+def render_ai_section(placeholder, key, value):
+    if isinstance(value, list):
+        body = "<ul>" + "".join(f"<li>{v}</li>" for v in value) + "</ul>"
+    else:
+        body = f'<div class="card-text">{value}</div>'
+    placeholder.markdown(
+        f'<div class="card"><div class="card-label">{SECTION_LABELS[key]}</div>{body}</div>',
+        unsafe_allow_html=True
+    )
+
+
 # ==========================================
 # STREAMLIT UI
 # ==========================================
 st.set_page_config(page_title="Analytics Avenue Generator", layout="wide")
 
+# Start the render workers (they preload the brochure template, header and
+# table blocks) before the first request needs them
+get_render_pool(PDF_COMPACT)
+
 st.markdown("""
 <style>
     @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700;800;900&display=swap');
@@ -1007,7 +286,7 @@ with tab1:
         <div class="card-label">Purpose</div>
         <div class="card-text">
             Generate personalised, AI-powered career prescriptions for aspiring data professionals —
-            combining Groq LLaMA 3.3 70B intelligence with domain-specific career templates to produce
+            combining Groq-hosted LLaMA models with domain-specific career templates to produce
             a structured 3-page PDF and editable Word document covering skills, projects, roles, and targeted companies.
         </div>
     </div>
@@ -1019,7 +298,7 @@ with tab1:
         st.markdown("""
         <div class="card"><ul>
             <li>Supports 9 domains — Finance, Healthcare, Supply Chain, E-Commerce, HR Analytics, Automobile, Manufacturing, Retail, and Cyber Security.</li>
-            <li>AI generates personalised prescription text with domain-specific bullets using Groq LLaMA 3.3 70B.</li>
+            <li>AI generates personalised prescription text with domain-specific bullets on Groq: a fast model first, escalating to a larger one when its output fails the quality checks.</li>
             <li>Download as PDF (3 pages) or editable Word (.docx) document.</li>
             <li>Send the prescription directly to the candidate's email with CC support.</li>
             <li>Career table includes roles, challenges, key skills, and targeted companies per domain.</li>
@@ -1041,8 +320,8 @@ with tab1:
 # TAB 2 — APPLICATION
 # ════════════════════════════════════════════════════════
 with tab2:
-    header_ok = os.path.exists("assets/header.png")
-    template_ok = os.path.exists("assets/template.pdf")
+    header_ok = os.path.exists(TEMPLATE_CONFIG['header_path'])
+    template_ok = os.path.exists(TEMPLATE_CONFIG['template_path'])
     if not (header_ok and template_ok):
         st.error("❌ Missing required assets!")
         st.write(f"{'✅' if header_ok else '❌'} header.png")
@@ -1052,16 +331,23 @@ with tab2:
     # ── Initialise all session_state keys once ──
     for _k, _v in {
         "generated":    False,
-        "pdf_path":     "",
-        "docx_path":    "",
+        "pdf_bytes":    b"",
+        "docx_bytes":   b"",
         "base_name":    "",
         "pdf_ok":       False,
         "docx_ok":      False,
+        "docx_job":     None,   # background Word render, until resolve_docx collects it
+        "prescription": None,   # prescription_doc.Prescription both documents render from
+        "compact":      False,
+        "domains":      [],
+        "artifact_key": None,   # artifact_index entry of this result; None once edited
+        "reused_at":    None,   # creation time of a reused result
         "pdf_err":      "",
         "docx_err":     "",
         "ai_content":   {},
         "table_rows":   [],
         "domain_map":   {},
+        "output_report": [],
         "cand_name":    "",
         "mail_to":      "",
         "mail_cc":      "",
@@ -1083,12 +369,15 @@ with tab2:
         with col1:
             name = st.text_input("Name *", placeholder="e.g. Student Name")
         with col2:
-            status = st.selectbox("Status *", ["Working Professional", "Student", "Job Seeker"])
-        domains = st.multiselect(
-            "Target Domains *",
-            ["Finance", "Supply Chain", "Healthcare", "HR Analytics", "E-Commerce",
-             "Automobile", "Manufacturing", "Retail", "Cyber Security"],
-            help="Select 1–3 domains"
+            status = st.selectbox("Status *", STATUS_OPTIONS)
+        domains = st.multiselect("Target Domains *", DOMAIN_OPTIONS, help="Select 1–3 domains")
+        compact = st.checkbox(
+            "Compact PDF", value=PDF_COMPACT,
+            help="Downsampled images for a smaller email attachment"
+        )
+        force = st.checkbox(
+            "Force regenerate", value=False,
+            help="New AI text and new files, even if this name, status and domains were just generated"
         )
         submit = st.form_submit_button("🚀 Generate Prescription")
 
@@ -1104,66 +393,101 @@ with tab2:
             for e in errors:
                 st.error(e)
         else:
-            with st.spinner("🤖 AI generating prescription..."):
-                ai_content = get_ai_prescription_text(domains)
-
-            if "error" in ai_content:
-                st.error(f"AI Error: {ai_content['error']}")
+            # The same name, status and domains (with unchanged prompt and
+            # templates) give the same documents: reuse them unless forced
+            artifact_id = artifact_key(name, status, domains, compact,
+                                       (GROQ_MODEL, GROQ_TEMPERATURE, PROMPT_VERSION, template_version()))
+            reused = None if force else get_artifact_index().get(artifact_id)
+            if reused is not None:
+                # As shown in the reused documents (the key ignores domain order and spacing)
+                name, domains      = reused["prescription"].name, reused["domains"]
+                ai_content         = reused["ai_content"]
+                table_rows         = reused["table_rows"]
+                domain_rowspan_map = reused["domain_map"]
             else:
                 with st.spinner("📊 Building career table..."):
                     table_rows, domain_rowspan_map = get_table_data_with_rowspan(domains)
 
-                with st.spinner("📄 Creating PDF & Word document..."):
-                    ts        = int(time.time())
-                    safe_name = "".join([c for c in name if c.isalnum() or c in (' ', '_')]).rstrip()
-                    base_name = f"Prescription_{safe_name.replace(' ', '_')}_{ts}"
-                    os.makedirs("output", exist_ok=True)
-                    pdf_path  = f"output/{base_name}.pdf"
-                    docx_path = f"output/{base_name}.docx"
-                    pdf_ok,  pdf_err  = create_final_pdf(name, status, ai_content, table_rows, domain_rowspan_map, pdf_path)
-                    docx_ok, docx_err = create_word_doc(name, status, ai_content, table_rows, domain_rowspan_map, docx_path)
-
-                # Build default mail body
-                default_body = (
-                    f"Dear {name},\n\n"
-                    f"Thank you for your recent consultation with Analytics Avenue & Advanced Analytics.\n\n"
-                    f"As discussed, please find attached your personalised Career Prescription prepared by "
-                    f"our Senior Data Scientist Mr. Subramani. This document outlines your tailored roadmap, "
-                    f"key outcomes, and domain-specific career opportunities in "
-                    f"{ai_content.get('domains_title', 'Data Analytics')}.\n\n"
-                    f"Your prescription covers:\n"
-                    f"  \u2022 Customised career roadmap across {ai_content.get('domains_title', '')}\n"
-                    f"  \u2022 Key technical skills: SQL, Python, Statistics, Power BI, Machine Learning, Gen AI\n"
-                    f"  \u2022 Industry-relevant projects and placement support\n\n"
-                    f"To take the next step, please register and pay the initial \u20b95,000 to block your seat:\n"
-                    f"Payment Link: https://pages.razorpay.com/OpenAnalyticsAvenue\n"
-                    f"UPI: aard@uco\n\n"
-                    f"Feel free to reach out for any queries.\n\n"
-                    f"Warm regards,\n"
-                    f"Data Consultant\n"
-                    f"Analytics Avenue & Advanced Analytics\n"
-                    f"Ph / WhatsApp: 9677298268\n"
-                    f"Email: supportteam@analyticsavenue.in"
-                )
+                queue_box = st.empty()
+                script_ctx = get_script_run_ctx()
+
+                def on_queue(position, eta):
+                    # Fragment calls wait in worker threads; attach them to this session so they can update the UI
+                    add_script_run_ctx(threading.current_thread(), script_ctx)
+                    if position:
+                        queue_box.info(f"⏳ High demand — you are #{position} in the AI queue, about {eta:.0f}s to go")
+                    else:
+                        queue_box.empty()
+
+                if AI_STREAMING:
+                    live = {key: st.empty() for key in SECTION_LABELS}
+
+                    def on_section(key, value):
+                        if key in live:
+                            render_ai_section(live[key], key, value)
+
+                    with st.spinner("🤖 AI generating prescription..."):
+                        ai_content = get_ai_prescription_text(
+                            domains, on_section=on_section, on_queue=on_queue, refresh=force)
+                else:
+                    with st.spinner("🤖 AI generating prescription..."):
+                        ai_content = get_ai_prescription_text(domains, on_queue=on_queue, refresh=force)
+
+            if "error" in ai_content:
+                st.error(f"AI Error: {ai_content['error']}")
+            else:
+                if reused is not None:
+                    base_name    = reused["base_name"]
+                    prescription = reused["prescription"]
+                    pdf_bytes, pdf_err, pdf_ok = reused["pdf_bytes"], None, True
+                    docx_bytes   = reused["docx_bytes"]
+                    docx_job     = None if docx_bytes else reused["docx_job"]
+                    output_report = []
+                    # Recently used again: retention keeps these files longest
+                    get_output_sink().keep(f"{base_name}.pdf", pdf_bytes)
+                    if docx_bytes:
+                        get_output_sink().keep(f"{base_name}.docx", docx_bytes)
+                else:
+                    with st.spinner("📄 Creating PDF & Word document..."):
+                        base_name = make_base_name(name)
+                        # Parsed once; the PDF now and the Word document later render from it
+                        prescription = build_prescription(name, status, ai_content, table_rows)
+                        pdf_bytes, pdf_err, docx_job, output_report = render_outputs(prescription, compact, base_name)
+                        pdf_ok = bool(pdf_bytes)
+                    docx_bytes = b""
+                    if pdf_ok:
+                        get_artifact_index().put(
+                            artifact_id, base_name=base_name, prescription=prescription, domains=domains,
+                            ai_content=ai_content, table_rows=table_rows, domain_map=domain_rowspan_map,
+                            pdf_bytes=pdf_bytes,
+                            docx_job=docx_job, docx_bytes=docx_bytes,
+                        )
 
                 # Save everything to session_state
                 st.session_state["generated"]    = True
-                st.session_state["pdf_path"]     = pdf_path
-                st.session_state["docx_path"]    = docx_path
+                st.session_state["pdf_bytes"]    = pdf_bytes
+                st.session_state["docx_bytes"]   = docx_bytes
                 st.session_state["base_name"]    = base_name
                 st.session_state["pdf_ok"]       = pdf_ok
-                st.session_state["docx_ok"]      = docx_ok
+                st.session_state["docx_ok"]      = bool(docx_bytes)
+                st.session_state["docx_job"]     = docx_job
+                st.session_state["prescription"] = prescription
+                st.session_state["compact"]      = compact
+                st.session_state["domains"]      = domains
+                st.session_state["artifact_key"] = artifact_id if pdf_ok else None
+                st.session_state["reused_at"]    = reused["created"] if reused is not None else None
                 st.session_state["pdf_err"]      = pdf_err or ""
-                st.session_state["docx_err"]     = docx_err or ""
+                st.session_state["docx_err"]     = ""
                 st.session_state["ai_content"]   = ai_content
                 st.session_state["table_rows"]   = table_rows
                 st.session_state["domain_map"]   = domain_rowspan_map
+                st.session_state["output_report"] = output_report
                 st.session_state["cand_name"]    = name
                 # Reset mail fields for new prescription
                 st.session_state["mail_to"]      = ""
                 st.session_state["mail_cc"]      = ""
                 st.session_state["mail_subject"] = "Your Career Prescription \u2013 Analytics Avenue & Advanced Analytics"
-                st.session_state["mail_body"]    = default_body
+                st.session_state["mail_body"]    = default_mail_body(name, ai_content.get('domains_title', ''))
                 st.session_state["mail_status"]  = ""
                 st.session_state["mail_msg"]     = ""
 
@@ -1172,10 +496,11 @@ with tab2:
     # always rendered from session_state — survives ANY button click
     # ════════════════════════════════
     if st.session_state["generated"]:
+        resolve_docx(wait=False)
         _pdf_ok   = st.session_state["pdf_ok"]
         _docx_ok  = st.session_state["docx_ok"]
-        _pdf_path = st.session_state["pdf_path"]
-        _docx_path= st.session_state["docx_path"]
+        _pdf_bytes = st.session_state["pdf_bytes"]
+        _docx_bytes= st.session_state["docx_bytes"]
         _base     = st.session_state["base_name"]
         _ai       = st.session_state["ai_content"]
         _rows     = st.session_state["table_rows"]
@@ -1183,32 +508,109 @@ with tab2:
         _cname    = st.session_state["cand_name"]
 
         st.success("✅ Prescription Generated Successfully!")
+        if st.session_state["reused_at"]:
+            st.info(f"♻️ Same request as {time.strftime('%H:%M', time.localtime(st.session_state['reused_at']))}: "
+                    f"showing the prescription and files generated then. Tick \"Force regenerate\" for new ones.")
 
         # ── Download buttons ──
         dl_col1, dl_col2, _ = st.columns([2, 2, 3])
         with dl_col1:
-            if _pdf_ok and os.path.exists(_pdf_path):
-                with open(_pdf_path, "rb") as f:
-                    st.download_button(
-                        "⬇️ Download PDF", f,
-                        file_name=f"{_base}.pdf",
-                        mime="application/pdf",
-                        key="dl_pdf"
-                    )
+            if _pdf_ok:
+                st.download_button(
+                    "⬇️ Download PDF", _pdf_bytes,
+                    file_name=f"{_base}.pdf",
+                    mime="application/pdf",
+                    key="dl_pdf"
+                )
             else:
                 st.error(f"PDF Error: {st.session_state['pdf_err']}")
 
         with dl_col2:
-            if _docx_ok and os.path.exists(_docx_path):
-                with open(_docx_path, "rb") as f:
-                    st.download_button(
-                        "📝 Download Word (.docx)", f,
-                        file_name=f"{_base}.docx",
-                        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                        key="dl_docx"
-                    )
-            else:
+            if _docx_ok:
+                st.download_button(
+                    "📝 Download Word (.docx)", _docx_bytes,
+                    file_name=f"{_base}.docx",
+                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                    key="dl_docx"
+                )
+            elif st.session_state["docx_err"]:
                 st.error(f"Word Error: {st.session_state['docx_err']}")
+            elif st.button("📝 Prepare Word (.docx)", key="prep_docx"):
+                with st.spinner("📝 Creating Word document..."):
+                    resolve_docx(wait=True)
+                st.rerun()
+
+        if st.session_state["output_report"]:
+            st.caption("  |  ".join(
+                f"{r['output']} ({r['mode']}): {r['size_kb']:,.0f} KB in {r['render_ms']:,.0f} ms"
+                for r in st.session_state["output_report"]
+            ))
+
+        # ════════════════════════════════
+        # EDIT SECTION
+        # corrections re-render without a new AI call
+        # ════════════════════════════════
+        with st.expander("✏️ Edit Prescription"):
+            with st.form("edit_form"):
+                ec1, ec2 = st.columns(2, gap="large")
+                with ec1:
+                    ed_name = st.text_input("Name *", value=_cname)
+                with ec2:
+                    ed_status = st.selectbox("Status *", STATUS_OPTIONS,
+                                             index=STATUS_OPTIONS.index(st.session_state["prescription"].status))
+                ed_domains = st.multiselect("Target Domains *", DOMAIN_OPTIONS, default=st.session_state["domains"],
+                                            help="Changes the career table only; edit the texts below to match")
+                ed_title = st.text_input("Domains title", value=_ai.get("domains_title", ""))
+                ed_intro = st.text_area(SECTION_LABELS["intro_line"], value=_ai.get("intro_line", ""))
+                ed_bullets = [
+                    st.text_area(f"{SECTION_LABELS['domain_bullets']} {i}", value=bullet)
+                    for i, bullet in enumerate(_ai.get("domain_bullets", []), 1)
+                ]
+                ed_projects = st.text_area(SECTION_LABELS["projects_bullet"], value=_ai.get("projects_bullet", ""))
+                ed_final = st.text_area(SECTION_LABELS["final_sentence"], value=_ai.get("final_sentence", ""))
+                st.caption("Use <b>…</b> for bold text.")
+                apply_edit = st.form_submit_button("🔁 Update Prescription")
+
+            if apply_edit:
+                if not ed_name or not ed_domains:
+                    st.error("❌ Name and at least one domain are required")
+                else:
+                    with st.spinner("📄 Updating PDF & Word document..."):
+                        if ed_domains == st.session_state["domains"]:
+                            ed_rows, ed_dmap = _rows, _dmap
+                        else:
+                            ed_rows, ed_dmap = get_table_data_with_rowspan(ed_domains)
+                        ed_ai = dict(_ai, domains_title=ed_title, intro_line=ed_intro, domain_bullets=ed_bullets,
+                                     projects_bullet=ed_projects, final_sentence=ed_final)
+                        ed_base = make_base_name(ed_name)
+                        prescription = build_prescription(ed_name, ed_status, ed_ai, ed_rows)
+                        pdf_bytes, pdf_err, docx_job, output_report = render_outputs(
+                            prescription, st.session_state["compact"], ed_base)
+
+                    # Keep a hand-edited mail body; refresh the generated one
+                    if st.session_state["mail_body"] == default_mail_body(_cname, _ai.get("domains_title", "")):
+                        st.session_state["mail_body"] = default_mail_body(ed_name, ed_title)
+
+                    st.session_state["pdf_bytes"]    = pdf_bytes
+                    st.session_state["docx_bytes"]   = b""
+                    st.session_state["base_name"]    = ed_base
+                    st.session_state["pdf_ok"]       = bool(pdf_bytes)
+                    st.session_state["docx_ok"]      = False
+                    st.session_state["docx_job"]     = docx_job
+                    st.session_state["prescription"] = prescription
+                    st.session_state["domains"]      = ed_domains
+                    st.session_state["artifact_key"] = None
+                    st.session_state["reused_at"]    = None
+                    st.session_state["pdf_err"]      = pdf_err or ""
+                    st.session_state["docx_err"]     = ""
+                    st.session_state["ai_content"]   = ed_ai
+                    st.session_state["table_rows"]   = ed_rows
+                    st.session_state["domain_map"]   = ed_dmap
+                    st.session_state["output_report"] = output_report
+                    st.session_state["cand_name"]    = ed_name
+                    st.session_state["mail_status"]  = ""
+                    st.session_state["mail_msg"]     = ""
+                    st.rerun()
 
         # ════════════════════════════════
         # SEND MAIL SECTION
@@ -1259,7 +661,8 @@ with tab2:
                         cc_emails   = _cc_list,
                         subject     = st.session_state["mail_subject"],
                         body        = st.session_state["mail_body"],
-                        pdf_path    = _pdf_path,
+                        pdf_bytes   = _pdf_bytes,
+                        pdf_filename = f"{_base}.pdf",
                         candidate_name = _cname
                     )
 
@@ -1277,3 +680,71 @@ with tab2:
         with st.expander("📊 Career Data"):
             st.write(f"**Roles generated:** {len(_rows)}")
             st.write(f"**Domains:** {_dmap}")
+
+    # ════════════════════════════════
+    # AI CACHE STATS
+    # ════════════════════════════════
+    with st.expander("🗄️ AI Cache"):
+        _stats = get_cache().stats()
+        cs1, cs2, cs3, cs4 = st.columns(4)
+        cs1.metric("Entries", _stats["entries"])
+        cs2.metric("Hits", _stats["hits"])
+        cs3.metric("Misses", _stats["misses"])
+        cs4.metric("Hit rate", f"{_stats['hit_rate']:.0%}")
+        _flight = get_inflight_stats()
+        fs1, fs2, fs3, fs4 = st.columns(4)
+        fs1.metric("LLM calls", _flight["executed"])
+        fs2.metric("Coalesced", _flight["coalesced"])
+        fs3.metric("In flight", _flight["in_flight"])
+        fs4.metric("Coalesce rate", f"{_flight['coalesce_rate']:.0%}")
+        _routing = get_routing_stats()
+        st.write(f"**Model routing:** {_routing['requests']} calls, "
+                 f"{_routing['escalated']} escalated ({_routing['escalation_rate']:.0%})")
+        st.table(_routing["tiers"])
+        _repair = get_repair_stats()
+        st.write(f"**Output repair:** {_repair['checked']} checked, {_repair['repaired']} repaired locally "
+                 f"({_repair['repair_rate']:.0%}), {_repair['unrepairable']} re-asked, "
+                 f"{_repair['defaulted']} filled from defaults")
+        _usage = get_usage_summary()
+        st.write(f"**LLM usage (recent log):** {_usage['calls']} calls, {_usage['tokens']:,} tokens, "
+                 f"{_usage['requests']} prescriptions")
+        if _usage["models"]:
+            st.table(_usage["models"])
+        if _usage["prescriptions"]:
+            st.table(_usage["prescriptions"])
+        _sched = get_scheduler().stats()
+        st.write(f"**Rate-limit queue:** {_sched['admitted']} admitted, {_sched['queued']} waited, "
+                 f"{_sched['rejected']} turned away  |  avg wait {_sched['avg_wait_s']:.1f}s, "
+                 f"max {_sched['max_wait_s']:.1f}s")
+        if _sched["models"]:
+            st.table(_sched["models"])
+        st.caption(f"Precomputed (warmup.py): {len(get_store())}  |  Prompt version: {PROMPT_VERSION}  |  "
+                   f"Model: {GROQ_MODEL}  |  Temperature: {GROQ_TEMPERATURE}")
+        if st.button("🧹 Clear AI cache", key="clear_ai_cache"):
+            get_cache().clear()
+            st.rerun()
+
+    # ════════════════════════════════
+    # OUTPUT SIZES
+    # ════════════════════════════════
+    with st.expander("📦 Output Sizes"):
+        _outputs = get_output_stats().stats()
+        if _outputs:
+            st.table(_outputs)
+        else:
+            st.caption("No files generated yet in this process.")
+        _reuse = get_artifact_index().stats()
+        st.caption(f"Repeated requests: {_reuse['hits']} answered from earlier results, "
+                   f"{_reuse['misses']} generated  |  {_reuse['entries']} kept ({_reuse['mb']:,.1f} MB)")
+        _sink = get_output_sink().stats()
+        if _sink["enabled"]:
+            st.caption(f"Disk copies in {OUTPUT_CONFIG['output_dir']}/: {_sink['written']} written, "
+                       f"{_sink['failed']} failed, {_sink['pending']} pending")
+            _cap = f"{_sink['max_mb']:,.0f} MB" if _sink["max_mb"] else "no size cap"
+            _age = f"{_sink['max_age_days']:g} days" if _sink["max_age_days"] else "no age limit"
+            st.caption(f"On disk: {_sink['disk_files']} files, {_sink['disk_mb']:,.1f} MB ({_cap}, {_age})  |  "
+                       f"{_sink['evicted']} deleted by retention")
+            if _sink["last_error"]:
+                st.caption(f"Last save error: {_sink['last_error']}")
+        else:
+            st.caption("Disk copies disabled (OUTPUT_DIR is empty).")
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# ==========================================
+# ARTIFACT INDEX CONFIG
+# ==========================================
+ARTIFACT_CONFIG = {
+    # Recent prescriptions kept for repeated Generate clicks; 0 disables reuse
+    'max_entries': int(os.getenv("ARTIFACT_INDEX_SIZE", "16")),
+    # Memory for their PDF and Word bytes; least recently used entries go first
+    'max_mb':      float(os.getenv("ARTIFACT_INDEX_MAX_MB", "32")),
+}
+
+
+def artifact_key(name, status, domains, compact, versions):
+    """
+    Build a content-addressed key for one Generate request.
+
+    Like prescription_cache.make_cache_key, the domain list is normalised
+    (stripped, de-duplicated, sorted).
+
+    Args:
+        name     : Candidate name
+        status   : Candidate status
+        domains  : Iterable of selected domain names
+        compact  : Compact PDF requested
+        versions : Tuple of model, prompt and template versions the documents depend on
+
+    Returns:
+        Hex digest string
+    """
+    raw = json.dumps({
+        "name":     name.strip(),
+        "status":   status,
+        "domains":  sorted({d.strip() for d in domains if d and d.strip()}),
+        "compact":  bool(compact),
+        "versions": [str(v) for v in versions],
+    }, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ArtifactIndex:
+    """
+    In-memory LRU of the documents generated for recent requests, by artifact_key.
+
+    A repeated request is answered from its entry: the same AI content, PDF,
+    Word document and file names, so there is no LLM call, no render and no
+    new file in the output directory. Entries hold the document bytes (about
+    1 MB each), so memory is bounded by both max_entries and max_bytes.
+    """
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes   = max_bytes
+        self._entries    = OrderedDict()
+        self._lock       = threading.Lock()
+        self.bytes       = 0
+        self.hits        = 0
+        self.misses      = 0
+
+    @staticmethod
+    def _size(entry):
+        return len(entry.get("pdf_bytes") or b"") + len(entry.get("docx_bytes") or b"")
+
+    def _evict(self):
+        """Drop least recently used entries past the limits (the caller holds the lock)."""
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self.bytes -= self._size(entry)
+
+    def get(self, key):
+        """Return a copy of the entry for `key` (with its "created" time), or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry)
+
+    def put(self, key, **entry):
+        if self.max_entries <= 0:
+            return
+        entry["created"] = time.time()
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= self._size(old)
+            self._entries[key] = entry
+            self.bytes += self._size(entry)
+            self._evict()
+
+    def update(self, key, **fields):
+        """Add fields to an existing entry (e.g. the Word document once rendered); no-op if evicted."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.bytes -= self._size(entry)
+                entry.update(fields)
+                self.bytes += self._size(entry)
+                self._evict()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "mb":      self.bytes / 1024 / 1024,
+                "hits":    self.hits,
+                "misses":  self.misses,
+            }
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_artifact_index():
+    """Return the process-wide artifact index built from ARTIFACT_CONFIG."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ArtifactIndex(ARTIFACT_CONFIG['max_entries'], int(ARTIFACT_CONFIG['max_mb'] * 1024 * 1024))
+        return _index
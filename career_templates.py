@@ -0,0 +1,76 @@
+# ==========================================
+# CAREER TABLE DATA
+# Shared by the Streamlit app and the offline warm-up job (warmup.py)
+# ==========================================
+CAREER_TEMPLATES = {
+    "Finance": [
+        ["Finance Analytics", "Financial Data Analyst",
+         "Improve profitability, forecasting accuracy, and cost control using financial data",
+         "SQL, Excel, Python, Statistics, ML, GenAI, Financial Modeling",
+         "JP Morgan, HDFC Bank, American Express, Barclays"],
+        ["Finance Analytics", "Risk & Financial Planning Analyst",
+         "Predict financial risks, detect anomalies, and strengthen budgeting & planning",
+         "SQL, Python, Forecasting, Statistics, ML, GenAI",
+         "KPMG, EY, Deloitte, PwC"]
+    ],
+    "Healthcare": [
+        ["Healthcare Analytics", "Healthcare Data Analyst",
+         "Analyze patient and hospital data to improve outcomes, efficiency, and care quality",
+         "SQL, Python, Statistics, ML, GenAI, Healthcare Data",
+         "Apollo Hospitals, Fortis, Practo, Narayana Health"],
+        ["Healthcare Analytics", "Clinical Risk & Outcomes Analyst",
+         "Predict patient risks, track treatment effectiveness, and optimize resource utilization",
+         "SQL, Python, Statistics, ML, GenAI",
+         "GE Healthcare, Philips, Medtronic"]
+    ],
+    "E-Commerce": [
+        ["E-Commerce Analytics", "E-Commerce Data Analyst",
+         "Optimize sales, pricing, and conversion using customer and product data",
+         "SQL, Python, Statistics, ML, GenAI",
+         "Amazon, Flipkart, Meesho, Nykaa"],
+        ["E-Commerce Analytics", "Customer & Growth Analyst",
+         "Analyze customer behavior, churn, and campaign performance to drive growth",
+         "SQL, Python, Statistics, ML, GenAI",
+         "Myntra, Swiggy, Zomato"]
+    ],
+    "Supply Chain": [
+        ["Supply Chain Analytics", "Supply Chain Data Analyst",
+         "Forecast demand and optimize inventory, logistics, and procurement efficiency",
+         "SQL, Python, Statistics, ML, GenAI",
+         "Amazon, DHL, Flipkart, Delhivery"]
+    ],
+    "Automobile": [
+        ["Automobile Analytics", "Automotive Data Analyst",
+         "Analyze vehicle, sensor, and production data to improve quality and efficiency",
+         "SQL, Python, Statistics, ML, GenAI, IoT / Telematics Data",
+         "Tata Motors, Mahindra, Hyundai, Maruti Suzuki"],
+        ["Automobile Analytics", "Manufacturing Operations Analyst",
+         "Reduce defects, downtime, and production bottlenecks using analytics",
+         "SQL, Python, Time Series, ML, GenAI",
+         "Bosch, Continental, TVS Motor, Ashok Leyland"]
+    ],
+    "Manufacturing": [
+        ["Manufacturing Analytics", "Manufacturing Data Analyst",
+         "Optimize production output, quality, and operational costs",
+         "SQL, Python, Statistics, ML, GenAI, Process Data",
+         "Siemens, ABB, GE, Schneider Electric"]
+    ],
+    "Retail": [
+        ["Retail Analytics", "Retail Data Analyst",
+         "Optimize inventory, sales forecasting, and customer insights",
+         "SQL, Python, Statistics, ML, GenAI",
+         "Reliance Retail, DMart, Big Bazaar, Spencer's"]
+    ],
+    "HR Analytics": [
+        ["HR Analytics", "HR Data Analyst",
+         "Analyze workforce trends, attrition patterns, and recruitment effectiveness",
+         "SQL, Python, Statistics, ML, GenAI",
+         "Deloitte, Accenture, IBM, Wipro"]
+    ],
+    "Cyber Security": [
+        ["Cyber Security Analytics", "Security Data Analyst",
+         "Detect threats, analyze patterns, and strengthen security posture",
+         "SQL, Python, ML, GenAI, SIEM Tools",
+         "Cisco, Palo Alto, CrowdStrike, Fortinet"]
+    ]
+}
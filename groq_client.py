@@ -0,0 +1,249 @@
+import os
+import random
+import threading
+import time
+
+import httpx
+from groq import Groq, APIConnectionError, APIStatusError, APITimeoutError
+from llm_scheduler import RATE_LIMIT_CONFIG, QueueTimeout, get_scheduler
+from llm_usage import get_usage_log
+
+# ==========================================
+# CLIENT, TIMEOUT & RETRY CONFIG
+# ==========================================
+GROQ_CLIENT_CONFIG = {
+    'connect_timeout': float(os.getenv("GROQ_CONNECT_TIMEOUT", "5")),
+    'read_timeout':    float(os.getenv("GROQ_READ_TIMEOUT", "30")),
+    'latency_budget':  float(os.getenv("GROQ_LATENCY_BUDGET", "45")),   # whole call incl. retries
+    'max_retries':     int(os.getenv("GROQ_MAX_RETRIES", "3")),
+    'backoff_base':    float(os.getenv("GROQ_BACKOFF_BASE", "0.5")),
+    'backoff_max':     float(os.getenv("GROQ_BACKOFF_MAX", "8")),
+    'max_connections': int(os.getenv("GROQ_MAX_CONNECTIONS", "20")),
+}
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+# Completion tokens assumed when reserving rate-limit budget (corrected from usage afterwards)
+COMPLETION_TOKEN_ESTIMATE = int(os.getenv("GROQ_COMPLETION_TOKEN_ESTIMATE", "400"))
+
+
+class LLMError(Exception):
+    """
+    Structured failure of a Groq completion.
+
+    kind is one of: "timeout", "budget_exceeded", "rate_limited", "upstream",
+    "connection", "client", "queue_timeout".
+    """
+
+    def __init__(self, kind, message, status_code=None, attempts=0, elapsed=0.0):
+        super().__init__(message)
+        self.kind        = kind
+        self.message     = message
+        self.status_code = status_code
+        self.attempts    = attempts
+        self.elapsed     = elapsed
+
+    def as_dict(self):
+        return {
+            "kind":        self.kind,
+            "message":     self.message,
+            "status_code": self.status_code,
+            "attempts":    self.attempts,
+            "elapsed_s":   round(self.elapsed, 2),
+        }
+
+    def __str__(self):
+        status = f" HTTP {self.status_code}" if self.status_code else ""
+        return f"{self.kind}{status} after {self.attempts} attempt(s), {self.elapsed:.1f}s: {self.message}"
+
+
+# One client (and one keep-alive httpx connection pool) per process and API key
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_groq_client(api_key: str):
+    """Return the shared Groq client for `api_key`, creating it on first use."""
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            cfg = GROQ_CLIENT_CONFIG
+            timeout = httpx.Timeout(cfg['read_timeout'], connect=cfg['connect_timeout'])
+            http_client = httpx.Client(
+                timeout=timeout,
+                limits=httpx.Limits(
+                    max_connections=cfg['max_connections'],
+                    max_keepalive_connections=cfg['max_connections'],
+                    keepalive_expiry=60,
+                ),
+            )
+            # Retries are handled in chat_completion so they share the latency budget
+            client = Groq(api_key=api_key, http_client=http_client, timeout=timeout, max_retries=0)
+            _clients[api_key] = client
+        return client
+
+
+def _backoff_delay(attempt, retry_after=None):
+    """Full-jitter exponential backoff, honouring a server Retry-After when given."""
+    cfg = GROQ_CLIENT_CONFIG
+    ceiling = min(cfg['backoff_max'], cfg['backoff_base'] * (2 ** (attempt - 1)))
+    delay = random.uniform(0, ceiling)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def _retry_after_seconds(error):
+    try:
+        return float(error.response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(kwargs):
+    """Rough token estimate (about 4 characters per token) for a chat request."""
+    prompt_chars = sum(len(str(m.get("content", ""))) for m in kwargs.get("messages", []))
+    return prompt_chars // 4 + (kwargs.get("max_tokens") or COMPLETION_TOKEN_ESTIMATE)
+
+
+def _create(api_key, budget, started, **kwargs):
+    """
+    The retry loop behind chat_completion and chat_completion_stream.
+
+    Returns:
+        (completion or stream, attempts, seconds spent queued)
+    """
+    cfg = GROQ_CLIENT_CONFIG
+    client = get_groq_client(api_key)
+    scheduler = get_scheduler()
+    model = kwargs.get("model")
+    estimated = estimate_tokens(kwargs)
+    attempt = 0
+    queued = 0.0
+
+    while True:
+        attempt += 1
+        remaining = budget - (time.monotonic() - started)
+        try:
+            queued += scheduler.acquire(model, estimated,
+                                        timeout=min(RATE_LIMIT_CONFIG['max_queue_wait'], max(0.0, remaining)))
+        except QueueTimeout as e:
+            raise LLMError("queue_timeout", str(e), attempts=attempt - 1,
+                           elapsed=time.monotonic() - started) from e
+        remaining = budget - (time.monotonic() - started)
+        if remaining <= 0:
+            raise LLMError("budget_exceeded", f"latency budget of {budget:.0f}s exhausted",
+                           attempts=attempt - 1, elapsed=time.monotonic() - started)
+        timeout = httpx.Timeout(min(cfg['read_timeout'], remaining),
+                                connect=min(cfg['connect_timeout'], remaining))
+        try:
+            completion = client.chat.completions.create(timeout=timeout, **kwargs)
+            usage = getattr(completion, "usage", None)
+            if usage is not None:
+                scheduler.settle(model, estimated, usage.total_tokens)
+            return completion, attempt, queued
+        except APITimeoutError as e:
+            error = LLMError("timeout", str(e) or "request timed out")
+            retry_after = None
+        except APIConnectionError as e:
+            error = LLMError("connection", str(e) or "connection error")
+            retry_after = None
+        except APIStatusError as e:
+            status = e.status_code
+            if status not in RETRYABLE_STATUS:
+                raise LLMError("client", e.message, status_code=status,
+                               attempts=attempt, elapsed=time.monotonic() - started) from e
+            error = LLMError("rate_limited" if status == 429 else "upstream", e.message, status_code=status)
+            retry_after = _retry_after_seconds(e)
+            if status == 429:
+                scheduler.penalize(model, retry_after or _backoff_delay(attempt))
+
+        error.attempts = attempt
+        error.elapsed = time.monotonic() - started
+        if attempt > cfg['max_retries']:
+            raise error
+        delay = _backoff_delay(attempt, retry_after)
+        if error.elapsed + delay >= budget:
+            raise error
+        time.sleep(delay)
+
+
+def chat_completion(api_key: str, latency_budget: float = None, **kwargs):
+    """
+    Run `chat.completions.create(**kwargs)` on the shared client with retries.
+
+    Every attempt first waits for admission from the process-wide rate-limit
+    scheduler. Retries 429/5xx, timeouts and connection errors with jittered
+    exponential backoff. Queueing and each attempt's timeout are clipped to what
+    is left of the overall latency budget, so the call never blocks longer than
+    the budget. The outcome, token usage and wall time go to the usage log.
+
+    Raises:
+        LLMError on failure or when the budget is exhausted
+    """
+    budget = latency_budget if latency_budget is not None else GROQ_CLIENT_CONFIG['latency_budget']
+    started = time.monotonic()
+    try:
+        completion, attempts, queued = _create(api_key, budget, started, **kwargs)
+    except LLMError as e:
+        get_usage_log().record_call(kwargs.get("model"), wall_s=e.elapsed, attempts=e.attempts, error=e.kind)
+        raise
+    get_usage_log().record_call(
+        kwargs.get("model"), getattr(completion, "usage", None),
+        wall_s=time.monotonic() - started, queue_s=queued, attempts=attempts,
+    )
+    return completion
+
+
+def chat_completion_stream(api_key: str, latency_budget: float = None, **kwargs):
+    """
+    Stream `chat.completions.create(stream=True, **kwargs)` as text deltas.
+
+    Establishing the stream is retried like chat_completion; once tokens start
+    arriving the stream is not restarted. The overall latency budget covers
+    the whole stream.
+
+    Yields:
+        str content deltas (empty deltas are skipped)
+
+    Raises:
+        LLMError on failure or when the budget is exhausted mid-stream
+    """
+    budget = latency_budget if latency_budget is not None else GROQ_CLIENT_CONFIG['latency_budget']
+    model = kwargs.get("model")
+    started = time.monotonic()
+    try:
+        stream, attempts, queued = _create(api_key, budget, started, stream=True, **kwargs)
+    except LLMError as e:
+        get_usage_log().record_call(model, wall_s=e.elapsed, attempts=e.attempts, stream=True, error=e.kind)
+        raise
+    usage = None
+    error = None
+    try:
+        for chunk in stream:
+            elapsed = time.monotonic() - started
+            if elapsed > budget:
+                raise LLMError("budget_exceeded", f"latency budget of {budget:.0f}s exhausted mid-stream",
+                               attempts=attempts, elapsed=elapsed)
+            # Groq reports usage on the final chunk (top level or under x_groq)
+            usage = getattr(chunk, "usage", None) or getattr(getattr(chunk, "x_groq", None), "usage", None) or usage
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+    except LLMError as e:
+        error = e.kind
+        raise
+    except (APITimeoutError, httpx.TimeoutException) as e:
+        error = "timeout"
+        raise LLMError("timeout", str(e) or "stream timed out",
+                       attempts=attempts, elapsed=time.monotonic() - started) from e
+    except (APIConnectionError, httpx.TransportError) as e:
+        error = "connection"
+        raise LLMError("connection", str(e) or "stream interrupted",
+                       attempts=attempts, elapsed=time.monotonic() - started) from e
+    finally:
+        stream.close()
+        if usage is not None:
+            get_scheduler().settle(model, estimate_tokens(kwargs), usage.total_tokens)
+        get_usage_log().record_call(model, usage, wall_s=time.monotonic() - started, queue_s=queued,
+                                    attempts=attempts, stream=True, error=error)
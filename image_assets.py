@@ -0,0 +1,59 @@
+import hashlib
+import io
+import os
+import threading
+
+from PIL import Image
+
+
+class ImageAsset:
+    """
+    An image file read once: its bytes, pixel size and content hash.
+
+    `stream()` hands out an independent in-memory file for consumers such as
+    python-docx's add_picture, so documents embed the cached bytes without
+    touching the disk again.
+    """
+
+    def __init__(self, path, signature, data):
+        self.path      = path
+        self.signature = signature
+        self.data      = data
+        self.sha1      = hashlib.sha1(data).hexdigest()
+        with Image.open(io.BytesIO(data)) as img:
+            self.width, self.height = img.size
+        self.aspect_ratio = self.width / self.height
+
+    def stream(self):
+        return io.BytesIO(self.data)
+
+
+# One asset per path, shared by every request in this process
+_assets = {}
+_assets_lock = threading.Lock()
+
+
+def get_image_asset(path):
+    """
+    Return the cached ImageAsset for `path`, re-reading it only when the
+    file's mtime or size changes.
+
+    Returns:
+        ImageAsset, or None when the file does not exist or cannot be decoded
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    signature = (st.st_mtime_ns, st.st_size)
+
+    with _assets_lock:
+        asset = _assets.get(path)
+        if asset is None or asset.signature != signature:
+            try:
+                with open(path, "rb") as f:
+                    asset = ImageAsset(path, signature, f.read())
+            except (OSError, ValueError, ZeroDivisionError):
+                return None
+            _assets[path] = asset
+        return asset
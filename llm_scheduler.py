@@ -0,0 +1,231 @@
+import contextlib
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+
+# ==========================================
+# RATE LIMITS (requests / tokens per minute)
+# ==========================================
+def _parse_limits(spec):
+    """Parse "model=rpm/tpm,model=rpm/tpm" into {model: (rpm, tpm)}."""
+    limits = {}
+    for item in spec.split(","):
+        if "=" in item:
+            model, rates = item.split("=", 1)
+            rpm, tpm = rates.split("/", 1)
+            limits[model.strip()] = (float(rpm), float(tpm))
+    return limits
+
+
+RATE_LIMIT_CONFIG = {
+    'limits': _parse_limits(os.getenv(
+        "GROQ_RATE_LIMITS",
+        "llama-3.1-8b-instant=30/6000,llama-3.3-70b-versatile=30/12000"
+    )),
+    'default': (float(os.getenv("GROQ_DEFAULT_RPM", "30")), float(os.getenv("GROQ_DEFAULT_TPM", "6000"))),
+    # Fraction of the provider limit we schedule against, to stay just under it
+    'headroom': float(os.getenv("GROQ_RATE_HEADROOM", "0.9")),
+    # Longest a request may wait in the queue before being turned away
+    'max_queue_wait': float(os.getenv("GROQ_MAX_QUEUE_WAIT", "20")),
+}
+
+
+class QueueTimeout(Exception):
+    """Raised when a request cannot be admitted within its allowed wait."""
+
+    def __init__(self, model, position, eta):
+        super().__init__(f"{model} queue is full: position {position}, estimated wait {eta:.0f}s")
+        self.model    = model
+        self.position = position
+        self.eta      = eta
+
+
+# Per-context queue listener: listener(position, eta_seconds) is called while a
+# request waits (position 0 once admitted). Set with listen_queue().
+_queue_listener = contextvars.ContextVar("queue_listener", default=None)
+
+
+@contextlib.contextmanager
+def listen_queue(listener):
+    token = _queue_listener.set(listener)
+    try:
+        yield
+    finally:
+        _queue_listener.reset(token)
+
+
+class _Bucket:
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate     = per_minute / 60.0
+        self.level    = per_minute
+
+    def refill(self, elapsed):
+        self.level = min(self.capacity, self.level + elapsed * self.rate)
+
+    def wait_for(self, amount):
+        return max(0.0, (amount - self.level) / self.rate)
+
+
+class _ModelState:
+    def __init__(self, rpm, tpm):
+        self.requests = _Bucket(rpm)
+        self.tokens   = _Bucket(tpm)
+        self.queue    = deque()
+        self.updated  = time.monotonic()
+
+    def refill(self, now):
+        elapsed = now - self.updated
+        self.requests.refill(elapsed)
+        self.tokens.refill(elapsed)
+        self.updated = now
+
+    def head_wait(self, tokens):
+        return max(self.requests.wait_for(1), self.tokens.wait_for(tokens))
+
+    def eta(self, position, tokens):
+        # Head wait, then one admission interval per request ahead of us
+        interval = max(1.0 / self.requests.rate, tokens / self.tokens.rate)
+        return self.head_wait(tokens) + position * interval
+
+
+class TokenBucketScheduler:
+    """
+    Process-wide FIFO admission control for Groq calls, per model.
+
+    Each model has a requests-per-minute and a tokens-per-minute bucket. A call
+    is admitted when it is at the head of its model's queue and both buckets
+    can cover it; otherwise it waits. When the estimated wait exceeds the
+    caller's limit the call is rejected up front (backpressure) instead of
+    being sent to fail with a 429.
+    """
+
+    def __init__(self, limits, default, headroom=0.9):
+        self._limits    = {m: (rpm * headroom, tpm * headroom) for m, (rpm, tpm) in limits.items()}
+        self._default   = (default[0] * headroom, default[1] * headroom)
+        self._cond      = threading.Condition()
+        self._models    = {}
+        self.admitted   = 0
+        self.rejected   = 0
+        self.queued     = 0
+        self.wait_total = 0.0
+        self.wait_max   = 0.0
+
+    def _state(self, model):
+        state = self._models.get(model)
+        if state is None:
+            state = _ModelState(*self._limits.get(model, self._default))
+            self._models[model] = state
+        return state
+
+    def acquire(self, model, tokens, timeout):
+        """
+        Block until a call of `tokens` estimated tokens may be sent to `model`.
+
+        Returns:
+            seconds spent waiting
+
+        Raises:
+            QueueTimeout when admission is not expected within `timeout` seconds
+        """
+        listener = _queue_listener.get()
+        started = time.monotonic()
+        deadline = started + timeout
+        ticket = object()
+        reported = None
+
+        with self._cond:
+            state = self._state(model)
+            tokens = min(tokens, state.tokens.capacity)
+            state.queue.append(ticket)
+        try:
+            while True:
+                with self._cond:
+                    now = time.monotonic()
+                    state.refill(now)
+                    if state.queue[0] is ticket and state.requests.level >= 1 and state.tokens.level >= tokens:
+                        state.requests.level -= 1
+                        state.tokens.level -= tokens
+                        state.queue.popleft()
+                        self._cond.notify_all()
+                        waited = now - started
+                        self.admitted += 1
+                        if waited > 0.05:
+                            self.queued += 1
+                        self.wait_total += waited
+                        self.wait_max = max(self.wait_max, waited)
+                        break
+                    position = state.queue.index(ticket)
+                    eta = state.eta(position, tokens)
+                    if now + eta > deadline:
+                        state.queue.remove(ticket)
+                        self.rejected += 1
+                        self._cond.notify_all()
+                        raise QueueTimeout(model, position + 1, eta)
+                    sleep_for = max(0.05, min(1.0, eta, deadline - now))
+
+                if listener and reported != (position, round(eta)):
+                    reported = (position, round(eta))
+                    listener(position + 1, eta)
+                with self._cond:
+                    self._cond.wait(timeout=sleep_for)
+        except BaseException:
+            with self._cond:
+                if ticket in state.queue:
+                    state.queue.remove(ticket)
+                    self._cond.notify_all()
+            raise
+
+        if listener and reported:
+            listener(0, 0.0)
+        return waited
+
+    def settle(self, model, estimated, actual):
+        """Correct the token bucket once the real usage of an admitted call is known."""
+        with self._cond:
+            state = self._state(model)
+            state.tokens.level = min(state.tokens.capacity, state.tokens.level + estimated - actual)
+
+    def penalize(self, model, seconds):
+        """After a 429, hold new admissions for `seconds` (the server's Retry-After)."""
+        with self._cond:
+            state = self._state(model)
+            state.refill(time.monotonic())
+            state.requests.level = min(state.requests.level, 1 - seconds * state.requests.rate)
+
+    def stats(self):
+        with self._cond:
+            now = time.monotonic()
+            models = []
+            for model, state in self._models.items():
+                state.refill(now)
+                models.append({
+                    "model":    model,
+                    "waiting":  len(state.queue),
+                    "rpm_left": round(max(0.0, state.requests.level), 1),
+                    "tpm_left": int(max(0.0, state.tokens.level)),
+                })
+            return {
+                "admitted":   self.admitted,
+                "queued":     self.queued,
+                "rejected":   self.rejected,
+                "avg_wait_s": (self.wait_total / self.admitted) if self.admitted else 0.0,
+                "max_wait_s": self.wait_max,
+                "models":     models,
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Return the process-wide scheduler built from RATE_LIMIT_CONFIG."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            cfg = RATE_LIMIT_CONFIG
+            _scheduler = TokenBucketScheduler(cfg['limits'], cfg['default'], cfg['headroom'])
+        return _scheduler
@@ -0,0 +1,233 @@
+import contextlib
+import contextvars
+import copy
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+from model_router import percentile
+
+# ==========================================
+# USAGE LOG CONFIG
+# ==========================================
+USAGE_LOG_CONFIG = {
+    'path': os.getenv("LLM_USAGE_LOG", "cache/llm_usage.jsonl"),
+    # Most recent records the in-app summary is computed over
+    'summary_window': int(os.getenv("LLM_USAGE_SUMMARY_WINDOW", "5000")),
+}
+
+
+# Upper estimate of one serialized record, used to seek near the log's tail
+RECORD_BYTES_ESTIMATE = 512
+
+
+class UsageScope:
+    """
+    Attribution for the LLM calls made while handling one prescription request.
+
+    Calls recorded inside the scope carry its request id and domain key, and
+    their tokens are summed so the request can be logged with its total.
+    """
+
+    def __init__(self, domains, key):
+        self.request_id        = uuid.uuid4().hex[:12]
+        self.domains           = domains
+        self.key               = key
+        self.calls             = 0
+        self.prompt_tokens     = 0
+        self.completion_tokens = 0
+        self.started           = time.perf_counter()
+
+
+# Set with usage_scope(); copied into worker threads with contextvars.copy_context()
+_scope = contextvars.ContextVar("usage_scope", default=None)
+
+
+@contextlib.contextmanager
+def usage_scope(domains, key):
+    scope = UsageScope(domains, key)
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+
+
+class UsageLog:
+    """
+    Append-only JSON-lines log of LLM completions and prescription requests.
+
+    Two record types share the file:
+      - "call":         one Groq completion (model, usage, wall time, queue wait, outcome)
+      - "prescription": one get_ai_prescription_text request (cache status, total tokens)
+    """
+
+    def __init__(self, path):
+        self.path     = path
+        self._lock    = threading.Lock()
+        self._recent  = None    # last summary_window records, read from the file on first summary()
+        self._summary = None    # summary() of _recent, until the next record
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def _append(self, record):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+            if self._recent is not None:
+                self._recent.append(record)
+                self._summary = None
+
+    def record_call(self, model, usage=None, wall_s=0.0, queue_s=0.0, attempts=1, stream=False, error=None):
+        """
+        Args:
+            usage : the completion's usage object (None when the call failed or reported none)
+            error : LLMError kind, None on success
+        """
+        scope = _scope.get()
+        prompt = getattr(usage, "prompt_tokens", 0) or 0
+        completion = getattr(usage, "completion_tokens", 0) or 0
+        if scope is not None:
+            with self._lock:
+                scope.calls += 1
+                scope.prompt_tokens += prompt
+                scope.completion_tokens += completion
+        self._append({
+            "type":              "call",
+            "ts":                round(time.time(), 3),
+            "request_id":        scope.request_id if scope else None,
+            "domains":           scope.domains if scope else None,
+            "key":               scope.key[:12] if scope else None,
+            "model":             model,
+            "stream":            stream,
+            "prompt_tokens":     prompt,
+            "completion_tokens": completion,
+            "total_tokens":      prompt + completion,
+            "wall_s":            round(wall_s, 3),
+            "queue_s":           round(queue_s, 3),
+            "attempts":          attempts,
+            "error":             error,
+        })
+
+    def record_prescription(self, scope, cache_status, error=None):
+        """cache_status is one of "store", "cache", "shared", "miss"."""
+        self._append({
+            "type":              "prescription",
+            "ts":                round(time.time(), 3),
+            "request_id":        scope.request_id,
+            "domains":           scope.domains,
+            "key":               scope.key[:12],
+            "cache":             cache_status,
+            "calls":             scope.calls,
+            "prompt_tokens":     scope.prompt_tokens,
+            "completion_tokens": scope.completion_tokens,
+            "total_tokens":      scope.prompt_tokens + scope.completion_tokens,
+            "wall_s":            round(time.perf_counter() - scope.started, 3),
+            "error":             error,
+        })
+
+    def tail(self, limit):
+        """The last `limit` records (unparseable lines are skipped)."""
+        records = deque(maxlen=limit)
+        try:
+            with open(self.path, "rb") as f:
+                # Only read the end of the file: records are a few hundred bytes each
+                size = f.seek(0, os.SEEK_END)
+                f.seek(max(0, size - limit * RECORD_BYTES_ESTIMATE))
+                if f.tell():
+                    f.readline()   # skip the partial first line
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return list(records)
+
+    def summary(self):
+        """
+        Latency percentiles and token counts over the most recent records.
+
+        The log file is read once; after that the window is kept up to date
+        from this process's own records, and the summary is only recomputed
+        when one was added (app.py shows it on every rerun). Records written
+        by other processes, e.g. warmup.py, are picked up on restart.
+
+        Returns:
+            dict with "models" (per-model call stats), "prescriptions" (per
+            cache status request stats) and overall call/request counts
+        """
+        with self._lock:
+            if self._recent is None:
+                window = USAGE_LOG_CONFIG['summary_window']
+                self._recent = deque(self.tail(window), maxlen=window)
+            if self._summary is None:
+                self._summary = _summarize(list(self._recent))
+            return copy.deepcopy(self._summary)
+
+
+def _summarize(records):
+    """UsageLog.summary() of a list of log records."""
+    calls = [r for r in records if r.get("type") == "call"]
+    requests = [r for r in records if r.get("type") == "prescription"]
+
+    def _round(value, digits=2):
+        return round(value, digits) if value is not None else None
+
+    models = []
+    for model in sorted({r["model"] for r in calls}):
+        rows = [r for r in calls if r["model"] == model]
+        ok = [r for r in rows if not r["error"]]
+        lat = [r["wall_s"] for r in ok]
+        models.append({
+            "model":           model,
+            "calls":           len(rows),
+            "errors":          len(rows) - len(ok),
+            "p50_s":           _round(percentile(lat, 50)),
+            "p95_s":           _round(percentile(lat, 95)),
+            "p99_s":           _round(percentile(lat, 99)),
+            "avg_prompt_tok":  round(sum(r["prompt_tokens"] for r in ok) / len(ok)) if ok else 0,
+            "avg_output_tok":  round(sum(r["completion_tokens"] for r in ok) / len(ok)) if ok else 0,
+        })
+
+    prescriptions = []
+    for status in ("store", "cache", "shared", "miss"):
+        rows = [r for r in requests if r["cache"] == status]
+        if not rows:
+            continue
+        lat = [r["wall_s"] for r in rows]
+        tokens = [r["total_tokens"] for r in rows]
+        prescriptions.append({
+            "cache":        status,
+            "requests":     len(rows),
+            "p50_s":        _round(percentile(lat, 50)),
+            "p95_s":        _round(percentile(lat, 95)),
+            "p99_s":        _round(percentile(lat, 99)),
+            "avg_tokens":   round(sum(tokens) / len(tokens)),
+            "p95_tokens":   percentile(tokens, 95),
+        })
+
+    return {
+        "calls":         len(calls),
+        "requests":      len(requests),
+        "tokens":        sum(r["total_tokens"] for r in calls),
+        "models":        models,
+        "prescriptions": prescriptions,
+    }
+
+
+_log = None
+_log_lock = threading.Lock()
+
+
+def get_usage_log():
+    """Return the process-wide usage log built from USAGE_LOG_CONFIG."""
+    global _log
+    with _log_lock:
+        if _log is None:
+            _log = UsageLog(USAGE_LOG_CONFIG['path'])
+        return _log
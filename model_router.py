@@ -0,0 +1,92 @@
+import math
+import threading
+import time
+from collections import deque
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)]
+
+
+class ModelRouter:
+    """
+    Tiered model routing: try the cheapest/fastest model first and escalate.
+
+    A tier's output is accepted when `check(result)` returns no problems. A
+    failing check or an error moves the request to the next tier; the last
+    tier's output is returned as-is (its errors propagate). Per-tier latency,
+    rejection and error counts plus the escalation rate are kept for the UI.
+    """
+
+    def __init__(self, tiers, history: int = 500):
+        self.tiers       = list(tiers)
+        if not self.tiers:
+            raise ValueError("ModelRouter needs at least one model tier")
+        self._lock       = threading.Lock()
+        self._latencies  = {t: deque(maxlen=history) for t in self.tiers}
+        self._counts     = {t: {"calls": 0, "accepted": 0, "rejected": 0, "errors": 0} for t in self.tiers}
+        self.requests    = 0
+        self.escalated   = 0
+
+    def run(self, call, check, budget=None):
+        """
+        Args:
+            call   : call(model, remaining) -> result, may raise; `remaining`
+                     is what is left of `budget` in seconds (None without one)
+            check  : check(result) -> list of problems (empty when acceptable)
+            budget : seconds for the whole request, shared by all tiers tried
+
+        Returns:
+            (result, model) of the tier whose output was used
+        """
+        with self._lock:
+            self.requests += 1
+        request_started = time.monotonic()
+        for i, model in enumerate(self.tiers):
+            last = i == len(self.tiers) - 1
+            remaining = None if budget is None else budget - (time.monotonic() - request_started)
+            started = time.perf_counter()
+            try:
+                result = call(model, remaining)
+            except Exception:
+                self._record(model, "errors", time.perf_counter() - started, escalate=not last and i == 0)
+                if last:
+                    raise
+                continue
+            elapsed = time.perf_counter() - started
+            if last or not check(result):
+                self._record(model, "accepted", elapsed)
+                return result, model
+            self._record(model, "rejected", elapsed, escalate=i == 0)
+
+    def _record(self, model, outcome, elapsed, escalate=False):
+        with self._lock:
+            counts = self._counts[model]
+            counts["calls"] += 1
+            counts[outcome] += 1
+            self._latencies[model].append(elapsed)
+            if escalate:
+                self.escalated += 1
+
+    def stats(self):
+        with self._lock:
+            tiers = []
+            for model in self.tiers:
+                lat = list(self._latencies[model])
+                p50, p95 = percentile(lat, 50), percentile(lat, 95)
+                tiers.append(dict(
+                    self._counts[model],
+                    model=model,
+                    p50_s=round(p50, 2) if p50 is not None else None,
+                    p95_s=round(p95, 2) if p95 is not None else None,
+                ))
+            return {
+                "requests":        self.requests,
+                "escalated":       self.escalated,
+                "escalation_rate": (self.escalated / self.requests) if self.requests else 0.0,
+                "tiers":           tiers,
+            }
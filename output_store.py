@@ -0,0 +1,223 @@
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# ==========================================
+# OUTPUT STORE CONFIG
+# ==========================================
+OUTPUT_CONFIG = {
+    # Generated PDF/DOCX files are also written here; empty disables the disk copy
+    'output_dir':       os.getenv("OUTPUT_DIR", "output"),
+    # Retention: oldest (least recently written or reused) files are deleted
+    # past the size cap, and any file past the age limit; 0 disables either
+    'max_mb':           float(os.getenv("OUTPUT_MAX_MB", "500")),
+    'max_age_days':     float(os.getenv("OUTPUT_MAX_AGE_DAYS", "30")),
+    # How often the background sweeper checks the directory
+    'sweep_interval_s': float(os.getenv("OUTPUT_SWEEP_INTERVAL_S", "600")),
+}
+
+# Retention only ever deletes files the app writes: generated documents
+# (app.make_base_name plus .pdf / .docx) and this sink's temporary files
+GENERATED_FILE = re.compile(r"Prescription_\w*_\d+\.(?:pdf|docx)")
+TMP_FILE = re.compile(GENERATED_FILE.pattern + r"\.[0-9a-f]{8}\.tmp")
+
+# Temporary files of a write that never finished (e.g. the process was killed)
+STALE_TMP_S = 3600
+
+
+class OutputSink:
+    """
+    Optional disk copy of generated artifacts, written in the background.
+
+    The app serves downloads and mail attachments from the in-memory bytes, so
+    a slow, full or read-only disk never delays or fails a request: write
+    errors are counted and the last one kept for the UI, never raised.
+
+    The directory is kept under max_bytes and max_age_s by _sweep, which runs
+    on the writer thread (so it never races a write): after a write that may
+    have crossed the size cap, and every sweep_interval_s from a timer thread.
+    """
+
+    def __init__(self, output_dir, max_bytes=0, max_age_s=0, sweep_interval_s=600):
+        self.output_dir       = output_dir
+        self.max_bytes        = max_bytes
+        self.max_age_s        = max_age_s
+        self.sweep_interval_s = sweep_interval_s
+        self._lock            = threading.Lock()
+        self._pool            = ThreadPoolExecutor(max_workers=1, thread_name_prefix="output-sink")
+        self.written          = 0
+        self.failed           = 0
+        self.pending          = 0
+        self.last_error       = None
+        # Directory usage as of the last sweep, plus writes since
+        self.disk_files       = 0
+        self.disk_bytes       = 0
+        self.evicted          = 0
+        self.last_sweep       = None
+        if self.enabled:
+            self._pool.submit(self._sweep)
+            if sweep_interval_s > 0:
+                threading.Thread(target=self._sweep_timer, name="output-sweeper", daemon=True).start()
+
+    @property
+    def enabled(self):
+        return bool(self.output_dir)
+
+    def _write(self, filename, data):
+        path = os.path.join(self.output_dir, filename)
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)   # readers never see a partial file
+            error = None
+        except OSError as e:
+            error = f"{path}: {e}"
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        with self._lock:
+            self.pending -= 1
+            if error is None:
+                self.written += 1
+                self.disk_files += 1
+                self.disk_bytes += len(data)   # over-counts an overwrite until the next sweep
+            else:
+                self.failed += 1
+                self.last_error = error
+            over_cap = self.max_bytes and self.disk_bytes > self.max_bytes
+        if over_cap:
+            self._sweep()
+        return path if error is None else None
+
+    def _keep(self, filename, data):
+        path = os.path.join(self.output_dir, filename)
+        try:
+            os.utime(path)   # marks it recently used for the size cap
+        except OSError:
+            return self._write(filename, data)   # evicted (or never written): write it again
+        with self._lock:
+            self.pending -= 1
+        return path
+
+    def _sweep_timer(self):
+        while True:
+            time.sleep(self.sweep_interval_s)
+            self._pool.submit(self._sweep)
+
+    def _sweep(self):
+        """
+        Delete expired files, then the least recently used ones until under
+        max_bytes. Other files in the directory are neither counted nor deleted.
+        """
+        now = time.time()
+        files = []
+        try:
+            with os.scandir(self.output_dir) as it:
+                for entry in it:
+                    try:
+                        managed = GENERATED_FILE.fullmatch(entry.name) or TMP_FILE.fullmatch(entry.name)
+                        if managed and entry.is_file(follow_symlinks=False):
+                            st = entry.stat()
+                            files.append((st.st_mtime, st.st_size, entry.name))
+                    except FileNotFoundError:
+                        pass   # removed while scanning
+        except FileNotFoundError:
+            pass   # nothing written yet
+        except OSError as e:
+            with self._lock:
+                self.last_error = f"{self.output_dir}: {e}"
+            return
+
+        files.sort()   # least recently written or kept first
+        total = sum(size for _, size, _ in files)
+        kept, evicted, error = 0, 0, None
+        for mtime, size, name in files:
+            age = now - mtime
+            if TMP_FILE.fullmatch(name):
+                expired = age > STALE_TMP_S
+            else:
+                expired = (self.max_age_s and age > self.max_age_s) or (self.max_bytes and total > self.max_bytes)
+            if not expired:
+                kept += 1
+                continue
+            try:
+                os.remove(os.path.join(self.output_dir, name))
+                evicted += 1
+                total -= size
+            except FileNotFoundError:
+                total -= size
+            except OSError as e:
+                kept += 1
+                error = f"{name}: {e}"
+        with self._lock:
+            self.disk_files = kept
+            self.disk_bytes = total
+            self.evicted   += evicted
+            self.last_sweep = now
+            if error:
+                self.last_error = error
+
+    def save(self, filename, data):
+        """
+        Queue `data` to be written as output_dir/filename.
+
+        Returns:
+            Future resolving to the written path (None when the write failed),
+            or None when the sink is disabled
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            self.pending += 1
+        return self._pool.submit(self._write, filename, data)
+
+    def keep(self, filename, data):
+        """
+        Like save, for a file written before (a reused result): only mark it
+        recently used, unless retention has deleted it since.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            self.pending += 1
+        return self._pool.submit(self._keep, filename, data)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled":      self.enabled,
+                "written":      self.written,
+                "failed":       self.failed,
+                "pending":      self.pending,
+                "last_error":   self.last_error,
+                "disk_files":   self.disk_files,
+                "disk_mb":      self.disk_bytes / 1024 / 1024,
+                "max_mb":       self.max_bytes / 1024 / 1024,
+                "max_age_days": self.max_age_s / 86400,
+                "evicted":      self.evicted,
+                "last_sweep":   self.last_sweep,
+            }
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_output_sink():
+    """Return the process-wide output sink built from OUTPUT_CONFIG."""
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            _sink = OutputSink(
+                OUTPUT_CONFIG['output_dir'],
+                max_bytes        = int(OUTPUT_CONFIG['max_mb'] * 1024 * 1024),
+                max_age_s        = OUTPUT_CONFIG['max_age_days'] * 86400,
+                sweep_interval_s = OUTPUT_CONFIG['sweep_interval_s'],
+            )
+        return _sink
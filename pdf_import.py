@@ -0,0 +1,390 @@
+"""
+Draw pages of an existing PDF on a ReportLab canvas.
+
+A page read with pypdf is converted once into ReportLab PDF objects: its
+content becomes a form XObject, its resources (fonts, images, graphics
+states) and link annotations are copied with their streams still encoded.
+The converted page can then be placed on any number of canvases, so the
+final PDF is written in a single ReportLab pass with no PdfReader/PdfWriter
+round-trip over our own output.
+
+Pages converted with compact=True are shrunk for email attachments: unused
+resources and metadata are dropped, identical objects are written once,
+ASCII-armoured streams are stored as plain Flate and images drawn above
+COMPACT_CONFIG['image_dpi'] are downsampled.
+"""
+import hashlib
+import io
+import math
+import os
+import re
+import threading
+import zlib
+
+from PIL import Image
+from pypdf import PdfReader
+from pypdf.errors import PyPdfError
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, StreamObject
+from reportlab.pdfbase import pdfdoc
+
+# ==========================================
+# COMPACT OUTPUT CONFIG
+# ==========================================
+COMPACT_CONFIG = {
+    # Images are downsampled to this resolution at the size they are drawn
+    'image_dpi':    int(os.getenv("PDF_COMPACT_IMAGE_DPI", "150")),
+    # Downsampled colour images are stored as JPEG at this quality (0 keeps them lossless)
+    'jpeg_quality': int(os.getenv("PDF_COMPACT_JPEG_QUALITY", "85")),
+}
+
+# Keys that tie an object to its source document's page tree or structure tree
+_SKIP_KEYS = {"/Parent", "/P", "/StructParent", "/StructParents", "/Length"}
+# Editing metadata with no effect on rendering, dropped in compact mode
+_COMPACT_SKIP_KEYS = _SKIP_KEYS | {"/Metadata", "/PieceInfo", "/LastModified"}
+# Filters pypdf decodes losslessly; streams using only these are re-encoded as plain Flate
+_PLAIN_FILTERS = {"/FlateDecode", "/ASCII85Decode", "/ASCIIHexDecode", "/LZWDecode", "/RunLengthDecode"}
+_ASCII_FILTERS = {"/ASCII85Decode", "/ASCIIHexDecode"}
+# Names a content stream uses as resource keys (fonts, XObjects, graphics states...)
+_NAME_TOKEN = re.compile(rb"/([^\s/\[\]()<>{}%]+)")
+
+
+class _Shared(pdfdoc.PDFObject):
+    """
+    Per-document handle on a converted object.
+
+    ReportLab marks every object it registers with its internal name, which
+    would stop the same converted object from being registered in a second
+    document; registering this thin wrapper instead keeps the converted tree
+    reusable across canvases.
+    """
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def format(self, document):
+        return self.obj.format(document)
+
+
+def _literal(obj):
+    """pypdf's own serialization of a leaf object (number, name, string, bool, null)."""
+    buf = io.BytesIO()
+    obj.write_to_stream(buf)
+    return buf.getvalue()
+
+
+def _stream(dictionary, data):
+    """PDFStream holding already-encoded data; unfiltered data is compressed once here."""
+    if "Filter" not in dictionary:
+        data = zlib.compress(data)
+        dictionary["Filter"] = pdfdoc.PDFName("FlateDecode")
+    return pdfdoc.PDFStream(dictionary, data, filters=[])
+
+
+def _transform_rect(rect, matrix):
+    a, b, c, d, e, f = matrix
+    x1, y1, x2, y2 = (float(v) for v in rect)
+    xs = (a * x1 + e, a * x2 + e)
+    ys = (d * y1 + f, d * y2 + f)
+    return [round(v, 4) for v in (min(xs), min(ys), max(xs), max(ys))]
+
+
+def _filters(obj):
+    value = obj.get("/Filter")
+    if value is None:
+        return []
+    return [str(f) for f in value] if isinstance(value, ArrayObject) else [str(value)]
+
+
+def _prune_resources(resources, content):
+    """
+    Copy of a /Resources dict without the entries `content` never names.
+
+    Keys that are not plain names are kept, since they may appear escaped
+    (#xx) in the content stream.
+    """
+    used = {name.decode("latin-1") for name in _NAME_TOKEN.findall(content)}
+    pruned = DictionaryObject()
+    for category, entries in resources.items():
+        entries = entries.get_object()
+        if isinstance(entries, DictionaryObject) and category != "/ProcSet":
+            entries = DictionaryObject({
+                key: value for key, value in entries.items()
+                if key[1:] in used or not re.fullmatch(r"[\w.+-]+", key[1:])
+            })
+        pruned[NameObject(category)] = entries
+    return pruned
+
+
+def _image_placements(contents, xobjects, scale):
+    """
+    Largest size (width, height in points) each image of the page is drawn at.
+
+    Returns:
+        dict: image object (idnum, generation) -> (width, height)
+    """
+    placements = {}
+    ctm, stack = (1, 0, 0, 1, 0, 0), []
+    for operands, operator in contents.operations:
+        if operator == b"q":
+            stack.append(ctm)
+        elif operator == b"Q" and stack:
+            ctm = stack.pop()
+        elif operator == b"cm" and len(operands) == 6:
+            a, b, c, d, e, f = (float(v) for v in operands)
+            A, B, C, D, E, F = ctm
+            ctm = (a * A + b * C, a * B + b * D, c * A + d * C, c * B + d * D,
+                   e * A + f * C + E, e * B + f * D + F)
+        elif operator == b"Do" and operands:
+            ref = xobjects.raw_get(operands[0]) if operands[0] in xobjects else None
+            if not isinstance(ref, IndirectObject) or ref.get_object().get("/Subtype") != "/Image":
+                continue
+            size = (math.hypot(ctm[0], ctm[1]) * scale[0], math.hypot(ctm[2], ctm[3]) * scale[1])
+            key = (ref.idnum, ref.generation)
+            seen = placements.get(key, (0, 0))
+            placements[key] = (max(seen[0], size[0]), max(seen[1], size[1]))
+    return placements
+
+
+_IMAGE_MODES = {"/DeviceGray": "L", "/CalGray": "L", "/DeviceRGB": "RGB", "/CalRGB": "RGB"}
+
+
+def _image_mode(image):
+    space = image.get("/ColorSpace")
+    if isinstance(space, ArrayObject) and space and space[0] == "/ICCBased":
+        return {1: "L", 3: "RGB", 4: "CMYK"}.get(space[1].get_object().get("/N"))
+    return _IMAGE_MODES.get(str(space)) if space is not None else None
+
+
+def _downsample(image, max_size, mask):
+    """
+    Decoded, resized samples of an 8-bit image as (width, height, filter, data),
+    or None when the image is already small enough or cannot be resampled.
+    """
+    width, height = int(image["/Width"]), int(image["/Height"])
+    size = (max(1, min(width, max_size[0])), max(1, min(height, max_size[1])))
+    mode = "L" if mask else _image_mode(image)
+    if (size == (width, height) or mode is None or image.get("/BitsPerComponent") != 8
+            or "/Decode" in image or not set(_filters(image)) <= _PLAIN_FILTERS):
+        return None
+    if _filters(image) == ["/FlateDecode"] and "/DecodeParms" not in image:
+        # Plain zlib: inflate directly, large scans exceed pypdf's decompression limit
+        samples = zlib.decompress(image._data)
+    else:
+        samples = image.get_data()
+    img = Image.frombytes(mode, (width, height), samples)
+    img = img.resize(size, Image.LANCZOS, reducing_gap=3.0)
+    quality = COMPACT_CONFIG['jpeg_quality']
+    if quality and not mask and mode in ("L", "RGB"):
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=quality, optimize=True)
+        return size + ("DCTDecode", buf.getvalue())
+    return size + ("FlateDecode", zlib.compress(img.tobytes(), 9))
+
+
+class ImportedPage:
+    """
+    One source page converted to ReportLab objects.
+
+    Args:
+        page : pypdf PageObject
+        name   : unique name for the form XObject
+        size   : (width, height) to scale the page to; None keeps its own size
+        prefix : name prefix for the page's objects (default `name`). Pages of
+                 the same source converted with one prefix share objects such
+                 as images, which are then written once per output PDF.
+        compact: shrink the converted objects (see module docstring)
+    """
+
+    def __init__(self, page, name, size=None, prefix=None, compact=False):
+        self.name     = name
+        self.prefix   = prefix or name
+        self.compact  = compact
+        self.objects  = {}      # internal name -> converted indirect object
+        self.annots   = []      # internal names of link annotations
+        self._ids     = {}      # source object id -> internal name
+        self._digests = {}      # compact: content digest -> internal name
+        self._images  = {}      # compact: source image id -> max drawn size (points)
+        self._masks   = set()   # compact: source ids of soft masks
+
+        box = page.mediabox
+        llx, lly = float(box.left), float(box.bottom)
+        width, height = float(box.width), float(box.height)
+        sx, sy = (size[0] / width, size[1] / height) if size else (1.0, 1.0)
+        self.matrix = (sx, 0, 0, sy, -llx * sx, -lly * sy)
+        self.size = (width * sx, height * sy)
+
+        form = pdfdoc.PDFDictionary({
+            "Type":      pdfdoc.PDFName("XObject"),
+            "Subtype":   pdfdoc.PDFName("Form"),
+            "FormType":  1,
+            "BBox":      pdfdoc.PDFArray([llx, lly, llx + width, lly + height]),
+            "Matrix":    pdfdoc.PDFArray(list(self.matrix)),
+        })
+        contents = page.get_contents()
+        if "/Resources" in page:
+            resources = page["/Resources"]
+            if compact and contents is not None:
+                resources = _prune_resources(resources, contents.get_data())
+                self._images = _image_placements(contents, resources.get("/XObject", DictionaryObject()), (sx, sy))
+            form["Resources"] = self._convert(resources)
+        self.objects[pdfdoc.xObjectName(name)] = _stream(form, contents.get_data() if contents is not None else b"")
+
+        for annot in page.get("/Annots") or []:
+            annot = annot.get_object()
+            action = annot.get("/A")
+            # Only web links: internal destinations point into the source page tree
+            if annot.get("/Subtype") != "/Link" or action is None or action.get_object().get("/S") != "/URI":
+                continue
+            converted = self._convert_dict(annot)
+            converted["Rect"] = pdfdoc.PDFArray(_transform_rect(annot["/Rect"], self.matrix))
+            annot_name = f"{name}.Annot{len(self.annots)}"
+            self.objects[annot_name] = converted
+            self.annots.append(annot_name)
+
+    def _convert(self, obj):
+        if isinstance(obj, IndirectObject):
+            key = (obj.idnum, obj.generation)
+            internal = self._ids.get(key)
+            if internal is None:
+                internal = self._ids[key] = f"{self.prefix}.{obj.idnum}"
+                self.objects[internal] = None   # placeholder, guards reference cycles
+                target = obj.get_object()
+                if self.compact and isinstance(target, StreamObject) and target.get("/Subtype") == "/Image":
+                    converted = self._convert_image(key, target)
+                else:
+                    converted = self._convert(target)
+                if self.compact:
+                    # Identical objects (after their own references were deduplicated) are written once
+                    digest = self._digest(converted)
+                    if digest in self._digests:
+                        del self.objects[internal]
+                        internal = self._ids[key] = self._digests[digest]
+                        return pdfdoc.PDFObjectReference(internal)
+                    self._digests[digest] = internal
+                self.objects[internal] = converted
+            return pdfdoc.PDFObjectReference(internal)
+        if isinstance(obj, StreamObject):
+            filters = _filters(obj)
+            if self.compact and set(filters) & _ASCII_FILTERS and set(filters) <= _PLAIN_FILTERS:
+                # ASCII armour only inflates binary data; store the stream as plain Flate
+                dictionary = self._convert_dict(obj)
+                dictionary.dict.pop("DecodeParms", None)
+                dictionary["Filter"] = pdfdoc.PDFName("FlateDecode")
+                return pdfdoc.PDFStream(dictionary, zlib.compress(obj.get_data(), 9), filters=[])
+            # Encoded bytes are copied as-is: images and fonts are not re-compressed
+            raw = obj._data if "/Filter" in obj else obj.get_data()
+            return _stream(self._convert_dict(obj), raw)
+        if isinstance(obj, DictionaryObject):
+            return self._convert_dict(obj)
+        if isinstance(obj, ArrayObject):
+            return pdfdoc.PDFArray([self._convert(v) for v in obj])
+        return _literal(obj)
+
+    def _convert_dict(self, obj):
+        skip = _COMPACT_SKIP_KEYS if self.compact else _SKIP_KEYS
+        return pdfdoc.PDFDictionary({
+            key[1:]: self._convert(value) for key, value in obj.items() if key not in skip
+        })
+
+    def _convert_image(self, key, image):
+        """Compact conversion of an image XObject, downsampled when drawn above the target DPI."""
+        mask = image.raw_get("/SMask") if "/SMask" in image else None
+        placed = self._images.get(key)
+        if isinstance(mask, IndirectObject):
+            self._masks.add((mask.idnum, mask.generation))
+            if placed is not None:
+                # A soft mask is drawn wherever its image is
+                self._images[(mask.idnum, mask.generation)] = placed
+        resampled = None
+        if placed is not None:
+            dpi = COMPACT_CONFIG['image_dpi']
+            max_size = (math.ceil(placed[0] / 72 * dpi), math.ceil(placed[1] / 72 * dpi))
+            try:
+                resampled = _downsample(image, max_size, key in self._masks)
+            except (ValueError, OSError, zlib.error, PyPdfError):
+                resampled = None   # undecodable samples: keep the original stream
+        if resampled is None:
+            return self._convert(image)
+        width, height, filter_name, data = resampled
+        dictionary = self._convert_dict(image)
+        for name in ("DecodeParms", "Filter"):
+            dictionary.dict.pop(name, None)
+        dictionary.dict.update(Width=width, Height=height, BitsPerComponent=8, Filter=pdfdoc.PDFName(filter_name))
+        return pdfdoc.PDFStream(dictionary, data, filters=[])
+
+    def _digest(self, converted):
+        """Content hash of a converted object (its references are already deduplicated)."""
+        if isinstance(converted, pdfdoc.PDFStream):
+            body = repr(self._digest_value(converted.dictionary)).encode() + converted.content
+        else:
+            body = repr(self._digest_value(converted)).encode()
+        return hashlib.sha1(body).digest()
+
+    def _digest_value(self, value):
+        if isinstance(value, pdfdoc.PDFObjectReference):
+            return ("ref", value.name)
+        if isinstance(value, pdfdoc.PDFDictionary):
+            return ("dict", sorted((k, self._digest_value(v)) for k, v in value.dict.items()))
+        if isinstance(value, pdfdoc.PDFArray):
+            return ("array", [self._digest_value(v) for v in value.sequence])
+        if isinstance(value, (bytes, str, int, float)):
+            return ("value", value)
+        return ("object", id(value))   # never equal to another object
+
+    def draw(self, canv):
+        """Draw the page at the origin of the current canvas page, with its links."""
+        doc = canv._doc
+        if not doc.hasForm(self.name):
+            for internal, obj in self.objects.items():
+                if internal not in doc.idToObject:   # may be shared with another page
+                    doc.Reference(_Shared(obj), internal)
+        canv.doForm(self.name)
+        for internal in self.annots:
+            canv._annotationrefs.append(pdfdoc.PDFObjectReference(internal))
+
+
+# Converted template pages shared by every request in this process, keyed by
+# (path, page index, size, compact)
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+class _TemplateEntry:
+    def __init__(self, signature, digest, page):
+        self.signature = signature
+        self.digest    = digest
+        self.page      = page
+
+
+def get_template_page(path, index, name, size=None, compact=False):
+    """
+    Return page `index` of the PDF at `path` as a shared ImportedPage.
+
+    The file is parsed and the page converted (and scaled to `size`) once per
+    process (separately for compact output). Every call stat()s the file: when its mtime or size changed, the
+    content hash decides whether the page is converted again.
+
+    Returns:
+        ImportedPage, or None when the file or the page does not exist
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    signature = (st.st_mtime_ns, st.st_size)
+    key = (path, index, size, compact)
+
+    with _templates_lock:
+        entry = _templates.get(key)
+        if entry is not None and entry.signature == signature:
+            return entry.page
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if entry is not None and entry.digest == digest:
+            page = entry.page   # touched but unchanged
+        else:
+            reader = PdfReader(io.BytesIO(data))
+            page = ImportedPage(reader.pages[index], name, size, compact=compact) if len(reader.pages) > index else None
+        _templates[key] = _TemplateEntry(signature, digest, page)
+        return page
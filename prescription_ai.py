@@ -0,0 +1,453 @@
+import contextvars
+import json
+import os
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from groq_client import GROQ_CLIENT_CONFIG, LLMError, chat_completion, chat_completion_stream
+from prescription_cache import get_prescription_cache, get_prescription_store, make_cache_key
+from llm_scheduler import listen_queue
+from llm_usage import get_usage_log, usage_scope
+from model_router import ModelRouter
+from prescription_schema import (
+    REQUIRED_KEYS, RepairStats, check_combination, check_fragment,
+    default_combination_parts, default_domain_bullet, parse_json_loose,
+    repair_bold_markup, repair_combination, repair_fragment, repair_prescription,
+)
+from singleflight import SingleFlight
+
+# ==========================================
+# API KEY
+# ==========================================
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+
+# ==========================================
+# AI RESPONSE CACHE & PRECOMPUTED STORE
+# ==========================================
+CACHE_CONFIG = {
+    'path': os.getenv("PRESCRIPTION_CACHE_PATH", "cache/prescriptions.sqlite3"),
+    'ttl_seconds': int(os.getenv("PRESCRIPTION_CACHE_TTL", str(30 * 24 * 3600))),
+    'max_entries': int(os.getenv("PRESCRIPTION_CACHE_MAX_ENTRIES", "512")),
+    # Written by warmup.py, read before the cache
+    'store_path': os.getenv("PRESCRIPTION_STORE_PATH", "precomputed/prescriptions.json"),
+}
+
+# ==========================================
+# AI PRESCRIPTION GENERATOR
+# ==========================================
+# Tried in order: a tier's output is used when it passes the quality gate,
+# otherwise the call escalates to the next (larger, slower) tier. A blank
+# GROQ_MODEL_TIERS falls back to the default tiers
+DEFAULT_MODEL_TIERS = "llama-3.1-8b-instant,llama-3.3-70b-versatile"
+GROQ_MODEL_TIERS = [
+    m.strip() for m in os.getenv("GROQ_MODEL_TIERS", DEFAULT_MODEL_TIERS).split(",") if m.strip()
+] or DEFAULT_MODEL_TIERS.split(",")
+# Routing identity used in cache keys and reports
+GROQ_MODEL = " > ".join(GROQ_MODEL_TIERS)
+GROQ_TEMPERATURE = 0.3
+
+# One call per domain: fragments are cached independently, so "Finance & Retail"
+# and "Finance & Healthcare" share the Finance bullet
+DOMAIN_BULLET_PROMPT = """You are a Senior Data Scientist at Analytics Avenue.
+Generate a JSON prescription bullet for the domain: {domain}
+CRITICAL RULES:
+1. Use <b>text</b> for bold formatting on domain names, technologies
+2. Return ONLY this key:
+   - "domain_bullet": One sentence describing the domain work with <b> tags
+
+For "Finance":
+{{
+  "domain_bullet": "In <b>Finance Analytics</b>, you will work on financial performance analysis, budgeting and forecasting, risk assessment, fraud pattern identification, and profitability optimization."
+}}
+For "Supply Chain":
+{{
+  "domain_bullet": "In <b>Supply Chain Analytics</b>, you will focus on demand forecasting, inventory optimization, logistics performance, supplier analysis, and end-to-end cost efficiency."
+}}
+NOW GENERATE for: {domain}
+Match the style above with proper <b> tags. Return ONLY valid JSON."""
+
+# One small call per combination for the lines that mention every selected domain
+COMBINATION_PROMPT = """You are a Senior Data Scientist at Analytics Avenue.
+Generate a JSON prescription for: {domain_str}
+CRITICAL RULES:
+1. Use <b>text</b> for bold formatting on domain names, technologies
+2. Return ONLY these keys:
+   - "intro_line": Introduction with <b> tags
+   - "projects_bullet": Projects description with <b> tags
+   - "final_sentence": Closing with <b> tags
+
+For "Finance & Supply Chain":
+{{
+  "intro_line": "Given your background, we will support your transition into <b>Finance & Supply Chain Analytics</b> roles, enabling you to solve real business and operational problems using <b>Machine Learning and GenAI</b>.",
+  "projects_bullet": "Hands-on projects include financial variance and profitability analysis, risk and anomaly detection, demand forecasting, inventory health analysis, logistics optimization, and supplier performance tracking. You will also leverage <b>GenAI</b> for automated insights, root-cause analysis, and conversational analytics (projects revealed during placement training).",
+  "final_sentence": "You will apply <b>SQL, Statistics, Machine Learning, and GenAI</b> to <b>finance and supply chain</b> datasets, preparing you for high-impact analytics roles across these domains."
+}}
+NOW GENERATE for: {domain_str}
+Match the style above with proper <b> tags. Return ONLY valid JSON."""
+
+
+def _prompt_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+
+# Each changes whenever its prompt text changes, so stale cache entries stop matching
+FRAGMENT_PROMPT_VERSION = _prompt_hash(DOMAIN_BULLET_PROMPT)
+COMBINATION_PROMPT_VERSION = _prompt_hash(COMBINATION_PROMPT)
+PROMPT_VERSION = _prompt_hash(DOMAIN_BULLET_PROMPT + COMBINATION_PROMPT)
+
+# Shared by every Streamlit session in this process: concurrent requests for the
+# same domain key wait on one Groq completion instead of each starting their own
+_inflight = SingleFlight()
+_router = ModelRouter(GROQ_MODEL_TIERS)
+_repairs = RepairStats()
+
+def get_cache():
+    return get_prescription_cache(
+        CACHE_CONFIG['path'], CACHE_CONFIG['ttl_seconds'], CACHE_CONFIG['max_entries'],
+        (PROMPT_VERSION, FRAGMENT_PROMPT_VERSION, COMBINATION_PROMPT_VERSION)
+    )
+
+
+def get_store():
+    return get_prescription_store(CACHE_CONFIG['store_path'])
+
+
+def get_inflight_stats():
+    return _inflight.stats()
+
+
+def get_routing_stats():
+    return _router.stats()
+
+
+def get_repair_stats():
+    return _repairs.stats()
+
+
+def get_usage_summary():
+    return get_usage_log().summary()
+
+
+class PrescriptionStreamParser:
+    """
+    Incremental parser for the streamed prescription JSON object.
+
+    feed() returns the top-level (key, value) pairs that became complete with
+    the new text, so each section can be shown as soon as it has arrived.
+    Text before the opening brace (e.g. a ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self.values   = {}
+        self._buf     = ""
+        self._start   = None
+        self._pos     = None
+        self._closed  = False
+        self._decoder = json.JSONDecoder()
+
+    def _skip(self, pos, chars=" \t\r\n,"):
+        while pos < len(self._buf) and self._buf[pos] in chars:
+            pos += 1
+        return pos
+
+    def feed(self, text):
+        self._buf += text
+        completed = []
+        if self._start is None:
+            self._start = self._buf.find("{")
+            if self._start < 0:
+                self._start = None
+                return completed
+            self._pos = self._start + 1
+
+        buf = self._buf
+        while not self._closed:
+            pos = self._skip(self._pos)
+            if pos >= len(buf):
+                break
+            if buf[pos] == "}":
+                self._closed = True
+                break
+            try:
+                key, pos = self._decoder.raw_decode(buf, pos)
+                pos = self._skip(pos, " \t\r\n")
+                if pos >= len(buf) or buf[pos] != ":":
+                    break
+                value, end = self._decoder.raw_decode(buf, self._skip(pos + 1, " \t\r\n"))
+            except json.JSONDecodeError:
+                break   # value still arriving
+            # A complete value is always followed by "," or "}" — guards truncated numbers
+            if end >= len(buf):
+                break
+            self.values[key] = value
+            self._pos = end
+            completed.append((key, value))
+        return completed
+
+    def result(self):
+        """Return the full object; raises ValueError if the stream ended early."""
+        if not self._closed:
+            json.loads(self._buf[self._start or 0:])   # raises with a precise message
+            raise ValueError("incomplete JSON object in stream")
+        return dict(self.values)
+
+    @property
+    def text(self):
+        """Everything received so far, for a lenient re-parse when result() fails."""
+        return self._buf
+
+
+def _complete_json(prompt, model, on_section=None, latency_budget=None):
+    """
+    Run one Groq completion and return the parsed JSON object.
+
+    With on_section the completion is streamed and on_section(key, value) fires
+    for each top-level key as soon as its value is complete. JSON mode cannot
+    be combined with streaming on Groq, so the prompt's "Return ONLY valid JSON"
+    instruction carries the format there. Fenced or slightly malformed JSON is
+    recovered with parse_json_loose; ValueError when there is no object at all.
+    `latency_budget` overrides the client's default budget for the call.
+    """
+    messages = [{"role": "user", "content": prompt}]
+    if on_section:
+        parser = PrescriptionStreamParser()
+        for delta in chat_completion_stream(
+            GROQ_API_KEY, latency_budget, messages=messages, model=model, temperature=GROQ_TEMPERATURE
+        ):
+            for key, value in parser.feed(delta):
+                on_section(key, value)
+        try:
+            return parser.result()
+        except ValueError:
+            return parse_json_loose(parser.text)
+
+    completion = chat_completion(
+        GROQ_API_KEY,
+        latency_budget,
+        messages=messages,
+        model=model,
+        temperature=GROQ_TEMPERATURE,
+        response_format={"type": "json_object"}
+    )
+    return parse_json_loose(completion.choices[0].message.content)
+
+
+def _routed_json(prompt, repair, check, on_section=None):
+    """
+    _complete_json through the model tiers.
+
+    Each response is repaired locally first, so a tier is only re-asked
+    (escalated) when `check` still finds problems or repair(data) -> (None, _)
+    finds nothing usable. ValueError when the last tier is unusable too.
+    All tiers share one client latency budget, so escalating never makes a
+    request wait longer than a single call could.
+    """
+    def call(model, remaining):
+        try:
+            data = _complete_json(prompt, model, on_section, remaining)
+        except ValueError:
+            _repairs.record(unrepairable=True)
+            raise
+        repaired, fixes = repair(data)
+        _repairs.record(fixes, unrepairable=repaired is None)
+        if repaired is None:
+            raise ValueError(f"unusable response from {model}")
+        return repaired
+
+    data, _ = _router.run(call, check, GROQ_CLIENT_CONFIG['latency_budget'])
+    return data
+
+
+def _cached_or_generate(cache, key, domains, prompt_version, generate, refresh=False):
+    """Cache lookup (skipped with `refresh`), then a single-flight generate + cache.set on a miss."""
+    cached = None if refresh else cache.get(key)
+    if cached is not None:
+        return cached, True
+
+    def generate_and_cache():
+        value = generate()
+        cache.set(key, value, domains, prompt_version)
+        return value
+
+    value, _ = _inflight.do(key, generate_and_cache)
+    return value, False
+
+
+def get_domain_bullet(domain, cache, refresh=False):
+    """
+    Return (bullet, defaulted) for one domain, from the fragment cache when possible.
+
+    Falls back to the domain's template bullet (not cached, defaulted=True)
+    when no tier returned a usable one.
+    """
+    def generate():
+        return _routed_json(
+            DOMAIN_BULLET_PROMPT.format(domain=domain),
+            lambda data: repair_fragment(data, domain),
+            check_fragment,
+        )
+
+    key = make_cache_key([domain], GROQ_MODEL, GROQ_TEMPERATURE, FRAGMENT_PROMPT_VERSION)
+    try:
+        fragment, _ = _cached_or_generate(cache, key, [domain], FRAGMENT_PROMPT_VERSION, generate, refresh)
+    except ValueError:
+        _repairs.record(defaulted=True)
+        return default_domain_bullet(domain), True
+    return fragment["domain_bullet"], False
+
+
+def _repairing_emitter(on_section):
+    """Wrap on_section for streamed values, which have not been repaired yet: keep the preview's markup well-formed."""
+    def emit(key, value):
+        on_section(key, repair_bold_markup(value) if isinstance(value, str) else value)
+    return emit
+
+
+def get_combination_parts(selected_domains, cache, on_section=None, refresh=False):
+    """
+    Return (parts, defaulted): intro_line, projects_bullet and final_sentence
+    for the whole combination, and whether they are the (uncached) template
+    fallback.
+    """
+    domain_str = " & ".join(selected_domains)
+
+    emit = _repairing_emitter(on_section) if on_section else None
+
+    def generate():
+        return _routed_json(
+            COMBINATION_PROMPT.format(domain_str=domain_str),
+            lambda data: repair_combination(data, domain_str),
+            check_combination,
+            emit,
+        )
+
+    key = make_cache_key(selected_domains, GROQ_MODEL, GROQ_TEMPERATURE, COMBINATION_PROMPT_VERSION)
+    try:
+        parts, hit = _cached_or_generate(cache, key, selected_domains, COMBINATION_PROMPT_VERSION, generate, refresh)
+        defaulted = False
+    except ValueError:
+        _repairs.record(defaulted=True)
+        parts, hit, defaulted = default_combination_parts(domain_str), True, True
+    if hit:
+        _emit_all(parts, on_section)
+    return parts, defaulted
+
+
+def generate_prescription(selected_domains, on_section=None, refresh=False):
+    """
+    Compose a prescription from per-domain fragments plus one combination call.
+
+    Bypasses the full-prescription store and cache, but reuses cached fragments
+    and combination parts (unless `refresh`, which regenerates and re-caches
+    them too); only the missing pieces reach Groq, in parallel.
+    Raises LLMError on API failures (after retries); sections no tier returned
+    usably fall back to template defaults.
+
+    Returns:
+        (composed dict without domains_title, list of the keys filled from
+        template defaults). A prescription with defaults must not be cached
+        or stored: the next request should ask Groq again.
+    """
+    cache = get_cache()
+    with ThreadPoolExecutor(max_workers=len(selected_domains)) as pool:
+        # copy_context carries the caller's queue listener into the worker threads
+        bullet_futures = [
+            pool.submit(contextvars.copy_context().run, get_domain_bullet, d, cache, refresh)
+            for d in selected_domains
+        ]
+        # Runs on the caller's thread so streamed sections reach Streamlit directly
+        parts, parts_defaulted = get_combination_parts(selected_domains, cache, on_section, refresh)
+        bullets, bullets_defaulted = zip(*(f.result() for f in bullet_futures))
+    bullets = list(bullets)
+    if on_section:
+        on_section("domain_bullets", bullets)
+    defaulted = []
+    if parts_defaulted:
+        defaulted += ["intro_line", "projects_bullet", "final_sentence"]
+    if any(bullets_defaulted):
+        defaulted.append("domain_bullets")
+    return {
+        "intro_line":      parts["intro_line"],
+        "domain_bullets":  bullets,
+        "projects_bullet": parts["projects_bullet"],
+        "final_sentence":  parts["final_sentence"],
+    }, defaulted
+
+
+def _emit_all(data, on_section):
+    if on_section:
+        for key in REQUIRED_KEYS:
+            if key in data:
+                on_section(key, data[key])
+
+
+def get_ai_prescription_text(selected_domains, on_section=None, on_queue=None, refresh=False):
+    """
+    Return the AI prescription dict for the selected domains.
+
+    A cold generation is composed from per-domain fragments (see
+    generate_prescription). With on_section, the combination call is streamed
+    and on_section(key, value) fires as each section completes; store/cache
+    hits and results shared with a concurrent caller report every section at once.
+    on_queue(position, eta_seconds) is called while a Groq call waits for
+    rate-limit budget (position 0 once admitted); it may fire from worker threads.
+    Every result passes repair_prescription, so callers always get all
+    REQUIRED_KEYS with balanced <b> markup (or {"error": ...}).
+    With `refresh`, the store and caches are not read: Groq writes a new
+    prescription, which replaces the cached one.
+
+    Each request is written to the usage log with its cache status and the
+    tokens of the Groq calls it made.
+    """
+    cache_key = make_cache_key(selected_domains, GROQ_MODEL, GROQ_TEMPERATURE, PROMPT_VERSION)
+    with usage_scope(" & ".join(selected_domains), cache_key) as scope:
+        data, cache_status = _lookup_or_generate(selected_domains, cache_key, on_section, on_queue, refresh)
+    get_usage_log().record_prescription(scope, cache_status, error=data.get("error"))
+    return data
+
+
+def _lookup_or_generate(selected_domains, cache_key, on_section, on_queue, refresh=False):
+    """get_ai_prescription_text without accounting; returns (data, cache status)."""
+    domain_str = " & ".join(selected_domains)
+
+    def finish(data):
+        try:
+            data, fixes = repair_prescription(data, selected_domains)
+        except ValueError as e:
+            return {"error": str(e)}
+        _repairs.record(fixes)
+        data["domains_title"] = domain_str
+        return data
+
+    # 1. Precomputed store (warmup.py), 2. runtime cache, 3. cold LLM call
+    stored = None if refresh else get_store().get(cache_key)
+    if stored is not None:
+        stored = finish(stored)
+        _emit_all(stored, on_section)
+        return stored, "store"
+
+    cache = get_cache()
+    cached = None if refresh else cache.get(cache_key)
+    if cached is not None:
+        cached = finish(cached)
+        _emit_all(cached, on_section)
+        return cached, "cache"
+
+    if not GROQ_API_KEY or GROQ_API_KEY == "your_groq_api_key_here":
+        return {"error": "API Key not configured"}, "miss"
+
+    def generate_and_cache():
+        data, defaulted = generate_prescription(selected_domains, on_section, refresh)
+        if not defaulted:   # template fallbacks are served, but the next request asks Groq again
+            cache.set(cache_key, data, selected_domains, PROMPT_VERSION)
+        return data
+
+    try:
+        with listen_queue(on_queue):
+            data, shared = _inflight.do(cache_key, generate_and_cache)
+        if shared:
+            _emit_all(data, on_section)
+        return finish(data), "shared" if shared else "miss"
+    except LLMError as e:
+        return {"error": str(e), "error_info": e.as_dict()}, "miss"
+    except Exception as e:
+        return {"error": str(e)}, "miss"
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def make_cache_key(domains, model, temperature, prompt_version):
+    """
+    Build a content-addressed key for an AI prescription.
+
+    The domain list is normalised (stripped, de-duplicated, sorted) so that
+    "Finance, Retail" and "Retail, Finance" share the same entry.
+
+    Args:
+        domains        : Iterable of selected domain names
+        model          : Groq model name used for the completion
+        temperature    : Sampling temperature used for the completion
+        prompt_version : Short hash of the prompt template
+
+    Returns:
+        Hex digest string
+    """
+    normalized = sorted({d.strip() for d in domains if d and d.strip()})
+    raw = json.dumps({
+        "domains":        normalized,
+        "model":          model,
+        "temperature":    round(float(temperature), 4),
+        "prompt_version": prompt_version,
+    }, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class PrescriptionCache:
+    """
+    Disk-backed (SQLite) cache for AI prescription JSON with TTL and LRU eviction.
+
+    Safe to share between Streamlit sessions: every operation runs under a
+    process-wide lock on a single connection.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int = 30 * 24 * 3600, max_entries: int = 512):
+        self.path        = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits        = 0
+        self.misses      = 0
+        self._lock       = threading.Lock()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS prescriptions ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " domains TEXT NOT NULL,"
+                " prompt_version TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+
+    def get(self, key: str):
+        """Return the cached dict for `key`, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM prescriptions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM prescriptions WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE prescriptions SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(value)
+
+    def set(self, key: str, value: dict, domains, prompt_version: str):
+        """Store `value` under `key` and evict least-recently-used entries over the cap."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO prescriptions"
+                " (key, value, domains, prompt_version, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, json.dumps(value), " & ".join(sorted(domains)), prompt_version, now, now)
+            )
+            if self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM prescriptions WHERE key IN ("
+                    " SELECT key FROM prescriptions ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+
+    def invalidate_prompt_version(self, *current_versions: str):
+        """Drop every entry produced by a prompt not in `current_versions`. Returns rows removed."""
+        placeholders = ", ".join("?" for _ in current_versions)
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                f"DELETE FROM prescriptions WHERE prompt_version NOT IN ({placeholders})", current_versions
+            )
+            return cur.rowcount
+
+    def clear(self):
+        """Remove all entries and reset the hit/miss counters."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM prescriptions")
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM prescriptions").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits":     self.hits,
+                "misses":   self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "entries":  entries,
+            }
+
+
+class PrescriptionStore:
+    """
+    Read-mostly JSON store of precomputed prescriptions, written by warmup.py.
+
+    The whole file is held in memory and re-read when its mtime changes, so a
+    warm-up run finishing while the app is up is picked up on the next lookup.
+    Writes go through a temp file + os.replace so a killed job never leaves a
+    half-written store behind.
+    """
+
+    def __init__(self, path: str):
+        self.path     = path
+        self._lock    = threading.Lock()
+        self._entries = {}
+        self._mtime   = None
+
+    def _reload_if_changed(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            self._entries, self._mtime = {}, None
+            return
+        if mtime != self._mtime:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+            self._mtime = mtime
+
+    def get(self, key: str):
+        """Return a copy of the stored prescription dict for `key`, or None."""
+        with self._lock:
+            self._reload_if_changed()
+            entry = self._entries.get(key)
+        return dict(entry["data"]) if entry else None
+
+    def __contains__(self, key):
+        with self._lock:
+            self._reload_if_changed()
+            return key in self._entries
+
+    def put(self, key: str, data: dict, **meta):
+        """Add or replace an entry (with optional metadata) and flush the file atomically."""
+        with self._lock:
+            self._reload_if_changed()
+            self._entries[key] = dict(meta, data=data)
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+            self._mtime = os.path.getmtime(self.path)
+
+    def __len__(self):
+        with self._lock:
+            self._reload_if_changed()
+            return len(self._entries)
+
+
+# Module-level singletons: Streamlit re-executes app.py on every rerun, but
+# imported modules persist, so the cache (and its counters) is process-wide.
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_prescription_cache(path: str, ttl_seconds: int, max_entries: int, prompt_versions: tuple):
+    """
+    Return the process-wide PrescriptionCache, creating it on first use.
+
+    Entries written by a prompt version not in `prompt_versions` are purged when
+    the cache is opened.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PrescriptionCache(path, ttl_seconds=ttl_seconds, max_entries=max_entries)
+            _cache.invalidate_prompt_version(*prompt_versions)
+        return _cache
+
+
+_store = None
+
+
+def get_prescription_store(path: str):
+    """Return the process-wide PrescriptionStore for `path`."""
+    global _store
+    with _cache_lock:
+        if _store is None or _store.path != path:
+            _store = PrescriptionStore(path)
+        return _store
@@ -0,0 +1,80 @@
+"""
+The per-request content of a prescription, shared by every output format.
+
+build_prescription parses the AI <b> markup and groups the career table once
+per Generate; the PDF and Word backends in prescription_render.py only lay
+the result out. Content that is the same for every candidate (the brochure
+text, the services rows) is not part of the model: each backend compiles it
+once per process.
+"""
+import re
+from itertools import groupby
+
+
+def split_bold(html_text):
+    """Split <b>...</b> markup into (text, bold) runs; stray tags are dropped."""
+    runs = []
+    for part in re.split(r'(<b>.*?</b>)', html_text):
+        if part.startswith('<b>') and part.endswith('</b>'):
+            runs.append((part[3:-4], True))
+        else:
+            clean = part.replace('</b>', '').replace('<b>', '')
+            if clean:
+                runs.append((clean, False))
+    return tuple(runs)
+
+
+class Prescription:
+    """
+    One candidate's prescription, ready to render.
+
+    Plain-text fields carry no markup. AI paragraphs are tuples of
+    (text, bold) runs. The career table is one block of rows per domain,
+    in selection order, with the domain cell spanning its block.
+
+    Instances are never mutated and pickle cheaply, so one built in the app
+    can be handed to renderers in worker processes and kept for later
+    (lazy) renders of the same request.
+    """
+
+    def __init__(self, name, status, domains_title, intro, domain_bullets, projects, final, career_blocks):
+        self.name           = name
+        self.status         = status
+        self.domains_title  = domains_title
+        self.intro          = intro             # runs
+        self.domain_bullets = domain_bullets    # tuple of runs, blank bullets dropped
+        self.projects       = projects          # runs, or None
+        self.final          = final             # runs, or None
+        self.career_blocks  = career_blocks     # tuple of tuples of row tuples
+
+
+def build_prescription(name, status, ai_content, table_rows):
+    """
+    Build the Prescription for one request.
+
+    Args:
+        name       : Candidate name
+        status     : Candidate status
+        ai_content : AI prescription dict (domains_title, intro_line, domain_bullets, ...)
+        table_rows : Career-table rows from get_table_data_with_rowspan
+
+    Returns:
+        Prescription
+
+    Raises:
+        KeyError: ai_content has no domains_title
+    """
+    projects = ai_content.get('projects_bullet', '')
+    final = ai_content.get('final_sentence', '')
+    return Prescription(
+        name           = name,
+        status         = status,
+        domains_title  = ai_content['domains_title'],
+        intro          = split_bold(ai_content.get('intro_line', '')),
+        domain_bullets = tuple(split_bold(b) for b in ai_content.get('domain_bullets', []) if b.strip()),
+        projects       = split_bold(projects) if projects else None,
+        final          = split_bold(final) if final else None,
+        career_blocks  = tuple(
+            tuple(tuple(row) for row in rows) for _, rows in groupby(table_rows, key=lambda row: row[0])
+        ),
+    )
@@ -0,0 +1,1132 @@
+"""
+PDF and Word backends for a career prescription (prescription_doc.Prescription).
+
+Shared by the Streamlit app and the render worker processes (render_pool.py),
+so everything expensive and request-independent (template page 3, the header
+image, static page layers, the base Word document, career-table blocks) is
+cached at module level and built once per process.
+"""
+import copy
+import hashlib
+import io
+import os
+import re
+import threading
+import zipfile
+from xml.sax.saxutils import escape
+
+from reportlab.pdfgen import canvas
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import Paragraph, Table, TableStyle
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.enums import TA_LEFT
+from pypdf import PdfReader
+from docx import Document
+from docx.shared import Pt, RGBColor, Inches, Cm, Emu
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.oxml.ns import nsdecls, qn
+from docx.oxml import OxmlElement, parse_xml
+from docx.text.run import Run
+from lxml import etree
+
+from career_templates import CAREER_TEMPLATES
+from image_assets import get_image_asset
+from pdf_import import ImportedPage, get_template_page
+from prescription_doc import split_bold
+
+# ==========================================
+# SPACING & MARGINS
+# ==========================================
+SPACING = {
+    'section_gap': 18,
+    'heading_gap': 10,
+    'bullet_gap': 5,
+    'paragraph_gap': 12,
+    'table_row_gap': 4,
+}
+
+MARGINS = {
+    'left': 50,
+    'right': 50,
+    'top': 15,
+    'bottom': 50,
+    'page_border': 10,
+}
+
+# ==========================================
+# BRAND ASSETS
+# ==========================================
+# Read once per process and re-read only when the file changes: page 3 of the
+# brochure is appended to every prescription, the header tops pages 1 and 2
+TEMPLATE_CONFIG = {
+    'template_path': os.getenv("TEMPLATE_PDF_PATH", "assets/template.pdf"),
+    'header_path':   os.getenv("HEADER_IMAGE_PATH", "assets/header.png"),
+}
+
+
+def template_version():
+    """
+    Short hash of the inputs the documents share across requests: the header
+    image, the brochure template file and the career table templates.
+    """
+    header = get_image_asset(TEMPLATE_CONFIG['header_path'])
+    try:
+        st = os.stat(TEMPLATE_CONFIG['template_path'])
+        template = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        template = None
+    raw = repr((header.sha1 if header else None, template, sorted(CAREER_TEMPLATES.items())))
+    return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+# ==========================================
+# CAREER TABLE DATA
+# ==========================================
+def get_table_data_with_rowspan(selected_domains):
+    table_rows = []
+    domain_rowspan_map = {}
+    for domain in selected_domains:
+        if domain in CAREER_TEMPLATES:
+            domain_rows = CAREER_TEMPLATES[domain]
+            domain_rowspan_map[domain] = len(domain_rows)
+            table_rows.extend(domain_rows)
+    return table_rows, domain_rowspan_map
+
+
+# ==========================================
+# PDF HELPER FUNCTIONS
+# ==========================================
+def draw_header_no_line(c, page_width, page_height):
+    header = get_image_asset(TEMPLATE_CONFIG['header_path'])
+    if header is None:
+        c.setFillColor(colors.red)
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(50, page_height - 50, "ERROR: header.png not found!")
+        return 100
+    try:
+        aspect_ratio = header.aspect_ratio
+
+        # Use full content width for maximum sharpness — no small scaling
+        L = MARGINS['left']
+        R = MARGINS['right']
+        header_width  = page_width - L - R
+        header_height = header_width / aspect_ratio
+
+        x_pos = L
+        y_pos = page_height - header_height - 10
+
+        c.drawImage(
+            header.path, x_pos, y_pos,
+            width=header_width, height=header_height,
+            preserveAspectRatio=True, mask='auto'
+        )
+
+        # Horizontal line below header — same as page 3
+        line_y = y_pos - 6
+        c.setStrokeColor(colors.black)
+        c.setLineWidth(1)
+        c.line(L, line_y, page_width - R, line_y)
+
+        return header_height + 30
+
+    except Exception as e:
+        return 100
+
+
+# ==========================================
+# PDF STYLES
+# ==========================================
+PDF_STYLES = {
+    'normal':  ParagraphStyle('Normal', fontName='Times-Roman', fontSize=11, leading=13, alignment=TA_LEFT),
+    'small':   ParagraphStyle('Small', fontName='Times-Roman', fontSize=11, leading=13, alignment=TA_LEFT),
+    'heading': ParagraphStyle('Heading', fontName='Times-Bold', fontSize=11, leading=13, alignment=TA_LEFT),
+}
+PDF_STYLES['bullet'] = ParagraphStyle('Bullet', parent=PDF_STYLES['normal'], leftIndent=7, firstLineIndent=-7, leading=13)
+
+
+def draw_page_border(c):
+    # Thin outer border — matches page 3
+    page_width, page_height = A4
+    c.setStrokeColor(colors.black)
+    c.setLineWidth(0.8)
+    c.rect(8, 8, page_width - 16, page_height - 16, stroke=1, fill=0)
+
+
+def pdf_markup(runs):
+    """Paragraph markup for (text, bold) runs; the text itself is escaped."""
+    return "".join(f"<b>{escape(text)}</b>" if bold else escape(text) for text, bold in runs)
+
+
+def draw_paragraph(c, text, style, x, y, width, max_height):
+    """Wrap and draw one paragraph with its top at y; returns its height."""
+    p = Paragraph(text, style)
+    _, h = p.wrap(width, max_height)
+    p.drawOn(c, x, y - h)
+    return h
+
+
+# ==========================================
+# STATIC PAGE LAYERS
+# ==========================================
+# Everything on pages 1 and 2 that is the same for every candidate is drawn by
+# these blocks. Each takes the y where it starts and returns the y where the
+# next element starts. They are compiled once into form XObjects (see
+# get_static_layers), so per-request rendering only lays out dynamic fields.
+def layer_p1_header(c, y):
+    page_width, page_height = A4
+    draw_page_border(c)
+    header_space = draw_header_no_line(c, page_width, page_height)
+    return page_height - header_space - 15
+
+
+def layer_p1_intro(c, y):
+    L = MARGINS['left']
+    W = A4[0] - MARGINS['right'] - L
+    style_normal = PDF_STYLES['normal']
+
+    intro_text = (
+        "Our Senior Data Scientist <b>Mr. Subramani</b>, has shared with you the "
+        "prescription based on your recent consultation to join our "
+        "<b>Nationwide Data Analytics Training and Placement Program 2025</b>."
+    )
+    y -= draw_paragraph(c, intro_text, style_normal, L, y, W, 120)
+
+    y -= 12
+    c.setFillColor(colors.black)
+    c.setFont('Times-Bold', 11)
+    c.drawString(L, y, "About Us")
+    y -= 14
+
+    about_text = (
+        "At <b>Analytics Avenue and Advanced Analytics</b>, we are a team of "
+        "<b>Data Scientists, Data Engineers, and BI Developers</b> throughout India "
+        "across various MNCs joined together to keep a pause for unemployment and "
+        "empowered <b>500+ professionals</b> in the past year, enabling them to "
+        "transition into various <b>Data Analytics roles</b>."
+    )
+    y -= draw_paragraph(c, about_text, style_normal, L, y, W, 160)
+
+    y -= 12
+    instr_text = "Below you can find the career road map, Key outcomes & suggestions given by our Data Scientist"
+    h = draw_paragraph(c, f"<b>{instr_text}</b>", style_normal, L, y, W, 100)
+    return y - (h + 10)
+
+
+def layer_p1_roadmap(c, y):
+    L = MARGINS['left']
+    W = A4[0] - MARGINS['right'] - L
+
+    y -= 12
+    c.setFillColor(colors.black)
+    c.setFont('Times-Bold', 11)
+    c.drawString(L, y, "Career Roadmap")
+    y -= 14
+
+    roadmap = [
+        "Step 1 \u2192 Learn Tools (SQL, Python, Statistics, Power BI, Machine Learning, Gen AI)",
+        "Step 2 \u2192 Domain-Specific Projects",
+        "Step 3 \u2192 Role Readiness (interviews, placement support)"
+    ]
+    for step in roadmap:
+        h = draw_paragraph(c, step, PDF_STYLES['normal'], L, y, W, 100)
+        y -= (h + 3)
+    return y
+
+
+def _draw_outcomes(c, y, items):
+    L = MARGINS['left']
+    W = A4[0] - MARGINS['right'] - L
+    for item in items:
+        h = draw_paragraph(c, f"• {item}", PDF_STYLES['bullet'], L, y, W, 300)
+        y -= (h + 3)
+    return y
+
+
+def layer_p1_outcomes_head(c, y):
+    y -= 12
+    c.setFillColor(colors.black)
+    c.setFont('Times-Bold', 11)
+    c.drawString(MARGINS['left'], y, "Key Outcomes")
+    y -= 14
+    return _draw_outcomes(c, y, [
+        "Data Analysis Skills (SQL, Python, Visualization, Statistics)",
+        "Data Engineer Skills (Cloud, SQL, Python, Data Warehousing, ETL orchestration)",
+        "Machine Learning & Gen AI (LLMs, Prompt Engineering, RAG Pipelines, Embeddings, Vector Databases, Fine-Tuning & Deployment)",
+    ])
+
+
+def layer_p1_outcomes_tail(c, y):
+    return _draw_outcomes(c, y, [
+        "Recreate Industrial Standard projects worked by our Data Scientists",
+        "Placement opportunities, Organic job calls and referral drives"
+    ])
+
+
+SERVICES_COL_WIDTHS = (0.32, 0.68)
+SERVICES_TABLE_STYLE = [
+    ('BACKGROUND', (0, 0), (-1, 0), colors.white),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 8),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 5),
+    ('TOPPADDING', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+]
+
+
+def services_table(rows):
+    """
+    Lay out rows of the services table. The table is drawn in pieces (static
+    header and rows in the layers, the domain row per request); rows have
+    independent heights, so the pieces line up exactly.
+    """
+    W = A4[0] - MARGINS['left'] - MARGINS['right']
+    style_small, style_heading = PDF_STYLES['small'], PDF_STYLES['heading']
+    data = [[Paragraph(label, style_heading), Paragraph(details, style_small)] for label, details in rows]
+    table = Table(data, colWidths=[W * f for f in SERVICES_COL_WIDTHS])
+    table.setStyle(TableStyle(SERVICES_TABLE_STYLE))
+    table.wrap(W, A4[1])
+    return table
+
+
+def layer_p2_header(c, y):
+    page_width, page_height = A4
+    L = MARGINS['left']
+    draw_page_border(c)
+    header_space = draw_header_no_line(c, page_width, page_height)
+    y = page_height - header_space - 15
+
+    c.setFillColor(colors.black)
+    c.setFont('Times-Bold', 11)
+    c.drawString(L, y, "Our Customized Services for you:")
+    y -= 14
+
+    head = services_table([("<b>Service</b>", "<b>Details</b>")])
+    head.drawOn(c, L, y - head._height)
+    return y - head._height
+
+
+def layer_p2_services_tail(c, y):
+    tail = services_table([
+        ("<b>2. Secret Job Portals Access</b>",
+         "Setup and optimize your profile on 9 exclusive job portals to help you receive organic job calls"),
+        ("<b>3. Interview Preparation Materials</b>",
+         "Lifetime access to interview notes, preparation guides, and materials prepared by top Data Scientists in real interview scenarios"),
+        ("<b>4. Monthly In-Person Training</b>",
+         "Attend monthly in-house classroom sessions (1 weekend per month) for revision, rapid preparation, and mentorship from experienced professionals"),
+    ])
+    tail.drawOn(c, MARGINS['left'], y - tail._height)
+    return y - (tail._height + 12)
+
+
+STATIC_LAYERS = {
+    "p1_header":        layer_p1_header,
+    "p1_intro":         layer_p1_intro,
+    "p1_roadmap":       layer_p1_roadmap,
+    "p1_outcomes_head": layer_p1_outcomes_head,
+    "p1_outcomes_tail": layer_p1_outcomes_tail,
+    "p2_header":        layer_p2_header,
+    "p2_services_tail": layer_p2_services_tail,
+}
+
+
+class StaticLayer:
+    """A compiled block: drawn shifted so that its top lands at the current y."""
+
+    def __init__(self, page, top, height):
+        self.page   = page
+        self.top    = top
+        self.height = height
+
+    def draw(self, c, y):
+        c.saveState()
+        c.translate(0, y - self.top)
+        self.page.draw(c)
+        c.restoreState()
+        return y - self.height
+
+
+def _compile_static_layers(compact):
+    """
+    Draw each STATIC_LAYERS block on its own page of a scratch PDF, starting at
+    the top of the page, and convert the pages to reusable form XObjects.
+    """
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    ends = {}
+    for name, block in STATIC_LAYERS.items():
+        ends[name] = block(c, A4[1])
+        c.showPage()
+    c.save()
+
+    reader = PdfReader(buffer)
+    return {
+        name: StaticLayer(ImportedPage(page, f"Layer_{name}", prefix="StaticLayers", compact=compact), A4[1], A4[1] - ends[name])
+        for (name, page) in zip(STATIC_LAYERS, reader.pages)
+    }
+
+
+# Compiled layers keyed by (header image hash, compact)
+_layers = {}
+_layers_lock = threading.Lock()
+
+
+def get_static_layers(header_signature, compact=False):
+    """
+    Compile STATIC_LAYERS once per process (and whenever the header image changes),
+    separately for compact output.
+    """
+    with _layers_lock:
+        key = (header_signature, compact)
+        if key not in _layers:
+            for stale in [k for k in _layers if k[0] != header_signature]:
+                del _layers[stale]
+            _layers[key] = _compile_static_layers(compact)
+        return _layers[key]
+
+
+def static_layers(compact=False):
+    header = get_image_asset(TEMPLATE_CONFIG['header_path'])
+    return get_static_layers(header.sha1 if header else None, compact)
+
+
+# ==========================================
+# PAGE 1 — PDF
+# ==========================================
+def create_page1(c, doc, compact=False):
+    page_width, page_height = A4
+    L = MARGINS['left']
+    R = page_width - MARGINS['right']
+    W = R - L
+    layers = static_layers(compact)
+
+    style_normal = PDF_STYLES['normal']
+    style_bullet = PDF_STYLES['bullet']
+
+    y = layers["p1_header"].draw(c, page_height)
+
+    c.setFillColor(colors.black)
+    c.setFont('Times-Bold', 11)
+    c.drawString(L, y, f"Hi {doc.name},")
+    y -= 14
+
+    y = layers["p1_intro"].draw(c, y)
+
+    details = [
+        ("Name", doc.name),
+        ("Status", doc.status),
+        ("Technologies Needed", "SQL, Python, Statistics, Power BI, Machine Learning, Gen AI"),
+        ("Sectors Covered", doc.domains_title)
+    ]
+    COLON_X = L + 140
+    VALUE_X = COLON_X + 15
+    for label, value in details:
+        c.setFillColor(colors.black)
+        c.setFont('Times-Bold', 11)
+        c.drawString(L, y - 10, label)
+        c.drawString(COLON_X, y - 10, ":")
+        vh = draw_paragraph(c, escape(value), style_normal, VALUE_X, y, R - VALUE_X, 120)
+        y -= (vh + 4)
+
+    y = layers["p1_roadmap"].draw(c, y)
+    y = layers["p1_outcomes_head"].draw(c, y)
+    y = _draw_outcomes(c, y, [f"Domain Knowledge ({escape(doc.domains_title)} etc.)"])
+    y = layers["p1_outcomes_tail"].draw(c, y)
+
+    y -= 12
+    c.setFillColor(colors.black)
+    c.setFont('Times-Bold', 11)
+    c.drawString(L, y, "Prescription:")
+    y -= 14
+
+    h = draw_paragraph(c, pdf_markup(doc.intro), style_normal, L, y, W, 140)
+    y -= (h + 8)
+
+    for runs in doc.domain_bullets:
+        h = draw_paragraph(c, f"• {pdf_markup(runs)}", style_bullet, L, y, W, 360)
+        y -= (h + 3)
+
+    if doc.projects:
+        h = draw_paragraph(c, f"• {pdf_markup(doc.projects)}", style_bullet, L, y, W, 360)
+        y -= (h + 8)
+
+    if doc.final:
+        fh = draw_paragraph(c, pdf_markup(doc.final), style_normal, L, y, W, 140)
+        y -= fh
+
+
+# ==========================================
+# PAGE 2 — PDF
+# ==========================================
+CAREER_HEADERS = ["Domain", "Role", "Exciting Challenge", "Key Technical Skills", "Targeted Companies"]
+CAREER_COL_WIDTHS = (0.18, 0.15, 0.25, 0.20, 0.22)
+CAREER_TABLE_STYLE = [
+    ('BACKGROUND', (0, 0), (-1, 0), colors.white),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ('BOX', (0, 0), (-1, -1), 1, colors.black),
+    ('LINEBELOW', (0, 0), (-1, 0), 1, colors.black),
+    ('INNERGRID', (1, 0), (-1, -1), 0.5, colors.black),
+    ('LINEAFTER', (0, 0), (0, -1), 1, colors.black),
+    ('LEFTPADDING', (0, 0), (-1, -1), 5),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 4),
+]
+
+
+def career_col_widths():
+    W = A4[0] - MARGINS['left'] - MARGINS['right']
+    return [W * f for f in CAREER_COL_WIDTHS]
+
+
+class MeasuredParagraph(Paragraph):
+    """A Paragraph that keeps its line breaks for the width it was last wrapped to."""
+
+    _measured = None
+
+    def wrap(self, availWidth, availHeight):
+        if self._measured is None or self._measured[0] != availWidth:
+            self._measured = (availWidth, Paragraph.wrap(self, availWidth, availHeight))
+        return self._measured[1]
+
+
+class CareerBlock:
+    """
+    Rows of the career table laid out once: cells wrapped to their column
+    widths, the resulting row heights and the block's span/rule styles.
+
+    Blocks are shared by every request in the process; cells() hands out
+    shallow copies so concurrent tables never draw the same flowable.
+    """
+
+    def __init__(self, rows, span_domain):
+        self.rows         = rows
+        self.span_domain  = span_domain
+        table = Table(rows, colWidths=career_col_widths())
+        table.setStyle(TableStyle(CAREER_TABLE_STYLE + self.styles(0)))
+        table.wrap(sum(career_col_widths()), A4[1])
+        self.heights = list(table._rowHeights)
+
+    def styles(self, start):
+        """Span and rule commands for this block placed at table row `start`."""
+        if not self.span_domain:
+            return []
+        end = start + len(self.rows) - 1
+        styles = []
+        if end > start:
+            styles.append(('SPAN', (0, start), (0, end)))
+            styles.append(('VALIGN', (0, start), (0, end), 'MIDDLE'))
+            for sub_row in range(start, end):
+                styles.append(('LINEBELOW', (1, sub_row), (-1, sub_row), 0.3, colors.lightgrey))
+        styles.append(('LINEBELOW', (0, end), (-1, end), 1.5, colors.black))
+        return styles
+
+    def cells(self):
+        return [[copy.copy(cell) for cell in row] for row in self.rows]
+
+
+# Career-table blocks keyed by ("pdf" | "docx", rows), plus the PDF header block
+_blocks = {}
+_blocks_lock = threading.Lock()
+
+
+def _cached_block(key, build):
+    with _blocks_lock:
+        if key not in _blocks:
+            _blocks[key] = build()
+        return _blocks[key]
+
+
+def _build_career_header():
+    style_heading = PDF_STYLES['heading']
+    return CareerBlock([[MeasuredParagraph(f"<b>{h}</b>", style_heading) for h in CAREER_HEADERS]], span_domain=False)
+
+
+def _build_career_block(rows):
+    style_small = PDF_STYLES['small']
+    cells = []
+    for i, row in enumerate(rows):
+        domain_cell = MeasuredParagraph(f"<b>{row[0]}</b>", style_small) if i == 0 else ""
+        cells.append([domain_cell] + [MeasuredParagraph(str(value), style_small) for value in row[1:5]])
+    return CareerBlock(cells, span_domain=True)
+
+
+def get_career_header():
+    return _cached_block("header", _build_career_header)
+
+
+def get_career_block(rows):
+    """The CareerBlock for one domain's CAREER_TEMPLATES rows (a tuple of row tuples)."""
+    return _cached_block(("pdf", rows), lambda: _build_career_block(rows))
+
+
+def build_page2_tables(domains_title, career_blocks):
+    """
+    Build and lay out (wrap) the per-request tables for page 2: the domain row
+    of the services table and the career table.
+    """
+    page_width, page_height = A4
+    L = MARGINS['left']
+    R = page_width - MARGINS['right']
+    W = R - L
+
+    services_row = services_table([
+        ("<b>1. Industry-Relevant Projects</b>",
+         f"Work on 3 projects across {escape(domains_title)}, focusing on data modeling, EDA, Machine Learning, and GenAI for forecasting, cost optimization, anomaly detection, and decision support."),
+    ])
+
+    # Header and per-domain blocks are laid out once per process; a selection
+    # only concatenates them and wraps the assembled table
+    blocks = [get_career_header()] + [get_career_block(rows) for rows in career_blocks]
+
+    career_data, row_heights = [], []
+    table_style = list(CAREER_TABLE_STYLE)
+    for block in blocks:
+        table_style.extend(block.styles(len(career_data)))
+        career_data.extend(block.cells())
+        row_heights.extend(block.heights)
+
+    career_table = Table(career_data, colWidths=career_col_widths(), rowHeights=row_heights, repeatRows=1)
+    career_table.setStyle(TableStyle(table_style))
+    career_table.wrap(W, page_height)
+    return services_row, career_table
+
+
+def create_page2(c, doc, compact=False):
+    L = MARGINS['left']
+    layers = static_layers(compact)
+    services_row, career_table = build_page2_tables(doc.domains_title, doc.career_blocks)
+
+    y = layers["p2_header"].draw(c, A4[1])
+
+    services_h = services_row._height
+    services_row.drawOn(c, L, y - services_h)
+    y -= services_h
+
+    y = layers["p2_services_tail"].draw(c, y)
+
+    c.setFillColor(colors.black)
+    c.setFont("Times-Bold", 11)
+    c.drawString(L, y, f"{doc.domains_title} \u2013 Career Prescription Table")
+    y -= 14
+    c.setFont("Times-Italic", 11)
+    c.drawString(L, y, "(Actual projects will be revealed during placement training)")
+    y -= 14
+
+    career_h = career_table._height
+    career_table.drawOn(c, L, y - career_h)
+
+
+# ==========================================
+# PDF GENERATION
+# ==========================================
+def load_template_page3(compact=False):
+    """Page 3 of the brochure template, converted once per process (None if missing)."""
+    return get_template_page(TEMPLATE_CONFIG['template_path'], 2, "TemplatePage3", size=A4, compact=compact)
+
+
+def create_final_pdf(doc, compact=False):
+    """Renders a prescription_doc.Prescription. Returns (pdf bytes, None); saving it is up to the caller."""
+    # All three pages go on one canvas and are written in a single pass:
+    # our own pages are never serialized and parsed back
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    create_page1(c, doc, compact=compact)
+    c.showPage()
+    create_page2(c, doc, compact=compact)
+    c.showPage()
+
+    page3 = load_template_page3(compact)
+    if page3 is not None:
+        page3.draw(c)
+        c.showPage()
+
+    c.save()
+    return buffer.getvalue(), None
+
+
+# ==========================================
+# DOCX HELPER — tables built as one lxml tree
+# ==========================================
+DOCX_TABLE_PROPS = (
+    '<w:tblPr><w:tblStyle w:val="TableGrid"/><w:tblW w:type="auto" w:w="0"/><w:jc w:val="left"/>'
+    '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0" w:noHBand="0" w:noVBand="1"'
+    ' w:val="04A0"/></w:tblPr>'
+)
+NO_BORDERS = {'top': 'none', 'bottom': 'none', 'left': 'none', 'right': 'none'}
+
+
+def docx_run_xml(text, bold=False, size_pt=11):
+    """A w:r formatted like add_bold_run (bold) or add_run (plain)."""
+    props = '<w:b/>' if bold else '<w:b w:val="0"/><w:i w:val="0"/>'
+    space = ' xml:space="preserve"' if text != text.strip() else ''
+    return f'<w:r><w:rPr>{props}<w:sz w:val="{round(size_pt * 2)}"/></w:rPr><w:t{space}>{escape(text)}</w:t></w:r>'
+
+
+def docx_cell_xml(text, width_cm, bold=False, size_pt=11, space_pt=None, borders=None, fill=None,
+                  v_merge=None, v_align=None):
+    """
+    One w:tc with a single paragraph.
+
+    Args:
+        text:     cell text, or None for an empty paragraph (vMerge continuation)
+        width_cm: cell width
+        space_pt: paragraph space before and after
+        borders:  {side: val}, e.g. NO_BORDERS
+        fill:     background hex colour
+        v_merge:  "restart" on the first cell of a vertical span, "continue" below it
+        v_align:  "top" | "center" | "bottom"
+    """
+    props = f'<w:tcW w:type="dxa" w:w="{Cm(width_cm).twips}"/>'
+    if v_merge == "restart":
+        props += '<w:vMerge w:val="restart"/>'
+    elif v_merge:
+        props += '<w:vMerge/>'
+    if borders:
+        props += '<w:tcBorders>' + ''.join(
+            f'<w:{side} w:val="{val}" w:sz="4" w:color="000000"/>' for side, val in borders.items()
+        ) + '</w:tcBorders>'
+    if fill:
+        props += f'<w:shd w:val="clear" w:color="auto" w:fill="{fill}"/>'
+    if v_align:
+        props += f'<w:vAlign w:val="{v_align}"/>'
+
+    para = ''
+    if space_pt is not None:
+        twips = Pt(space_pt).twips
+        para += f'<w:pPr><w:spacing w:before="{twips}" w:after="{twips}"/></w:pPr>'
+    if text is not None:
+        para += docx_run_xml(text, bold, size_pt)
+    return f'<w:tc><w:tcPr>{props}</w:tcPr><w:p>{para}</w:p></w:tc>'
+
+
+def docx_table(rows, grid_width=None, col_count=None):
+    """
+    Parse a whole w:tbl in one go.
+
+    Args:
+        rows:       lists of docx_cell_xml strings
+        grid_width: Length shared equally by the grid columns, as add_table
+                    does; None emits only the rows (for blocks copied into
+                    another table)
+        col_count:  grid columns (default: cells in the first row)
+
+    Returns:
+        CT_Tbl element; splice it into a body or take its tr_lst
+    """
+    grid = ''
+    if grid_width is not None:
+        col_count = col_count or len(rows[0])
+        col = Emu(grid_width // col_count).twips
+        grid = DOCX_TABLE_PROPS + '<w:tblGrid>' + f'<w:gridCol w:w="{col}"/>' * col_count + '</w:tblGrid>'
+    body = ''.join('<w:tr>' + ''.join(cells) + '</w:tr>' for cells in rows)
+    return parse_xml(f'<w:tbl {nsdecls("w")}>{grid}{body}</w:tbl>')
+
+
+def add_bold_run(para, text, size_pt=11, color_hex=None):
+    run = para.add_run(text)
+    run.bold = True
+    run.font.size = Pt(size_pt)
+    if color_hex:
+        run.font.color.rgb = RGBColor.from_string(color_hex)
+    return run
+
+
+def add_run(para, text, bold=False, size_pt=11, italic=False):
+    run = para.add_run(text)
+    run.bold = bold
+    run.italic = italic
+    run.font.size = Pt(size_pt)
+    return run
+
+
+def parse_bold_text(para, html_text, size_pt=11):
+    """Parse <b>...</b> tags and add runs with correct bold formatting."""
+    for text, bold in split_bold(html_text):
+        r = para.add_run(text)
+        r.bold = bold
+        r.font.size = Pt(size_pt)
+
+
+DOCX_CAREER_COL_WIDTHS_CM = (3.0, 2.5, 4.2, 3.4, 3.6)
+
+
+def _build_career_block_docx(rows):
+    widths = DOCX_CAREER_COL_WIDTHS_CM
+    spanned = len(rows) > 1
+    cells = []
+    for i, row in enumerate(rows):
+        if i == 0:
+            domain = docx_cell_xml(row[0], widths[0], bold=True, size_pt=10, space_pt=3,
+                                   v_merge="restart" if spanned else None, v_align="center" if spanned else None)
+        else:
+            domain = docx_cell_xml(None, widths[0], space_pt=3, v_merge="continue")
+        cells.append([domain] + [
+            docx_cell_xml(str(value), width, size_pt=10, space_pt=3) for value, width in zip(row[1:5], widths[1:])
+        ])
+    return list(docx_table(cells).tr_lst)
+
+
+def get_career_block_docx(rows):
+    """
+    The w:tr elements of one domain's career-table rows (a tuple of row tuples),
+    with the domain cell merged vertically. Callers deep-copy them into their
+    own table.
+    """
+    return _cached_block(("docx", rows), lambda: _build_career_block_docx(rows))
+
+
+# ==========================================
+# WORD DOCUMENT GENERATION
+# ==========================================
+def _build_docx_base(header):
+    """
+    The static Word document: everything create_word_doc produces, with
+    {{field}} placeholders, one slot paragraph per kind of prescription
+    paragraph and the career table holding only its header row.
+    """
+    doc = Document()
+
+    # ── Page setup: A4, margins matching PDF ──
+    section = doc.sections[0]
+    section.page_width  = Cm(21)
+    section.page_height = Cm(29.7)
+    section.left_margin   = Cm(1.8)
+    section.right_margin  = Cm(1.8)
+    section.top_margin    = Cm(1.2)
+    section.bottom_margin = Cm(1.8)
+    # Tables are parsed whole (docx_table) and spliced into the body; their
+    # grid columns share the text width, as with doc.add_table
+    body = doc.element.body
+    block_width = section.page_width - section.left_margin - section.right_margin
+
+    # ── Default style ──
+    style = doc.styles['Normal']
+    style.font.name = 'Times New Roman'
+    style.font.size = Pt(11)
+
+    # ── HEADER IMAGE ── (cached bytes; python-docx stores one image part for both pages)
+    if header is not None:
+        header_para = doc.add_paragraph()
+        header_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        run = header_para.add_run()
+        run.add_picture(header.stream(), width=Inches(6.5))
+        header_para.paragraph_format.space_after = Pt(6)
+
+    # ── Divider line ──
+    div_para = doc.add_paragraph()
+    div_para.paragraph_format.space_before = Pt(0)
+    div_para.paragraph_format.space_after = Pt(8)
+    pPr = div_para._p.get_or_add_pPr()
+    pBdr = OxmlElement('w:pBdr')
+    bottom_bdr = OxmlElement('w:bottom')
+    bottom_bdr.set(qn('w:val'), 'single')
+    bottom_bdr.set(qn('w:sz'), '6')
+    bottom_bdr.set(qn('w:color'), '000000')
+    pBdr.append(bottom_bdr)
+    pPr.append(pBdr)
+
+    # ── Hi name ──
+    p = doc.add_paragraph()
+    p.paragraph_format.space_after = Pt(6)
+    add_bold_run(p, "Hi {{name}},")
+
+    # ── Intro paragraph ──
+    p = doc.add_paragraph()
+    p.paragraph_format.space_after = Pt(8)
+    parse_bold_text(p,
+        "Our Senior Data Scientist <b>Mr. Subramani</b>, has shared with you the prescription "
+        "based on your recent consultation to join our "
+        "<b>Nationwide Data Analytics Training and Placement Program 2025</b>."
+    )
+
+    # ── About Us ──
+    p = doc.add_paragraph()
+    p.paragraph_format.space_after = Pt(4)
+    add_bold_run(p, "About Us")
+
+    p = doc.add_paragraph()
+    p.paragraph_format.space_after = Pt(8)
+    parse_bold_text(p,
+        "At <b>Analytics Avenue and Advanced Analytics</b>, we are a team of "
+        "<b>Data Scientists, Data Engineers, and BI Developers</b> throughout India "
+        "across various MNCs joined together to keep a pause for unemployment and "
+        "empowered <b>500+ professionals</b> in the past year, enabling them to "
+        "transition into various <b>Data Analytics roles</b>."
+    )
+
+    # ── Instruction line ──
+    p = doc.add_paragraph()
+    p.paragraph_format.space_after = Pt(8)
+    add_bold_run(p, "Below you can find the career road map, Key outcomes & suggestions given by our Data Scientist")
+
+    # ── Details table ──
+    details = [
+        ("Name", "{{name}}"),
+        ("Status", "{{status}}"),
+        ("Technologies Needed", "SQL, Python, Statistics, Power BI, Machine Learning, Gen AI"),
+        ("Sectors Covered", "{{domains_title}}")
+    ]
+    # No borders: clean look matching the PDF
+    body._insert_tbl(docx_table([
+        [
+            docx_cell_xml(label, 4.5, bold=True, space_pt=2, borders=NO_BORDERS),
+            docx_cell_xml(":", 0.5, bold=True, space_pt=2, borders=NO_BORDERS),
+            docx_cell_xml(value, 11, space_pt=2, borders=NO_BORDERS),
+        ]
+        for label, value in details
+    ], block_width))
+    doc.add_paragraph().paragraph_format.space_after = Pt(4)
+
+    # ── Career Roadmap ──
+    p = doc.add_paragraph()
+    p.paragraph_format.space_after = Pt(4)
+    add_bold_run(p, "Career Roadmap")
+
+    roadmap = [
+        "Step 1 \u2192 Learn Tools (SQL, Python, Statistics, Power BI, Machine Learning, Gen AI)",
+        "Step 2 \u2192 Domain-Specific Projects",
+        "Step 3 \u2192 Role Readiness (interviews, placement support)"
+    ]
+    for step in roadmap:
+        p = doc.add_paragraph()
+        p.paragraph_format.space_after = Pt(2)
+        add_run(p, step)
+
+    sp = doc.add_paragraph()
+    sp.paragraph_format.space_after = Pt(4)
+
+    # ── Key Outcomes ──
+    p = doc.add_paragraph()
+    p.paragraph_format.space_after = Pt(4)
+    add_bold_run(p, "Key Outcomes")
+
+    outcomes = [
+        "Data Analysis Skills (SQL, Python, Visualization, Statistics)",
+        "Data Engineer Skills (Cloud, SQL, Python, Data Warehousing, ETL orchestration)",
+        "Machine Learning & Gen AI (LLMs, Prompt Engineering, RAG Pipelines, Embeddings, Vector Databases, Fine-Tuning & Deployment)",
+        "Domain Knowledge ({{domains_title}} etc.)",
+        "Recreate Industrial Standard projects worked by our Data Scientists",
+        "Placement opportunities, Organic job calls and referral drives"
+    ]
+    for item in outcomes:
+        p = doc.add_paragraph(style='List Bullet')
+        p.paragraph_format.space_after = Pt(2)
+        add_run(p, item)
+
+    sp = doc.add_paragraph()
+    sp.paragraph_format.space_after = Pt(4)
+
+    # ── Prescription ──
+    p = doc.add_paragraph()
+    p.paragraph_format.space_after = Pt(6)
+    add_bold_run(p, "Prescription:")
+
+    # Slot paragraphs: cloned once per AI paragraph (keeping their run format), then removed
+    p = doc.add_paragraph()
+    p.paragraph_format.space_after = Pt(6)
+    parse_bold_text(p, "[[intro]]")
+
+    p = doc.add_paragraph(style='List Bullet')
+    p.paragraph_format.space_after = Pt(3)
+    parse_bold_text(p, "[[bullets]]")
+
+    p = doc.add_paragraph()
+    p.paragraph_format.space_after = Pt(10)
+    parse_bold_text(p, "[[final]]")
+
+    # ── PAGE BREAK ──
+    doc.add_page_break()
+
+    # ── Header image page 2 ──
+    if header is not None:
+        header_para = doc.add_paragraph()
+        header_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        run = header_para.add_run()
+        run.add_picture(header.stream(), width=Inches(6.5))
+        header_para.paragraph_format.space_after = Pt(6)
+
+    div_para2 = doc.add_paragraph()
+    div_para2.paragraph_format.space_before = Pt(0)
+    div_para2.paragraph_format.space_after = Pt(8)
+    pPr2 = div_para2._p.get_or_add_pPr()
+    pBdr2 = OxmlElement('w:pBdr')
+    b2 = OxmlElement('w:bottom')
+    b2.set(qn('w:val'), 'single')
+    b2.set(qn('w:sz'), '6')
+    b2.set(qn('w:color'), '000000')
+    pBdr2.append(b2)
+    pPr2.append(pBdr2)
+
+    # ── Customized Services ──
+    p = doc.add_paragraph()
+    p.paragraph_format.space_after = Pt(6)
+    add_bold_run(p, "Our Customized Services for you:")
+
+    svc_headers = ["Service", "Details"]
+    svc_rows = [
+        ("1. Industry-Relevant Projects",
+         "Work on 3 projects across {{domains_title}}, focusing on data modeling, EDA, Machine Learning, and GenAI for forecasting, cost optimization, anomaly detection, and decision support."),
+        ("2. Secret Job Portals Access",
+         "Setup and optimize your profile on 9 exclusive job portals to help you receive organic job calls"),
+        ("3. Interview Preparation Materials",
+         "Lifetime access to interview notes, preparation guides, and materials prepared by top Data Scientists in real interview scenarios"),
+        ("4. Monthly In-Person Training",
+         "Attend monthly in-house classroom sessions (1 weekend per month) for revision, rapid preparation, and mentorship from experienced professionals"),
+    ]
+
+    body._insert_tbl(docx_table(
+        [[docx_cell_xml(svc_headers[0], 5, bold=True), docx_cell_xml(svc_headers[1], 11, bold=True)]]
+        + [
+            [docx_cell_xml(svc, 5, bold=True, space_pt=4), docx_cell_xml(detail, 11, space_pt=4)]
+            for svc, detail in svc_rows
+        ],
+        block_width,
+    ))
+
+    sp = doc.add_paragraph()
+    sp.paragraph_format.space_after = Pt(8)
+
+    # ── Career Prescription Table title ──
+    p = doc.add_paragraph()
+    p.paragraph_format.space_after = Pt(2)
+    add_bold_run(p, "{{domains_title}} – Career Prescription Table")
+
+    p = doc.add_paragraph()
+    p.paragraph_format.space_after = Pt(6)
+    r = p.add_run("(Actual projects will be revealed during placement training)")
+    r.italic = True
+    r.font.size = Pt(10)
+
+    # ── Career Table ──
+    # Header row only; each domain's rows (widths, runs, vertical merge) are
+    # built once per process and copied in per request
+    body._insert_tbl(docx_table([[
+        docx_cell_xml(hdr, width, bold=True, size_pt=10, space_pt=3)
+        for hdr, width in zip(CAREER_HEADERS, DOCX_CAREER_COL_WIDTHS_CM)
+    ]], block_width))
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+DOCX_DOCUMENT_PART = "word/document.xml"
+DOCX_FIELD = re.compile(r"\{\{(\w+)\}\}")
+DOCX_SLOT = re.compile(r"\[\[(\w+)\]\]")
+
+
+class DocxTemplate:
+    """
+    The base document parsed once: every package part but the main document
+    kept as a ready-made zip, and the main document's XML tree with the
+    positions of its fields, slots and career table.
+
+    render() deep-copies the tree, fills it and appends it to a copy of the
+    zip, so no python-docx objects are built and no static part (styles,
+    numbering, the header image) is re-serialized or re-compressed.
+    """
+
+    def __init__(self, data):
+        with zipfile.ZipFile(io.BytesIO(data)) as source:
+            self.document  = parse_xml(source.read(DOCX_DOCUMENT_PART))
+            self.date_time = source.getinfo(DOCX_DOCUMENT_PART).date_time
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, "w") as package:
+                for info in source.infolist():
+                    if info.filename != DOCX_DOCUMENT_PART:
+                        package.writestr(info, source.read(info))
+            self.package = buffer.getvalue()
+
+        # Indexes into document.iter(w:t) and into the body's children; a
+        # deep copy has the same structure, so they locate its nodes too
+        self.fields = [i for i, t in enumerate(self.document.iter(qn('w:t'))) if DOCX_FIELD.search(t.text or "")]
+        self.slots = {}
+        for i, child in enumerate(self.document.body):
+            if child.tag == qn('w:tbl'):
+                self.career_table = i
+            elif child.tag == qn('w:p'):
+                slot = DOCX_SLOT.fullmatch("".join(t.text or "" for t in child.iter(qn('w:t'))))
+                if slot:
+                    self.slots[slot.group(1)] = i
+
+    def render(self, fields, slots, career_rows):
+        """
+        Fill a copy of the base document.
+
+        Args:
+            fields:      {{field}} name -> text
+            slots:       slot name -> paragraphs, each a list of (text, bold) runs
+            career_rows: w:tr elements appended (copied) to the career table
+
+        Returns:
+            docx bytes
+        """
+        document = copy.deepcopy(self.document)
+
+        texts = list(document.iter(qn('w:t')))
+        for i in self.fields:
+            t = texts[i]
+            # Set through the run so tabs, breaks and edge spaces are handled as in add_run
+            t.getparent().text = DOCX_FIELD.sub(lambda m: fields[m.group(1)], t.text)
+
+        children = list(document.body)
+        table = children[self.career_table]
+        for tr in career_rows:
+            table.append(copy.deepcopy(tr))
+
+        for name, index in self.slots.items():
+            slot = children[index]
+            for runs in slots.get(name, ()):
+                p = copy.deepcopy(slot)
+                prototype = p.r_lst[0]
+                for r in p.r_lst:
+                    p.remove(r)
+                for text, bold in runs:
+                    run = Run(copy.deepcopy(prototype), None)
+                    run.text = text
+                    run.bold = bold
+                    p.append(run._r)
+                slot.addprevious(p)
+            slot.getparent().remove(slot)
+
+        buffer = io.BytesIO(self.package)
+        with zipfile.ZipFile(buffer, "a") as package:
+            info = zipfile.ZipInfo(DOCX_DOCUMENT_PART, date_time=self.date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            package.writestr(info, etree.tostring(document, encoding="UTF-8", standalone=True))
+        return buffer.getvalue()
+
+
+# The base document keyed by header image hash (one entry)
+_docx_templates = {}
+_docx_templates_lock = threading.Lock()
+
+
+def docx_template():
+    """The DocxTemplate for the current header image, built once per process and whenever the image changes."""
+    header = get_image_asset(TEMPLATE_CONFIG['header_path'])
+    signature = header.sha1 if header else None
+    with _docx_templates_lock:
+        if signature not in _docx_templates:
+            _docx_templates.clear()
+            _docx_templates[signature] = DocxTemplate(_build_docx_base(header))
+        return _docx_templates[signature]
+
+
+def create_word_doc(doc):
+    """Renders a prescription_doc.Prescription. Returns (docx bytes, None); saving it is up to the caller."""
+    bullets = list(doc.domain_bullets) + ([doc.projects] if doc.projects else [])
+    data = docx_template().render(
+        {"name": doc.name, "status": doc.status, "domains_title": doc.domains_title},
+        {
+            "intro":   [doc.intro],
+            "bullets": bullets,
+            "final":   [doc.final] if doc.final else [],
+        },
+        [tr for rows in doc.career_blocks for tr in get_career_block_docx(rows)],
+    )
+    return data, None
+
+
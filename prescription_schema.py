@@ -0,0 +1,346 @@
+"""
+Shape checks and local repair for the AI prescription JSON.
+
+The checks are the quality gates used by model routing and warmup.py. The
+repair functions fix the defects models commonly produce (markdown fences,
+trailing commas, <strong> instead of <b>, unclosed or nested <b> tags,
+strings where a list is expected, missing sections) without another Groq
+call. Only output that has no usable content left is re-asked.
+"""
+import json
+import re
+import threading
+
+from career_templates import CAREER_TEMPLATES
+
+REQUIRED_KEYS = ("intro_line", "domain_bullets", "projects_bullet", "final_sentence")
+COMBINATION_KEYS = ("intro_line", "projects_bullet", "final_sentence")
+
+
+# ==========================================
+# CHECKS
+# ==========================================
+def check_bold_markup(text):
+    """Return problems with the <b> markup in one AI string (empty list when fine)."""
+    depth = 0
+    for tag in re.findall(r"</?b>", text):
+        depth += 1 if tag == "<b>" else -1
+        if depth not in (0, 1):
+            return ["nested or unbalanced <b> tags"]
+    if depth:
+        return ["unclosed <b> tag"]
+    if "<b>" not in text:
+        return ["no <b> emphasis"]
+    return []
+
+
+def _check_strings(data, keys):
+    if not isinstance(data, dict):
+        return ["response is not a JSON object"]
+    problems = []
+    for key in keys:
+        value = data.get(key)
+        if not isinstance(value, str) or not value.strip():
+            problems.append(f"{key} must be a non-empty string")
+        else:
+            problems.extend(f"{key}: {p}" for p in check_bold_markup(value))
+    return problems
+
+
+def check_fragment(data):
+    """Quality gate for a DOMAIN_BULLET_PROMPT response."""
+    return _check_strings(data, ("domain_bullet",))
+
+
+def check_combination(data):
+    """Quality gate for a COMBINATION_PROMPT response."""
+    return _check_strings(data, COMBINATION_KEYS)
+
+
+def validate_prescription(data, selected_domains):
+    """Return a list of problems with an AI prescription dict (empty list when valid)."""
+    if not isinstance(data, dict):
+        return ["response is not a JSON object"]
+    problems = []
+    for key in REQUIRED_KEYS:
+        if key not in data:
+            problems.append(f"missing key: {key}")
+    bullets = data.get("domain_bullets")
+    if not isinstance(bullets, list) or not bullets or not all(isinstance(b, str) and b.strip() for b in bullets):
+        problems.append("domain_bullets must be a non-empty list of strings")
+    elif len(bullets) != len(selected_domains):
+        problems.append(f"expected {len(selected_domains)} domain_bullets, got {len(bullets)}")
+    for key in COMBINATION_KEYS:
+        value = data.get(key)
+        if key in data and not (isinstance(value, str) and value.strip()):
+            problems.append(f"{key} must be a non-empty string")
+    for key in REQUIRED_KEYS:
+        value = data.get(key)
+        texts = value if isinstance(value, list) else [value]
+        if any(isinstance(t, str) and t.count("<b>") != t.count("</b>") for t in texts):
+            problems.append(f"unbalanced <b> tags in {key}")
+    return problems
+
+
+# ==========================================
+# DEFAULTS (used for sections that cannot be repaired)
+# ==========================================
+def _lower_first(text):
+    return text[:1].lower() + text[1:]
+
+
+def default_domain_bullet(domain):
+    """Template bullet for one domain, built from its CAREER_TEMPLATES rows."""
+    rows = CAREER_TEMPLATES.get(domain)
+    if not rows:
+        return (f"In <b>{domain} Analytics</b>, you will work on real-world {domain.lower()} datasets "
+                f"covering performance analysis, forecasting, and data-driven decision making.")
+    challenges = " and ".join(_lower_first(row[2]) for row in rows)
+    return f"In <b>{rows[0][0]}</b>, you will learn to {challenges}."
+
+
+def default_combination_parts(domain_str):
+    """Template intro_line, projects_bullet and final_sentence for a domain combination."""
+    return {
+        "intro_line": (
+            f"Given your background, we will support your transition into <b>{domain_str} Analytics</b> roles, "
+            f"enabling you to solve real business and operational problems using <b>Machine Learning and GenAI</b>."
+        ),
+        "projects_bullet": (
+            f"Hands-on projects cover <b>{domain_str}</b> use cases such as forecasting, anomaly detection and "
+            f"performance analysis. You will also leverage <b>GenAI</b> for automated insights, root-cause analysis, "
+            f"and conversational analytics (projects revealed during placement training)."
+        ),
+        "final_sentence": (
+            f"You will apply <b>SQL, Statistics, Machine Learning, and GenAI</b> to <b>{domain_str.lower()}</b> "
+            f"datasets, preparing you for high-impact analytics roles across these domains."
+        ),
+    }
+
+
+# ==========================================
+# REPAIR
+# ==========================================
+def parse_json_loose(text):
+    """
+    json.loads that tolerates ```json fences, prose around the object and
+    trailing commas. Raises ValueError when no JSON object can be recovered.
+    """
+    try:
+        return json.loads(text)
+    except (TypeError, ValueError):
+        pass
+    text = text or ""
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
+        raise ValueError("no JSON object in response")
+    body = re.sub(r",\s*([}\]])", r"\1", text[start:end + 1])
+    try:
+        return json.loads(body)
+    except ValueError as e:
+        raise ValueError(f"malformed JSON in response: {e}") from e
+
+
+_BOLD_ALIASES = [
+    (re.compile(r"<\s*(?:b|strong)(?:\s[^<>]*)?>", re.I), "<b>"),
+    (re.compile(r"<\s*/\s*(?:b|strong)\s*>", re.I), "</b>"),
+]
+_OTHER_TAG = re.compile(r"</?(?!b>)[a-zA-Z][^<>]*>")
+_MARKDOWN_BOLD = re.compile(r"\*\*(.+?)\*\*")
+
+
+def repair_bold_markup(text, emphasis=()):
+    """
+    Normalise one AI string to flat, balanced <b> markup.
+
+    <strong>/<B>/**markdown** become <b>, other tags are dropped, nested opens
+    and stray closes are removed and an unclosed tag is closed at the end.
+    When the text has no emphasis at all, the first of `emphasis` (e.g. the
+    domain name) found in it is bolded.
+    """
+    for pattern, tag in _BOLD_ALIASES:
+        text = pattern.sub(tag, text)
+    text = _MARKDOWN_BOLD.sub(r"<b>\1</b>", text)
+    text = _OTHER_TAG.sub("", text)
+
+    out, depth = [], 0
+    for part in re.split(r"(</?b>)", text):
+        if part == "<b>":
+            if depth == 0:
+                out.append(part)
+            depth += 1
+        elif part == "</b>":
+            if depth == 1:
+                out.append(part)
+            depth = max(0, depth - 1)
+        else:
+            out.append(part)
+    if depth:
+        out.append("</b>")
+    text = re.sub(r"<b>(\s*)</b>", r"\1", "".join(out))
+    text = re.sub(r"\s+", " ", text).strip()
+
+    if "<b>" not in text:
+        for phrase in emphasis:
+            match = re.search(re.escape(phrase), text, re.I)
+            if match:
+                text = f"{text[:match.start()]}<b>{match.group(0)}</b>{text[match.end():]}"
+                break
+    return text
+
+
+def _coerce_text(value):
+    """A non-empty string from a string, list of strings or single-value dict (else None)."""
+    if isinstance(value, dict) and len(value) == 1:
+        value = next(iter(value.values()))
+    if isinstance(value, list) and all(isinstance(v, str) for v in value):
+        value = " ".join(v.strip() for v in value)
+    if isinstance(value, str) and value.strip():
+        return value.strip()
+    return None
+
+
+def _coerce_list(value):
+    """A list of non-empty strings from a list, a dict of strings or a bulleted/multi-line string."""
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, str):
+        value = value.splitlines()
+    if not isinstance(value, list):
+        return []
+    items = []
+    for item in value:
+        text = _coerce_text(item)
+        if text:
+            text = re.sub(r"^(?:[•*\-]|\d+[.)])\s*", "", text)
+            if text:
+                items.append(text)
+    return items
+
+
+def _repair_text(data, key, fixes, emphasis):
+    raw = data.get(key) if isinstance(data, dict) else None
+    text = _coerce_text(raw)
+    if text is None:
+        return None
+    if text != raw:
+        fixes.append(f"{key}: coerced to string")
+    fixed = repair_bold_markup(text, emphasis)
+    if fixed != text:
+        fixes.append(f"{key}: repaired <b> markup")
+    return fixed
+
+
+def repair_fragment(data, domain):
+    """
+    Returns:
+        (fragment, fixes) — fragment is None when nothing usable is left
+    """
+    fixes = []
+    if isinstance(data, str):
+        data, fixes = {"domain_bullet": data}, ["domain_bullet: bare string"]
+    elif isinstance(data, dict) and "domain_bullet" not in data and len(data) == 1:
+        fixes.append(f"domain_bullet: taken from {next(iter(data))!r}")
+        data = {"domain_bullet": next(iter(data.values()))}
+    bullet = _repair_text(data, "domain_bullet", fixes, (domain,))
+    if bullet is None:
+        return None, fixes
+    return {"domain_bullet": bullet}, fixes
+
+
+def repair_combination(data, domain_str):
+    """
+    Returns:
+        (parts, fixes) — missing keys are filled from default_combination_parts;
+        parts is None when no key is usable
+    """
+    fixes = []
+    emphasis = [domain_str] + domain_str.split(" & ")
+    parts = {key: _repair_text(data, key, fixes, emphasis) for key in COMBINATION_KEYS}
+    if not any(parts.values()):
+        return None, fixes
+    defaults = default_combination_parts(domain_str)
+    for key, value in parts.items():
+        if value is None:
+            parts[key] = defaults[key]
+            fixes.append(f"{key}: filled from default")
+    return parts, fixes
+
+
+def repair_prescription(data, selected_domains):
+    """
+    Repair a full prescription dict (store/cache entries and composed results).
+
+    domain_bullets are matched to the selected domains by name, then by
+    position; a domain without a usable bullet gets its default bullet.
+
+    Returns:
+        (data, fixes)
+
+    Raises:
+        ValueError when data is not an object or holds no usable AI text
+    """
+    if not isinstance(data, dict):
+        raise ValueError("prescription is not a JSON object")
+    domain_str = " & ".join(selected_domains)
+    parts, fixes = repair_combination(data, domain_str)
+    bullets = [repair_bold_markup(b) for b in _coerce_list(data.get("domain_bullets"))]
+    if parts is None and not bullets:
+        raise ValueError("prescription has no usable content")
+    if parts is None:
+        parts = default_combination_parts(domain_str)
+        fixes.append("combination parts: filled from defaults")
+    if bullets != data.get("domain_bullets"):
+        fixes.append("domain_bullets: repaired")
+
+    unmatched = list(bullets)
+    aligned = []
+    for domain in selected_domains:
+        match = next((b for b in unmatched if domain.lower() in b.lower()), None)
+        aligned.append(match)
+        if match is not None:
+            unmatched.remove(match)
+    for i, bullet in enumerate(aligned):
+        if bullet is None:
+            if unmatched:
+                aligned[i] = unmatched.pop(0)
+            else:
+                aligned[i] = default_domain_bullet(selected_domains[i])
+                fixes.append(f"domain_bullets: default for {selected_domains[i]}")
+        else:
+            aligned[i] = repair_bold_markup(bullet, (selected_domains[i],))
+
+    repaired = dict(data, **parts)
+    repaired["domain_bullets"] = aligned
+    return repaired, fixes
+
+
+class RepairStats:
+    """Thread-safe counters of how AI responses were repaired (for the UI)."""
+
+    def __init__(self):
+        self._lock        = threading.Lock()
+        self.checked      = 0
+        self.repaired     = 0
+        self.defaulted    = 0
+        self.unrepairable = 0
+
+    def record(self, fixes=(), defaulted=False, unrepairable=False):
+        with self._lock:
+            self.checked += 1
+            if unrepairable:
+                self.unrepairable += 1
+            elif defaulted:
+                self.defaulted += 1
+            elif fixes:
+                self.repaired += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "checked":      self.checked,
+                "repaired":     self.repaired,
+                "defaulted":    self.defaulted,
+                "unrepairable": self.unrepairable,
+                "repair_rate":  (self.repaired / self.checked) if self.checked else 0.0,
+            }
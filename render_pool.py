@@ -0,0 +1,280 @@
+"""
+Render the PDF and the Word document of a prescription off the script thread.
+
+Both renderers are CPU-bound pure Python, so threads would take turns on the
+GIL; they run in a small pool of worker processes instead. Workers are
+started once per app process and warmed with everything prescription_render
+caches (template page 3, header image, static layers, base Word document,
+career-table blocks), so a request only pays for its own layout.
+
+Each worker is its own script (render_worker.py) talking to the pool over
+pipes, rather than a multiprocessing child: multiprocessing re-imports the
+parent's __main__ in every child, and under Streamlit that is the whole app.
+
+The PDF is what the request waits for. The Word document is often never
+downloaded, so it is only submitted as a background job that the app
+collects when the user asks for it.
+"""
+import os
+import pickle
+import select
+import struct
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+import prescription_render
+from career_templates import CAREER_TEMPLATES
+
+# ==========================================
+# RENDER POOL CONFIG
+# ==========================================
+RENDER_CONFIG = {
+    # Worker processes; 0 renders the PDF in the calling thread and the Word
+    # document in one background thread (the default on a single CPU, where
+    # processes cannot overlap, and on Windows, where pipes cannot be polled)
+    'workers':   int(os.getenv("RENDER_WORKERS", "2" if (os.cpu_count() or 1) > 1 and os.name != "nt" else "0")),
+    # Limit for each document; a worker still busy after it is killed and replaced
+    'timeout_s': float(os.getenv("RENDER_TIMEOUT_S", "60")),
+}
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "render_worker.py")
+
+
+def warm_worker(compact=False):
+    """Fill the per-process render caches (run by each worker on start-up)."""
+    prescription_render.load_template_page3(compact)
+    prescription_render.static_layers(compact)
+    prescription_render.docx_template()
+    prescription_render.get_career_header()
+    for rows in CAREER_TEMPLATES.values():
+        rows = tuple(tuple(row) for row in rows)
+        prescription_render.get_career_block(rows)
+        prescription_render.get_career_block_docx(rows)
+
+
+def _timed(renderer, *args, **kwargs):
+    """Run one renderer; errors are returned, not raised, like the renderers' own (data, error)."""
+    started = time.perf_counter()
+    try:
+        data, error = renderer(*args, **kwargs)
+    except Exception as e:
+        data, error = None, f"{type(e).__name__}: {e}"
+    return data, error, time.perf_counter() - started
+
+
+def pdf_job(doc, compact=False):
+    return _timed(prescription_render.create_final_pdf, doc, compact=compact)
+
+
+def docx_job(doc):
+    return _timed(prescription_render.create_word_doc, doc)
+
+
+# Jobs a worker runs, by the name sent over the pipe
+JOBS = {
+    "pdf":  pdf_job,
+    "docx": docx_job,
+}
+
+
+# ==========================================
+# WORKER PIPE PROTOCOL
+# ==========================================
+# Each message is a pickle prefixed with its length (8 bytes, big-endian)
+_HEADER = struct.Struct(">Q")
+
+
+def write_frame(stream, obj):
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    stream.write(_HEADER.pack(len(data)))
+    stream.write(data)
+    stream.flush()
+
+
+def read_frame(stream):
+    """Blocking read of one message; None at end of stream (the worker side)."""
+    header = stream.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        return None
+    (size,) = _HEADER.unpack(header)
+    return pickle.loads(stream.read(size))
+
+
+class WorkerLost(Exception):
+    """The worker process died, or was killed after missing its deadline."""
+
+
+def _read_exact(fd, size, deadline):
+    chunks = []
+    while size:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+            raise TimeoutError
+        chunk = os.read(fd, min(size, 1 << 20))
+        if not chunk:
+            raise WorkerLost("render worker stopped unexpectedly")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+class _Worker:
+    """One render_worker.py process; runs one job at a time (hold `lock`)."""
+
+    def __init__(self, warm_compact):
+        self.proc = subprocess.Popen(
+            [sys.executable, WORKER_SCRIPT] + (["--compact"] if warm_compact else []),
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        )
+        self.lock   = threading.Lock()
+        self.queued = 0     # jobs assigned and not finished; guarded by the pool lock
+
+    @property
+    def alive(self):
+        return self.proc.poll() is None
+
+    def run(self, job, args, kwargs, deadline):
+        """
+        Run one job. The caller holds `lock`.
+
+        Raises:
+            TimeoutError: no result before `deadline` (the worker is killed)
+            WorkerLost:   the process is gone
+        """
+        try:
+            write_frame(self.proc.stdin, (job, args, kwargs))
+            fd = self.proc.stdout.fileno()
+            (size,) = _HEADER.unpack(_read_exact(fd, _HEADER.size, deadline))
+            return pickle.loads(_read_exact(fd, size, deadline))
+        except TimeoutError:
+            self.kill()
+            raise
+        except (OSError, ValueError) as e:   # broken pipe, closed stream
+            self.kill()
+            raise WorkerLost("render worker stopped unexpectedly") from e
+
+    def kill(self):
+        if self.alive:
+            self.proc.kill()
+        self.proc.wait()
+
+
+class RenderPool:
+    """
+    Worker processes running JOBS.
+
+    A job that misses the timeout, and a worker that crashes, are reported as
+    errors; that worker is killed and a new one started for the next job.
+    """
+
+    def __init__(self, workers, timeout_s, warm_compact=False):
+        self.workers      = workers
+        self.timeout_s    = timeout_s
+        self.warm_compact = warm_compact
+        self._workers     = []
+        self._lock        = threading.Lock()
+        # Threads that wait on workers (or, without workers, render the Word document)
+        self._dispatch    = ThreadPoolExecutor(max_workers=max(1, workers * 4), thread_name_prefix="render")
+
+    def _pick(self):
+        """Choose (and count a job on) the least busy worker, replacing dead ones."""
+        with self._lock:
+            self._workers = [w for w in self._workers if w.alive]
+            while len(self._workers) < self.workers:
+                self._workers.append(_Worker(self.warm_compact))
+            worker = min(self._workers, key=lambda w: w.queued)
+            worker.queued += 1
+            return worker
+
+    def _run(self, job, args, kwargs):
+        deadline = time.monotonic() + self.timeout_s
+        while True:
+            worker = self._pick()
+            try:
+                if not worker.lock.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                    return None, f"timed out after {self.timeout_s:.0f}s", None
+                try:
+                    if not worker.alive:
+                        continue   # killed while this job waited behind a timed-out one
+                    return worker.run(job, args, kwargs, deadline)
+                finally:
+                    worker.lock.release()
+            except TimeoutError:
+                return None, f"timed out after {self.timeout_s:.0f}s", None
+            except WorkerLost as e:
+                return None, str(e), None
+            finally:
+                with self._lock:
+                    worker.queued -= 1
+
+    def submit(self, job, *args, **kwargs):
+        """Queue one of JOBS; pass the returned Future to collect()."""
+        if self.workers <= 0:
+            return self._dispatch.submit(JOBS[job], *args, **kwargs)
+        return self._dispatch.submit(self._run, job, args, kwargs)
+
+    def start(self):
+        """Warm the caches ahead of the first request: in new workers (without waiting) or in this process."""
+        if self.workers <= 0:
+            warm_worker(self.warm_compact)
+            return
+        with self._lock:
+            while len(self._workers) < self.workers:
+                self._workers.append(_Worker(self.warm_compact))
+
+    def collect(self, future, wait=True):
+        """
+        Result of a submitted job.
+
+        Args:
+            future: returned by submit / submit_docx
+            wait:   block until it is done (at most timeout_s with workers);
+                    False only polls
+
+        Returns:
+            (data, error, seconds), or None when `wait` is False and the job
+            is still running
+        """
+        if not wait and not future.done():
+            return None
+        try:
+            return future.result()
+        except CancelledError:
+            return None, "render cancelled", None
+
+    def render_pdf(self, doc, compact=False):
+        """
+        Render the PDF of one prescription_doc.Prescription and wait for it.
+
+        Returns:
+            (pdf bytes or None, error or None, render seconds or None)
+        """
+        if self.workers <= 0:
+            return pdf_job(doc, compact=compact)
+        return self.collect(self.submit("pdf", doc, compact=compact))
+
+    def submit_docx(self, doc):
+        """Start the Word document in the background; pass the returned Future to collect()."""
+        return self.submit("docx", doc)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_render_pool(warm_compact=False):
+    """
+    Return the process-wide render pool built from RENDER_CONFIG.
+
+    `warm_compact` (also prepare compact-PDF caches in each worker) only
+    applies to the call that creates the pool.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = RenderPool(RENDER_CONFIG['workers'], RENDER_CONFIG['timeout_s'], warm_compact)
+            _pool.start()
+        return _pool
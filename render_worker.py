@@ -0,0 +1,30 @@
+"""
+Render worker process, started by render_pool.RenderPool.
+
+    python render_worker.py [--compact]
+
+Warms the render caches, then runs one job per message read from stdin
+(render_pool.JOBS name, args, kwargs) and writes each result to stdout,
+until stdin closes. As its own script, the worker never imports the app.
+"""
+import sys
+
+import render_pool
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    requests, results = sys.stdin.buffer, sys.stdout.buffer
+    sys.stdout = sys.stderr   # stray prints must not corrupt the result stream
+
+    render_pool.warm_worker("--compact" in argv)
+    while True:
+        message = render_pool.read_frame(requests)
+        if message is None:
+            return 0
+        job, args, kwargs = message
+        render_pool.write_frame(results, render_pool.JOBS[job](*args, **kwargs))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import copy
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done   = threading.Event()
+        self.result = None
+        self.error  = None
+
+
+class SingleFlight:
+    """
+    Process-wide coalescing of concurrent identical calls.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight block until it finishes and receive the same result (or error).
+    Every caller gets its own deep copy, so callers may mutate the result freely.
+    """
+
+    def __init__(self):
+        self._lock      = threading.Lock()
+        self._calls     = {}
+        self.executed   = 0
+        self.coalesced  = 0
+
+    def do(self, key, fn):
+        """
+        Run `fn()` once per concurrent group of callers sharing `key`.
+
+        Returns:
+            (result, shared) — shared is True when this caller piggy-backed on
+            another caller's in-flight execution.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return copy.deepcopy(call.result), not leader
+
+    def stats(self):
+        with self._lock:
+            total = self.executed + self.coalesced
+            return {
+                "executed":       self.executed,
+                "coalesced":      self.coalesced,
+                "in_flight":      len(self._calls),
+                "coalesce_rate":  (self.coalesced / total) if total else 0.0,
+            }
@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+
+@pytest.fixture(autouse=True)
+def repo_cwd(monkeypatch):
+    """Asset paths (assets/header.png, assets/template.pdf) are relative to the repo."""
+    monkeypatch.chdir(REPO_DIR)
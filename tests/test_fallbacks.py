@@ -0,0 +1,89 @@
+"""Template fallbacks are served to the user but never cached or stored."""
+import pytest
+
+import llm_usage
+import prescription_ai
+import warmup
+from prescription_cache import PrescriptionCache, PrescriptionStore
+from prescription_schema import default_combination_parts, default_domain_bullet
+
+DOMAINS = ["Finance", "Healthcare"]
+
+AI_TEXT = {
+    "domain_bullet":   "In <b>Analytics</b>, you will model real data.",
+    "intro_line":      "Into <b>Finance & Healthcare Analytics</b>.",
+    "projects_bullet": "Projects use <b>GenAI</b>.",
+    "final_sentence":  "Apply <b>SQL</b>.",
+}
+
+
+@pytest.fixture
+def groq(tmp_path, monkeypatch):
+    """Isolated cache, store and usage log; returns the fake model's call log."""
+    cache = PrescriptionCache(str(tmp_path / "cache.sqlite3"))
+    store = PrescriptionStore(str(tmp_path / "store.json"))
+    monkeypatch.setattr(prescription_ai, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(prescription_ai, "get_cache", lambda: cache)
+    monkeypatch.setattr(prescription_ai, "get_store", lambda: store)
+    monkeypatch.setattr(warmup, "get_store", lambda: store)
+    monkeypatch.setattr(llm_usage, "_log", llm_usage.UsageLog(str(tmp_path / "usage.jsonl")))
+
+    calls = []
+    state = {"down": True}
+
+    def routed_json(prompt, repair, check, on_section=None):
+        calls.append(prompt)
+        if state["down"]:
+            raise ValueError("unusable response from every tier")
+        return repair(dict(AI_TEXT))[0]
+
+    monkeypatch.setattr(prescription_ai, "_routed_json", routed_json)
+    return {"cache": cache, "store": store, "calls": calls, "state": state}
+
+
+def test_fallback_is_served_but_not_cached(groq):
+    data = prescription_ai.get_ai_prescription_text(DOMAINS)
+    assert "error" not in data
+    assert data["intro_line"] == default_combination_parts("Finance & Healthcare")["intro_line"]
+    assert data["domain_bullets"] == [default_domain_bullet(d) for d in DOMAINS]
+    assert groq["cache"].stats()["entries"] == 0
+
+    # The next request asks the model again and caches its answer
+    groq["state"]["down"] = False
+    calls = len(groq["calls"])
+    data = prescription_ai.get_ai_prescription_text(DOMAINS)
+    assert len(groq["calls"]) > calls
+    assert data["intro_line"] == AI_TEXT["intro_line"]
+    assert groq["cache"].stats()["entries"] == 4   # full prescription, 2 fragments, combination
+
+    calls = len(groq["calls"])
+    assert prescription_ai.get_ai_prescription_text(DOMAINS) == data
+    assert len(groq["calls"]) == calls
+
+
+def test_partial_fallback_caches_only_the_generated_fragments(groq, monkeypatch):
+    groq["state"]["down"] = False
+    original = prescription_ai._routed_json
+
+    def healthcare_down(prompt, repair, check, on_section=None):
+        if "domain: Healthcare" in prompt:
+            raise ValueError("unusable response from every tier")
+        return original(prompt, repair, check, on_section)
+
+    monkeypatch.setattr(prescription_ai, "_routed_json", healthcare_down)
+    data, defaulted = prescription_ai.generate_prescription(DOMAINS)
+    assert defaulted == ["domain_bullets"]
+    assert data["domain_bullets"][1] == default_domain_bullet("Healthcare")
+    assert groq["cache"].stats()["entries"] == 2   # Finance fragment and combination parts only
+
+
+def test_warmup_does_not_store_fallbacks(groq):
+    result = warmup.warm_one(DOMAINS, warmup.RateLimiter(0), retries=1)
+    assert not result["ok"]
+    assert result["attempts"] == 2
+    assert "template fallback" in result["error"]
+    assert len(groq["store"]) == 0
+
+    groq["state"]["down"] = False
+    assert warmup.warm_one(DOMAINS, warmup.RateLimiter(0), retries=1)["ok"]
+    assert len(groq["store"]) == 1
@@ -0,0 +1,104 @@
+import httpx
+import pytest
+from groq import APIStatusError, APITimeoutError
+
+import groq_client
+import llm_scheduler
+import llm_usage
+import prescription_ai
+from groq_client import GROQ_CLIENT_CONFIG, LLMError, chat_completion
+from llm_scheduler import TokenBucketScheduler
+from prescription_cache import PrescriptionCache, PrescriptionStore
+
+REQUEST = httpx.Request("POST", "https://api.groq.test/openai/v1/chat/completions")
+
+
+def status_error(status, retry_after=None):
+    headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+    return APIStatusError(f"HTTP {status}", response=httpx.Response(status, headers=headers, request=REQUEST),
+                          body=None)
+
+
+class FakeClient:
+    """Stands in for the Groq client: each create() raises or returns the next outcome."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls    = 0
+        self.chat     = self
+        self.completions = self
+
+    def create(self, timeout, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    """A fresh rate-limit queue with room for every call (so 429 penalties do not carry over) and usage log."""
+    monkeypatch.setattr(llm_scheduler, "_scheduler", TokenBucketScheduler({}, (6000, 10 ** 7), headroom=1.0))
+    monkeypatch.setattr(llm_usage, "_log", llm_usage.UsageLog(str(tmp_path / "usage.jsonl")))
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(groq_client.time, "sleep", slept.append)
+    monkeypatch.setitem(GROQ_CLIENT_CONFIG, 'max_retries', 3)
+    monkeypatch.setitem(GROQ_CLIENT_CONFIG, 'backoff_base', 0.01)
+    monkeypatch.setitem(GROQ_CLIENT_CONFIG, 'backoff_max', 0.01)
+    return slept
+
+
+def use_client(monkeypatch, client):
+    monkeypatch.setattr(groq_client, "get_groq_client", lambda api_key: client)
+    return client
+
+
+def test_retries_transient_errors(monkeypatch, sleeps):
+    client = use_client(monkeypatch, FakeClient(status_error(503), APITimeoutError(REQUEST), "done"))
+    assert chat_completion("key", model="retry-model", messages=[]) == "done"
+    assert client.calls == 3
+    assert len(sleeps) == 2
+
+
+def test_client_errors_are_not_retried(monkeypatch, sleeps):
+    use_client(monkeypatch, FakeClient(status_error(400), "unused"))
+    with pytest.raises(LLMError) as info:
+        chat_completion("key", model="client-error-model", messages=[])
+    assert (info.value.kind, info.value.status_code, info.value.attempts) == ("client", 400, 1)
+    assert sleeps == []
+
+
+def test_gives_up_after_max_retries_honouring_retry_after(monkeypatch, sleeps):
+    use_client(monkeypatch, FakeClient(*[status_error(429, retry_after=0.02)] * 4))
+    with pytest.raises(LLMError) as info:
+        chat_completion("key", model="rate-limited-model", messages=[])
+    assert (info.value.kind, info.value.attempts) == ("rate_limited", 4)
+    assert sleeps and all(delay >= 0.02 for delay in sleeps)
+
+
+def test_stops_when_the_backoff_would_exceed_the_latency_budget(monkeypatch, sleeps):
+    use_client(monkeypatch, FakeClient(status_error(503, retry_after=30), "unused"))
+    with pytest.raises(LLMError) as info:
+        chat_completion("key", latency_budget=5, model="budget-model", messages=[])
+    assert (info.value.kind, info.value.attempts) == ("upstream", 1)
+    assert sleeps == []
+
+
+def test_prescription_reports_the_error_info(tmp_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise LLMError("timeout", "request timed out", attempts=4, elapsed=45.0)
+
+    monkeypatch.setattr(prescription_ai, "GROQ_API_KEY", "test-key")
+    cache = PrescriptionCache(str(tmp_path / "cache.sqlite3"))
+    store = PrescriptionStore(str(tmp_path / "store.json"))
+    monkeypatch.setattr(prescription_ai, "get_cache", lambda: cache)
+    monkeypatch.setattr(prescription_ai, "get_store", lambda: store)
+    monkeypatch.setattr(prescription_ai, "chat_completion", fail)
+    data = prescription_ai.get_ai_prescription_text(["Finance"])
+    assert data["error_info"] == {"kind": "timeout", "message": "request timed out", "status_code": None,
+                                  "attempts": 4, "elapsed_s": 45.0}
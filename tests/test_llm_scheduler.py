@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+from llm_scheduler import QueueTimeout, TokenBucketScheduler, _parse_limits, listen_queue
+
+
+def test_parse_limits():
+    assert _parse_limits("a=30/6000, b = 10/500,junk") == {"a": (30.0, 6000.0), "b": (10.0, 500.0)}
+
+
+def test_headroom_scales_the_limits():
+    scheduler = TokenBucketScheduler({"m": (100, 1000)}, (10, 100), headroom=0.5)
+    scheduler.acquire("m", 0, timeout=1)
+    model = scheduler.stats()["models"][0]
+    assert model["rpm_left"] == pytest.approx(49, abs=0.1)
+    assert model["tpm_left"] == 500
+
+
+def test_unknown_models_use_the_default_limits():
+    scheduler = TokenBucketScheduler({}, (60, 600), headroom=1.0)
+    scheduler.acquire("other", 100, timeout=1)
+    assert scheduler.stats()["models"][0]["tpm_left"] == 500
+
+
+def test_admits_within_budget_without_waiting():
+    scheduler = TokenBucketScheduler({"m": (60, 6000)}, (60, 6000), headroom=1.0)
+    for _ in range(5):
+        assert scheduler.acquire("m", 100, timeout=1) < 0.05
+    stats = scheduler.stats()
+    assert (stats["admitted"], stats["queued"], stats["rejected"]) == (5, 0, 0)
+
+
+def test_rejects_up_front_when_the_wait_exceeds_the_timeout():
+    # 6 requests per minute: after the first, the next slot is ~10s away
+    scheduler = TokenBucketScheduler({"m": (6, 6000)}, (6, 6000), headroom=1.0)
+    for _ in range(6):
+        scheduler.acquire("m", 1, timeout=1)
+    started = time.monotonic()
+    with pytest.raises(QueueTimeout) as info:
+        scheduler.acquire("m", 1, timeout=1)
+    assert time.monotonic() - started < 0.5
+    assert info.value.position == 1
+    assert info.value.eta > 1
+    assert scheduler.stats()["rejected"] == 1
+    assert scheduler.stats()["models"][0]["waiting"] == 0
+
+
+def test_waits_for_the_token_bucket_to_refill():
+    # 6000 tokens per minute refill at 100/s
+    scheduler = TokenBucketScheduler({"m": (600, 6000)}, (600, 6000), headroom=1.0)
+    scheduler.acquire("m", 6000, timeout=1)
+    events = []
+    with listen_queue(lambda position, eta: events.append((position, eta))):
+        waited = scheduler.acquire("m", 20, timeout=2)
+    assert 0.1 < waited < 1.0
+    assert events[0][0] == 1
+    assert events[-1] == (0, 0.0)
+    assert scheduler.stats()["queued"] == 1
+
+
+def test_settle_returns_unused_tokens():
+    scheduler = TokenBucketScheduler({"m": (60, 1000)}, (60, 1000), headroom=1.0)
+    scheduler.acquire("m", 800, timeout=1)
+    scheduler.settle("m", estimated=800, actual=300)
+    assert scheduler.stats()["models"][0]["tpm_left"] == pytest.approx(700, abs=5)
+
+
+def test_penalize_holds_new_admissions():
+    scheduler = TokenBucketScheduler({"m": (60, 6000)}, (60, 6000), headroom=1.0)
+    scheduler.penalize("m", 30)
+    with pytest.raises(QueueTimeout):
+        scheduler.acquire("m", 1, timeout=5)
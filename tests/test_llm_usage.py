@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from llm_usage import USAGE_LOG_CONFIG, UsageLog, usage_scope
+
+
+class Usage:
+    def __init__(self, prompt_tokens, completion_tokens):
+        self.prompt_tokens     = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+
+@pytest.fixture
+def log(tmp_path):
+    return UsageLog(str(tmp_path / "usage.jsonl"))
+
+
+def test_summary_aggregates_calls_and_requests(log):
+    with usage_scope("Finance", "k" * 64) as scope:
+        log.record_call("small", Usage(100, 50), wall_s=0.5)
+        log.record_call("small", wall_s=2.0, error="timeout")
+        log.record_call("large", Usage(200, 80), wall_s=1.5)
+    log.record_prescription(scope, "miss")
+
+    summary = log.summary()
+    assert (summary["calls"], summary["requests"], summary["tokens"]) == (3, 1, 430)
+    small = next(m for m in summary["models"] if m["model"] == "small")
+    assert (small["calls"], small["errors"], small["p50_s"], small["avg_prompt_tok"]) == (2, 1, 0.5, 100)
+    [request] = summary["prescriptions"]
+    assert (request["cache"], request["requests"], request["avg_tokens"]) == ("miss", 1, 430)
+
+
+def test_file_is_read_once_then_kept_up_to_date(log, monkeypatch):
+    with open(log.path, "w", encoding="utf-8") as f:
+        for _ in range(3):
+            f.write(json.dumps({"type": "call", "model": "small", "prompt_tokens": 1, "completion_tokens": 1,
+                                "total_tokens": 2, "wall_s": 0.1, "error": None}) + "\n")
+    assert log.summary()["calls"] == 3
+
+    def no_reads(limit):
+        raise AssertionError("log file re-read")
+
+    monkeypatch.setattr(log, "tail", no_reads)
+    assert log.summary() is not log.summary()      # callers get their own copy
+    log.record_call("small", Usage(1, 1), wall_s=0.1)
+    assert log.summary()["calls"] == 4
+
+
+def test_summary_window_keeps_the_most_recent_records(log, monkeypatch):
+    monkeypatch.setitem(USAGE_LOG_CONFIG, 'summary_window', 2)
+    assert log.summary()["calls"] == 0
+    for model in ("a", "b", "c"):
+        log.record_call(model, Usage(1, 1), wall_s=0.1)
+    assert [m["model"] for m in log.summary()["models"]] == ["b", "c"]
@@ -0,0 +1,75 @@
+import pytest
+
+from model_router import ModelRouter, percentile
+
+TIERS = ["small", "large"]
+
+
+def reject_bad(result):
+    return ["bad"] if result == "bad" else []
+
+
+def test_first_tier_is_used_when_it_passes_the_check():
+    router = ModelRouter(TIERS)
+    calls = []
+    assert router.run(lambda model, remaining: calls.append(model) or "good", reject_bad) == ("good", "small")
+    assert calls == ["small"]
+    assert router.stats()["escalated"] == 0
+
+
+def test_rejected_output_escalates_to_the_next_tier():
+    router = ModelRouter(TIERS)
+    assert router.run(lambda model, remaining: "bad" if model == "small" else "good", reject_bad) == ("good", "large")
+    stats = router.stats()
+    assert stats["escalation_rate"] == 1.0
+    assert [(t["model"], t["accepted"], t["rejected"]) for t in stats["tiers"]] == [("small", 0, 1), ("large", 1, 0)]
+
+
+def test_errors_escalate_and_the_last_tier_is_final():
+    router = ModelRouter(TIERS)
+
+    def call(model, remaining):
+        if model == "small":
+            raise ValueError("unusable")
+        return "bad"
+
+    assert router.run(call, reject_bad) == ("bad", "large")
+    assert router.stats()["tiers"][0]["errors"] == 1
+
+
+def test_last_tier_errors_propagate():
+    router = ModelRouter(TIERS)
+
+    def call(model, remaining):
+        raise ValueError(model)
+
+    with pytest.raises(ValueError, match="large"):
+        router.run(call, reject_bad)
+
+
+def test_tiers_share_one_latency_budget(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("model_router.time.monotonic", lambda: now[0])
+    router = ModelRouter(TIERS)
+    remaining = []
+
+    def call(model, left):
+        remaining.append(left)
+        now[0] += 3
+        return "bad"
+
+    router.run(call, reject_bad, budget=10)
+    assert remaining == [10, 7]
+    router.run(call, reject_bad)
+    assert remaining[2:] == [None, None]
+
+
+def test_empty_tier_list_is_rejected():
+    with pytest.raises(ValueError):
+        ModelRouter([])
+
+
+def test_percentile():
+    assert percentile([], 50) is None
+    assert percentile([3, 1, 2, 4], 50) == 2
+    assert percentile(list(range(1, 101)), 95) == 95
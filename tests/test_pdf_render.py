@@ -0,0 +1,59 @@
+import io
+
+import pytest
+from pypdf import PdfReader
+from reportlab import rl_config
+
+import prescription_render
+from prescription_doc import build_prescription
+from prescription_render import create_final_pdf, get_table_data_with_rowspan
+
+AI_CONTENT = {
+    "domains_title":   "Finance & Retail",
+    "intro_line":      "Given your background, we will support your move into <b>Finance & Retail Analytics</b>.",
+    "domain_bullets":  ["In <b>Finance Analytics</b>, you will forecast budgets.",
+                        "In <b>Retail Analytics</b>, you will optimise assortments."],
+    "projects_bullet": "Projects use <b>GenAI</b> for automated insights.",
+    "final_sentence":  "You will apply <b>SQL and Machine Learning</b> to retail data.",
+}
+
+
+def make_doc(**changes):
+    table_rows, _ = get_table_data_with_rowspan(["Finance", "Retail"])
+    return build_prescription("Asha Rao", "Student", dict(AI_CONTENT, **changes), table_rows)
+
+
+def page_texts(pdf):
+    return [page.extract_text() for page in PdfReader(io.BytesIO(pdf)).pages]
+
+
+@pytest.fixture(autouse=True)
+def invariant(monkeypatch):
+    monkeypatch.setattr(rl_config, "invariant", 1)   # fixed dates and /ID, so PDFs compare byte for byte
+
+
+def render_cold(doc, compact=False):
+    """Render with the per-process layer and career-block caches emptied first."""
+    prescription_render._layers.clear()
+    prescription_render._blocks.clear()
+    pdf, error = create_final_pdf(doc, compact=compact)
+    assert error is None
+    return pdf
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_cached_layers_and_blocks_render_like_a_cold_start(compact):
+    doc = make_doc()
+    cold = render_cold(doc, compact)
+    assert create_final_pdf(doc, compact=compact)[0] == cold
+    assert create_final_pdf(doc, compact=compact)[0] == cold
+
+
+def test_edit_changes_only_the_edited_page():
+    before = page_texts(create_final_pdf(make_doc())[0])
+    after = page_texts(create_final_pdf(make_doc(intro_line="An <b>edited</b> introduction."))[0])
+
+    assert "edited introduction" in after[0].replace("\n", " ")
+    assert after[0] != before[0]
+    assert after[1:] == before[1:]
+    assert create_final_pdf(make_doc())[0] == render_cold(make_doc())
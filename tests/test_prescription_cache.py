@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+from prescription_cache import PrescriptionCache, PrescriptionStore, make_cache_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PrescriptionCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=60, max_entries=2)
+
+
+def test_cache_key_normalises_the_domain_list():
+    key = make_cache_key(["Finance", "Retail"], "m", 0.3, "v1")
+    assert make_cache_key([" Retail", "Finance ", "Retail", ""], "m", 0.3, "v1") == key
+    assert make_cache_key(["Finance", "Retail"], "m", 0.30001, "v1") == key
+
+
+@pytest.mark.parametrize("changes", [
+    {"domains": ["Finance"]}, {"model": "other"}, {"temperature": 0.7}, {"prompt_version": "v2"},
+])
+def test_cache_key_changes_with_each_input(changes):
+    args = dict(domains=["Finance", "Retail"], model="m", temperature=0.3, prompt_version="v1")
+    assert make_cache_key(**dict(args, **changes)) != make_cache_key(**args)
+
+
+def test_get_returns_what_was_set(cache):
+    cache.set("k", {"intro_line": "x"}, ["Finance"], "v1")
+    assert cache.get("k") == {"intro_line": "x"}
+    assert cache.get("missing") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1}
+
+
+def test_expired_entries_are_misses_and_removed(cache, monkeypatch):
+    now = 1_000_000.0
+    monkeypatch.setattr("prescription_cache.time.time", lambda: now)
+    cache.set("k", {"a": 1}, ["Finance"], "v1")
+    now += 60
+    assert cache.get("k") == {"a": 1}
+    now += 1
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_zero_ttl_never_expires(tmp_path, monkeypatch):
+    cache = PrescriptionCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=0)
+    now = 1_000_000.0
+    monkeypatch.setattr("prescription_cache.time.time", lambda: now)
+    cache.set("k", {"a": 1}, ["Finance"], "v1")
+    now += 10 * 365 * 24 * 3600
+    assert cache.get("k") == {"a": 1}
+
+
+def test_least_recently_used_entry_is_evicted(cache, monkeypatch):
+    now = 1_000_000.0
+    monkeypatch.setattr("prescription_cache.time.time", lambda: now)
+    for key in ("a", "b"):
+        now += 1
+        cache.set(key, {}, ["Finance"], "v1")
+    now += 1
+    cache.get("a")
+    now += 1
+    cache.set("c", {}, ["Finance"], "v1")
+    assert [cache.get(k) is not None for k in ("a", "b", "c")] == [True, False, True]
+
+
+def test_invalidate_prompt_version(cache):
+    cache.set("old", {}, ["Finance"], "v1")
+    cache.set("new", {}, ["Finance"], "v2")
+    assert cache.invalidate_prompt_version("v2", "v3") == 1
+    assert cache.get("old") is None
+    assert cache.get("new") == {}
+
+
+def test_store_round_trip_and_reload(tmp_path):
+    path = str(tmp_path / "store" / "prescriptions.json")
+    store = PrescriptionStore(path)
+    assert store.get("k") is None and len(store) == 0
+    store.put("k", {"intro_line": "x"}, model="m")
+    assert "k" in store
+    assert PrescriptionStore(path).get("k") == {"intro_line": "x"}
+    assert not os.path.exists(path + ".tmp")
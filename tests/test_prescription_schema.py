@@ -0,0 +1,97 @@
+import pytest
+
+from prescription_schema import (
+    check_bold_markup, check_combination, default_combination_parts, default_domain_bullet,
+    parse_json_loose, repair_bold_markup, repair_combination, repair_fragment, repair_prescription,
+    validate_prescription,
+)
+
+DOMAINS = ["Finance", "Retail"]
+
+
+def test_parse_json_loose_strips_fences_prose_and_trailing_commas():
+    text = 'Sure!\n```json\n{"a": [1, 2,], "b": {"c": "d",},}\n```'
+    assert parse_json_loose(text) == {"a": [1, 2], "b": {"c": "d"}}
+
+
+@pytest.mark.parametrize("text", ["", None, "no object here", '{"a": }'])
+def test_parse_json_loose_raises_value_error(text):
+    with pytest.raises(ValueError):
+        parse_json_loose(text)
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("In <strong>Finance</strong>, forecast.",   "In <b>Finance</b>, forecast."),
+    ("In **Finance**, forecast.",                "In <b>Finance</b>, forecast."),
+    ("In <B class='x'>Finance</B>, <i>now</i>.", "In <b>Finance</b>, now."),
+    ("<b>Finance <b>Analytics</b></b> roles",     "<b>Finance Analytics</b> roles"),
+    ("stray </b>close and <b>open",              "stray close and <b>open</b>"),
+    ("In <b> </b>Finance,\n  forecast.",          "In Finance, forecast."),
+])
+def test_repair_bold_markup(raw, expected):
+    assert repair_bold_markup(raw) == expected
+
+
+def test_repair_bold_markup_emphasises_a_phrase_when_there_is_none():
+    assert repair_bold_markup("In finance analytics, forecast.", ("Finance",)) == \
+        "In <b>finance</b> analytics, forecast."
+    assert check_bold_markup(repair_bold_markup("plain text", ("Finance",))) == ["no <b> emphasis"]
+
+
+def test_repair_fragment():
+    fragment, fixes = repair_fragment("In <strong>Finance</strong>, forecast.", "Finance")
+    assert fragment == {"domain_bullet": "In <b>Finance</b>, forecast."}
+    assert fixes == ["domain_bullet: bare string", "domain_bullet: repaired <b> markup"]
+
+    fragment, fixes = repair_fragment({"bullet": ["In Finance,", "forecast."]}, "Finance")
+    assert fragment == {"domain_bullet": "In <b>Finance</b>, forecast."}
+    assert len(fixes) == 3
+
+    assert repair_fragment({"domain_bullet": "  "}, "Finance") == (None, [])
+
+
+def test_repair_combination_fills_missing_keys_from_defaults():
+    parts, fixes = repair_combination({"intro_line": "Into <b>Finance & Retail</b>."}, "Finance & Retail")
+    defaults = default_combination_parts("Finance & Retail")
+    assert parts == {
+        "intro_line":      "Into <b>Finance & Retail</b>.",
+        "projects_bullet": defaults["projects_bullet"],
+        "final_sentence":  defaults["final_sentence"],
+    }
+    assert fixes == ["projects_bullet: filled from default", "final_sentence: filled from default"]
+    assert check_combination(parts) == []
+    assert repair_combination({"other": "x"}, "Finance & Retail") == (None, [])
+
+
+def test_repair_prescription_aligns_bullets_by_domain_name():
+    data = {
+        "intro_line":      "Into <b>Finance & Retail</b>.",
+        "domain_bullets":  "• In Retail, plan.\n• In Finance, forecast.",
+        "projects_bullet": "Use <b>GenAI</b>.",
+        "final_sentence":  "Apply <b>SQL</b>.",
+    }
+    repaired, fixes = repair_prescription(data, DOMAINS)
+    assert repaired["domain_bullets"] == ["In <b>Finance</b>, forecast.", "In <b>Retail</b>, plan."]
+    assert "domain_bullets: repaired" in fixes
+    assert validate_prescription(repaired, DOMAINS) == []
+
+
+def test_repair_prescription_defaults_missing_bullets():
+    data = {"intro_line": "Into <b>Finance</b>.", "domain_bullets": ["In <b>Finance</b>, forecast."]}
+    repaired, fixes = repair_prescription(data, DOMAINS)
+    assert repaired["domain_bullets"][1] == default_domain_bullet("Retail")
+    assert "domain_bullets: default for Retail" in fixes
+    assert validate_prescription(repaired, DOMAINS) == []
+
+
+@pytest.mark.parametrize("data", [["not", "a", "dict"], {}, {"domain_bullets": []}])
+def test_repair_prescription_raises_without_usable_content(data):
+    with pytest.raises(ValueError):
+        repair_prescription(data, DOMAINS)
+
+
+def test_validate_prescription_reports_problems():
+    problems = validate_prescription({"intro_line": "<b>open", "domain_bullets": ["x"]}, DOMAINS)
+    assert "missing key: projects_bullet" in problems
+    assert "expected 2 domain_bullets, got 1" in problems
+    assert "unbalanced <b> tags in intro_line" in problems
@@ -0,0 +1,60 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"value": [1, 2]}
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", fn)))
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("k", fn))) for _ in range(3)]
+    for t in followers:
+        t.start()
+    deadline = time.monotonic() + 5
+    while flight.stats()["coalesced"] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for t in [leader] + followers:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert all(value == {"value": [1, 2]} for value, _ in results)
+    stats = flight.stats()
+    assert (stats["executed"], stats["coalesced"], stats["in_flight"]) == (1, 3, 0)
+    assert stats["coalesce_rate"] == 0.75
+
+
+def test_each_caller_gets_its_own_copy():
+    flight = SingleFlight()
+    result = {"items": []}
+    value, shared = flight.do("k", lambda: result)
+    value["items"].append("changed")
+    assert not shared
+    assert result == {"items": []}
+
+
+def test_errors_reach_the_caller_and_are_not_remembered():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        flight.do("k", fail)
+    assert flight.do("k", lambda: 1) == (1, False)
+    assert flight.stats()["in_flight"] == 0
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from prescription_ai import PrescriptionStreamParser
+
+RESPONSE = {
+    "intro_line":      "Move into <b>Finance Analytics</b>.",
+    "projects_bullet": "Projects use <b>GenAI</b>, \"quoted\" and {braced} text.",
+    "final_sentence":  "Apply <b>SQL</b>.",
+}
+
+
+def feed_in_chunks(parser, text, size):
+    completed = []
+    for i in range(0, len(text), size):
+        completed += parser.feed(text[i:i + size])
+    return completed
+
+
+@pytest.mark.parametrize("size", [1, 7, 1000])
+def test_sections_complete_in_order_for_any_chunking(size):
+    parser = PrescriptionStreamParser()
+    completed = feed_in_chunks(parser, "```json\n" + json.dumps(RESPONSE, indent=2) + "\n```", size)
+    assert completed == list(RESPONSE.items())
+    assert parser.result() == RESPONSE
+
+
+def test_a_section_is_reported_only_once_its_value_is_closed():
+    parser = PrescriptionStreamParser()
+    assert parser.feed('{"intro_line": "Move into') == []
+    assert parser.feed(' <b>Finance</b>."') == []        # may still be followed by more JSON
+    assert parser.feed(', "count": 1') == [("intro_line", "Move into <b>Finance</b>.")]
+    assert parser.feed("2") == []                           # 1 was a truncated number
+    assert parser.feed("}") == [("count", 12)]
+
+
+def test_text_before_the_object_is_ignored():
+    parser = PrescriptionStreamParser()
+    assert parser.feed("Here is the JSON: ") == []
+    assert parser.feed('{"a": 1}') == [("a", 1)]
+    assert parser.result() == {"a": 1}
+
+
+def test_result_raises_when_the_stream_ends_early():
+    parser = PrescriptionStreamParser()
+    parser.feed('{"intro_line": "x", "final_sentence": "y')
+    with pytest.raises(ValueError):
+        parser.result()
+    assert parser.text == '{"intro_line": "x", "final_sentence": "y'
@@ -0,0 +1,142 @@
+"""
+Offline warm-up job: precompute AI prescriptions for every 1–3 domain combination.
+
+    python warmup.py --workers 4 --rpm 25
+
+Results are validated and written to the precomputed store that app.py reads
+before its cache, so interactive generation becomes a lookup. The job is
+resumable: combinations already in the store are skipped unless --force.
+"""
+import argparse
+import itertools
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from career_templates import CAREER_TEMPLATES
+from prescription_ai import (
+    GROQ_API_KEY, GROQ_MODEL, GROQ_TEMPERATURE, PROMPT_VERSION,
+    generate_prescription, get_store,
+)
+from prescription_cache import make_cache_key
+from prescription_schema import validate_prescription
+
+
+class RateLimiter:
+    """Spaces call starts at least 60 / rpm seconds apart across all worker threads."""
+
+    def __init__(self, rpm: float):
+        self.interval  = 60.0 / rpm if rpm else 0.0
+        self._lock     = threading.Lock()
+        self._next_at  = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_at)
+            self._next_at = start_at + self.interval
+        if start_at > now:
+            time.sleep(start_at - now)
+
+
+def domain_combinations(max_size: int = 3):
+    """Every 1..max_size subset of CAREER_TEMPLATES, each in sorted order."""
+    names = sorted(CAREER_TEMPLATES)
+    for size in range(1, max_size + 1):
+        yield from itertools.combinations(names, size)
+
+
+def warm_one(domains, limiter, retries):
+    """
+    Generate, validate and store one combination.
+
+    Returns:
+        dict with domains, ok, latency_s, attempts and error (None on success)
+    """
+    domains = list(domains)
+    key = make_cache_key(domains, GROQ_MODEL, GROQ_TEMPERATURE, PROMPT_VERSION)
+    error = None
+    for attempt in range(1, retries + 2):
+        limiter.wait()
+        started = time.perf_counter()
+        try:
+            data, defaulted = generate_prescription(domains)
+            problems = validate_prescription(data, domains)
+            if defaulted:
+                # Template text passes validation, but must never reach the permanent store
+                problems.append(f"template fallback for {', '.join(defaulted)}")
+            if problems:
+                raise ValueError("; ".join(problems))
+        except Exception as e:
+            error = str(e)
+            continue
+        latency = time.perf_counter() - started
+        get_store().put(
+            key, data,
+            domains=domains, model=GROQ_MODEL, temperature=GROQ_TEMPERATURE,
+            prompt_version=PROMPT_VERSION, latency_s=round(latency, 3), generated_at=int(time.time()),
+        )
+        return {"domains": domains, "ok": True, "latency_s": latency, "attempts": attempt, "error": None}
+    return {"domains": domains, "ok": False, "latency_s": None, "attempts": retries + 1, "error": error}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute AI prescriptions for all domain combinations.")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent Groq calls (default 4)")
+    parser.add_argument("--rpm", type=float, default=25, help="Max call starts per minute (default 25, 0 = unlimited)")
+    parser.add_argument("--retries", type=int, default=1, help="Retries per combination on error or invalid JSON")
+    parser.add_argument("--max-size", type=int, default=3, help="Largest combination size (default 3)")
+    parser.add_argument("--limit", type=int, default=0, help="Only process the first N pending combinations")
+    parser.add_argument("--force", action="store_true", help="Regenerate combinations already in the store")
+    parser.add_argument("--report", help="Write a JSON report of per-combination results to this path")
+    args = parser.parse_args(argv)
+
+    if not GROQ_API_KEY:
+        print("GROQ_API_KEY is not set", file=sys.stderr)
+        return 2
+
+    store = get_store()
+    combos = list(domain_combinations(args.max_size))
+    pending = [
+        c for c in combos
+        if args.force or make_cache_key(c, GROQ_MODEL, GROQ_TEMPERATURE, PROMPT_VERSION) not in store
+    ]
+    print(f"{len(combos)} combinations, {len(combos) - len(pending)} already stored, {len(pending)} pending "
+          f"(model={GROQ_MODEL}, prompt={PROMPT_VERSION})")
+    if args.limit:
+        pending = pending[:args.limit]
+
+    limiter = RateLimiter(args.rpm)
+    results = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = [pool.submit(warm_one, c, limiter, args.retries) for c in pending]
+        for i, future in enumerate(as_completed(futures), start=1):
+            res = future.result()
+            results.append(res)
+            label = " & ".join(res["domains"])
+            if res["ok"]:
+                print(f"[{i}/{len(pending)}] ok    {res['latency_s']:6.2f}s  {label}")
+            else:
+                print(f"[{i}/{len(pending)}] FAIL           {label}: {res['error']}")
+
+    ok = [r for r in results if r["ok"]]
+    failed = [r for r in results if not r["ok"]]
+    latencies = sorted(r["latency_s"] for r in ok)
+    print(f"\nDone in {time.perf_counter() - started:.1f}s: {len(ok)} ok, {len(failed)} failed, "
+          f"{len(store)} entries in store")
+    if latencies:
+        p50 = latencies[len(latencies) // 2]
+        print(f"Latency p50={p50:.2f}s max={latencies[-1]:.2f}s")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())